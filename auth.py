@@ -1,5 +1,6 @@
 from fastapi import HTTPException, Security, Request
 from fastapi.security import APIKeyHeader
+import json
 import os
 
 API_KEY_NAME = "x-api-key"
@@ -11,8 +12,18 @@ env_key = os.getenv("API_KEY")
 if env_key:
     ALLOWED_API_KEYS.add(env_key)
 
+# Per-key payload limits overriding the defaults, as JSON, e.g.
+# {"sk_live_abc": {"maxBytes": 5000000, "maxSeconds": 60, "maxLongSeconds": 3600}}
+API_KEY_LIMITS = json.loads(os.getenv("API_KEY_LIMITS", "{}"))
+
+def key_limits(api_key):
+    return API_KEY_LIMITS.get(api_key, {})
+
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
+def is_valid_api_key(api_key):
+    return bool(api_key) and api_key in ALLOWED_API_KEYS
+
 async def get_api_key(api_key: str = Security(api_key_header)):
     if not api_key:
         raise HTTPException(
@@ -0,0 +1,52 @@
+"""
+MP3 decode throughput per decoder backend, in seconds of audio per CPU-second.
+
+    python -m benchmarks.bench_decode [--rates 22050 16000]
+
+Each backend decodes the same clips to every requested rate, as one request
+would (e.g. 16 kHz for LID plus the feature rate). Feature drift is reported
+against the pyav_soxr backend, whose soxr resampler matches librosa.load.
+"""
+import argparse
+import time
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio, DECODERS, FEATURE_SAMPLE_RATE, extract_features
+
+def cpu_seconds(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        times.append(time.process_time() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[5, 30, 120])
+    parser.add_argument("--rates", type=int, nargs="+", default=[FEATURE_SAMPLE_RATE])
+    parser.add_argument("--source-rate", type=int, default=44100, help="sample rate of the encoded MP3")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    clips = [(seconds, encode_mp3(speech_like(seconds, sr=args.source_rate), args.source_rate))
+             for seconds in args.durations]
+    print(f"{'backend':>10} {'clip (s)':>9} {'cpu (ms)':>9} {'audio s/cpu s':>14} {'max feature drift':>18}")
+    for backend in DECODERS:
+        for seconds, mp3 in clips:
+            def decode():
+                audio = DecodedAudio(mp3, backend=backend)
+                return [audio.samples(sr) for sr in args.rates]
+            try:
+                decode()  # warm up
+            except ValueError as e:
+                print(f"{backend:>10} {seconds:>9.0f} unavailable: {e}")
+                continue
+            cpu = cpu_seconds(decode, args.repeat)
+
+            reference = extract_features(DecodedAudio(mp3, backend="pyav_soxr").samples(FEATURE_SAMPLE_RATE), FEATURE_SAMPLE_RATE)
+            features = extract_features(DecodedAudio(mp3, backend=backend).samples(FEATURE_SAMPLE_RATE), FEATURE_SAMPLE_RATE)
+            drift = max(abs(features[k] - reference[k]) / (abs(reference[k]) or 1.0) for k in reference)
+            print(f"{backend:>10} {seconds:>9.0f} {cpu * 1000:>9.1f} {seconds / max(cpu, 1e-9):>14.0f} {drift:>17.2%}")
+
+if __name__ == "__main__":
+    main()
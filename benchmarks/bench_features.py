@@ -0,0 +1,38 @@
+"""
+Per-clip feature extraction time: original librosa calls vs the shared-STFT engine.
+
+    python -m benchmarks.bench_features
+"""
+import argparse
+import time
+from benchmarks.reference import reference_features
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features, FEATURE_SAMPLE_RATE
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10, 30, 60])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sr = FEATURE_SAMPLE_RATE
+    print(f"{'clip (s)':>9} {'librosa (ms)':>13} {'engine (ms)':>12} {'speedup':>8}")
+    for seconds in args.durations:
+        y = speech_like(seconds, sr=sr)
+        # Warm up numba / FFT plans outside the timed region
+        reference_features(y, sr)
+        extract_features(y, sr)
+        ref = best_of(lambda: reference_features(y, sr), args.repeat)
+        new = best_of(lambda: extract_features(y, sr), args.repeat)
+        print(f"{seconds:>9.0f} {ref * 1000:>13.1f} {new * 1000:>12.1f} {ref / new:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+RandomForest inference: sklearn predict_proba vs the flat-array CompiledForest.
+
+    python -m benchmarks.bench_forest [--model model.pkl]
+
+Uses the trained model when it exists, otherwise fits a forest on synthetic
+features. Reports latency for one row and for larger batches, and checks
+that both paths return bit-identical probabilities.
+"""
+import argparse
+import os
+import time
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from core.forest import CompiledForest
+from train_model import generate_synthetic_data
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="model.pkl")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 64, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if os.path.exists(args.model):
+        artifact = joblib.load(args.model)
+        clf = artifact["model"] if isinstance(artifact, dict) else artifact
+        print(f"Model: {args.model}")
+    else:
+        X, y = generate_synthetic_data()
+        clf = RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y)
+        print("Model: synthetic forest")
+    forest = CompiledForest.from_sklearn(clf)
+    print(f"{forest.n_trees} trees, {len(forest.feature)} nodes, max depth {forest.max_depth}")
+
+    X, _ = generate_synthetic_data(max(args.rows))
+    print(f"{'rows':>6} {'sklearn (ms)':>13} {'compiled (ms)':>14} {'speedup':>8} {'identical':>10}")
+    for n in args.rows:
+        batch = X[:n]
+        identical = np.array_equal(clf.predict_proba(batch), forest.predict_proba(batch))
+        repeat = max(1, args.repeat if n <= 1000 else args.repeat // 10)
+        sk = best_of(lambda: clf.predict_proba(batch), repeat)
+        cf = best_of(lambda: forest.predict_proba(batch), repeat)
+        print(f"{n:>6} {sk * 1000:>13.2f} {cf * 1000:>14.2f} {sk / cf:>7.1f}x {str(identical):>10}")
+
+if __name__ == "__main__":
+    main()
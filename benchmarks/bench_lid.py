@@ -0,0 +1,61 @@
+"""
+Language ID latency and accuracy: legacy transcribe() path vs the detect-only fast path.
+
+    python -m benchmarks.bench_lid --data-dir samples/
+
+Clips are labelled by file name prefix, e.g. Tamil_voice.mp3 or hindi_03.mp3.
+Needs the Whisper model (downloaded on first use).
+"""
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from core.audio_utils import DecodedAudio
+from core.lid import get_detector, ISO_MAP, LID_SAMPLE_RATE
+
+LANGUAGES = {name.lower(): name for name in ISO_MAP.values()}
+# Common misspellings in our sample files
+LANGUAGES["malyalam"] = "Malayalam"
+
+def label_for(path):
+    prefix = os.path.basename(path).split("_")[0].split(".")[0].lower()
+    return LANGUAGES.get(prefix)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    files = [(path, label_for(path)) for path in sorted(glob.glob(os.path.join(args.data_dir, "*.mp3")))]
+    files = [(path, label) for path, label in files if label]
+    if not files:
+        print(f"No labelled MP3 files (e.g. Tamil_voice.mp3) found in {args.data_dir}")
+        return
+
+    detector = get_detector()
+    results = {"transcribe": [], "detect": []}
+    for path, label in files:
+        for _ in range(args.repeat):
+            # Legacy path: transcribe() decodes the file itself
+            start = time.perf_counter()
+            code, _ = detector.identify(path, mode="transcribe")
+            results["transcribe"].append((time.perf_counter() - start, ISO_MAP.get(code) == label))
+
+            # Fast path: in-memory decode + language-ID pass on the voiced prefix
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                audio = DecodedAudio(f.read())
+            code, _ = detector.identify(audio.samples(LID_SAMPLE_RATE), mode="detect")
+            results["detect"].append((time.perf_counter() - start, ISO_MAP.get(code) == label))
+
+    print(f"{len(files)} clips, {args.repeat} run(s) each")
+    print(f"{'mode':>11} {'mean (ms)':>10} {'p50 (ms)':>9} {'max (ms)':>9} {'accuracy':>9}")
+    for mode, rows in results.items():
+        latencies = np.array([r[0] for r in rows]) * 1000
+        accuracy = np.mean([r[1] for r in rows])
+        print(f"{mode:>11} {latencies.mean():>10.1f} {np.median(latencies):>9.1f} {latencies.max():>9.1f} {accuracy:>8.1%}")
+
+if __name__ == "__main__":
+    main()
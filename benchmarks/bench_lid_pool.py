@@ -0,0 +1,45 @@
+"""
+Language-ID throughput for a given number of Whisper replicas and threads.
+
+    LID_REPLICAS=2 LID_THREADS=2 python -m benchmarks.bench_lid_pool [--requests 16]
+
+Sends --requests concurrent clips through LidService and reports wall time,
+requests/second and throughput per replica. Needs the faster-whisper model
+(downloaded from Hugging Face on first use). Run it with a few
+replica/thread combinations whose product fits the instance's cores.
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio
+from core.lid import get_detector, get_lid_service, LID_REPLICAS, LID_SAMPLE_RATE, LID_THREADS, MODEL_SIZE
+
+def detect(mp3):
+    return get_detector().detect(DecodedAudio(mp3).samples(LID_SAMPLE_RATE))
+
+async def run(mp3, n):
+    service = get_lid_service()
+    return await asyncio.gather(*(service.run(detect, mp3) for _ in range(n)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    mp3 = encode_mp3(speech_like(args.seconds))
+    print(f"Model: {MODEL_SIZE}, {LID_REPLICAS} replicas x {LID_THREADS} threads")
+    detect(mp3)  # load the model outside the timing
+
+    start = time.perf_counter()
+    languages = asyncio.run(run(mp3, args.requests))
+    elapsed = time.perf_counter() - start
+    stats = get_lid_service().stats()
+    print(f"{args.requests} requests in {elapsed:.2f}s: {args.requests / elapsed:.2f} req/s, "
+          f"{stats['throughputPerReplica']:.2f} req/s per busy replica, rejected {stats['rejected']}")
+    print(f"Detected: {sorted(set(map(str, languages)))}")
+    get_lid_service().shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-worker memory and startup time with N processes serving one model:
+unpickled sklearn forest (COMPILED_FOREST=0) vs the memory-mapped export.
+
+    python -m benchmarks.bench_memory [--workers 4] [--model model.pkl]
+
+Without --model a deliberately large forest is trained into a temp dir so the
+difference is visible. RSS counts shared pages in every process; PSS splits
+them between the processes sharing them, so sum(PSS) is the real footprint.
+Linux only (reads /proc/self/smaps_rollup).
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+
+def memory_mb():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    return values
+
+def worker(model_path, compiled, barrier, results):
+    import core.detector
+    from core.detector import ModelRegistry
+    core.detector.COMPILED_FOREST = compiled
+    before = memory_mb()
+    start = time.perf_counter()
+    model = ModelRegistry(model_path).get()
+    load_seconds = time.perf_counter() - start
+    # Score enough rows to touch the whole forest, like a warmed-up worker
+    model.clf.predict_proba(np.random.RandomState(0).rand(2000, 5))
+    # Measure while every worker holds the model, so shared pages are split
+    barrier.wait()
+    after = memory_mb()
+    results.put((after["rss"] - before["rss"], after["pss"] - before["pss"], load_seconds))
+    barrier.wait()
+
+def run(model_path, compiled, n_workers):
+    ctx = multiprocessing.get_context("spawn")  # like uvicorn --workers
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(model_path, compiled, barrier, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return np.array(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", help="existing model.pkl (default: train a large one)")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model
+        if not model_path:
+            from sklearn.ensemble import RandomForestClassifier
+            from core.detector import save_model
+            rng = np.random.RandomState(0)
+            X = rng.rand(args.samples, 5)
+            y = np.where(rng.rand(args.samples) > 0.5, "HUMAN", "AI_GENERATED")  # noisy labels: deep trees
+            model_path = os.path.join(tmp, "model.pkl")
+            save_model(RandomForestClassifier(n_estimators=args.trees, random_state=0).fit(X, y), model_path)
+        print(f"Model: {model_path} ({os.path.getsize(model_path) / 1e6:.0f} MB pickled), {args.workers} workers")
+
+        print(f"{'artifact':>10} {'RSS/worker (MB)':>16} {'PSS/worker (MB)':>16} {'total PSS (MB)':>15} {'load (ms)':>10}")
+        for name, compiled in (("pickle", False), ("mmap", True)):
+            rows = run(model_path, compiled, args.workers)
+            rss, pss, load = rows.mean(axis=0)
+            print(f"{name:>10} {rss:>16.1f} {pss:>16.1f} {rows[:, 1].sum():>15.1f} {load * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Pitch backends for pitch_std: accuracy against a known f0 and speed/memory.
+
+    python -m benchmarks.bench_pitch
+    python -m benchmarks.bench_pitch --durations 10 60 --repeat 3
+
+Accuracy: speech-like clips with a known f0 contour and increasing pitch
+variability. For each backend it prints pitch_std next to the true f0 spread
+of the voiced samples, and the correlation of each backend with the truth
+across clips. For YIN it also prints the frame-level f0 error.
+
+Speed and memory: time and peak traced allocation of the pitch step alone
+for librosa.piptrack (the original implementation), the shared-STFT peak
+picker ("piptrack" backend, with the STFT that it shares with spectral
+flatness timed separately) and YIN on 8 kHz audio ("yin" backend).
+"""
+import argparse
+import time
+import tracemalloc
+import librosa
+import numpy as np
+import scipy.fft
+from benchmarks.synth import speech_like
+from core.audio_utils import _frame, _window, _pitch_std, extract_features, FEATURE_SAMPLE_RATE
+from core.pitch import yin, YIN_HOP, YIN_SAMPLE_RATE
+
+def librosa_pitch_std(y, sr):
+    # benchmarks.reference, pitch part only
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+    pitch_values = pitches[magnitudes > np.median(magnitudes)]
+    return float(np.std(pitch_values)) if len(pitch_values) > 0 else 0.0
+
+def stft_mag(y):
+    return np.abs(scipy.fft.rfft(_frame(y) * _window, axis=1))
+
+def measure(fn, repeat):
+    """
+    (best time in seconds, peak traced bytes) of fn().
+    """
+    fn()
+    best = min(_timed(fn) for _ in range(repeat))
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def accuracy(sr, seconds=6.0, jitters=(1, 3, 6, 12, 25, 50), seeds=(0, 1)):
+    print(f"Accuracy ({seconds:.0f}s clips at {sr} Hz, f0 around 140 Hz)")
+    print(f"{'jitter':>7} {'seed':>5} {'true f0 std':>12} {'piptrack':>9} {'yin':>7} {'yin voiced':>11} "
+          f"{'yin f0 err':>11} {'gross err':>10}")
+    truth, pip, yn = [], [], []
+    for jitter in jitters:
+        for seed in seeds:
+            y, f0_true, audible = speech_like(seconds, sr=sr, seed=seed, pitch_jitter=jitter, return_f0=True)
+            true_std = float(np.std(f0_true[audible]))
+            pip_std = extract_features(y, sr)["pitch_std"]
+            yin_std = extract_features(y, sr, pitch="yin")["pitch_std"]
+
+            # Frame-level f0 error where both YIN and the truth say voiced
+            f0, voiced = yin(y, sr)
+            centers = np.minimum((np.arange(len(f0)) * YIN_HOP * sr / YIN_SAMPLE_RATE).astype(int), len(y) - 1)
+            both = voiced & audible[centers]
+            cents = 1200 * np.abs(np.log2(f0[both] / f0_true[centers][both]))
+            print(f"{jitter:>7} {seed:>5} {true_std:>12.1f} {pip_std:>9.1f} {yin_std:>7.1f} {voiced.mean():>11.0%} "
+                  f"{np.median(cents):>8.1f} ct {np.mean(cents > 100):>10.1%}")
+            truth.append(true_std)
+            pip.append(pip_std)
+            yn.append(yin_std)
+    print(f"Correlation with the true f0 spread: piptrack {np.corrcoef(truth, pip)[0, 1]:.2f}, "
+          f"yin {np.corrcoef(truth, yn)[0, 1]:.2f}")
+
+def speed(sr, durations, repeat):
+    print(f"\nPitch step per clip at {sr} Hz: best time (ms) / peak allocation (MB)")
+    print(f"{'clip (s)':>9} {'librosa.piptrack':>18} {'STFT (shared)':>15} {'peak picker':>13} {'yin':>13}")
+    for seconds in durations:
+        y = speech_like(seconds, sr=sr)
+        mag = stft_mag(y)
+        cells = [
+            measure(lambda: librosa_pitch_std(y, sr), repeat),
+            measure(lambda: stft_mag(y), repeat),
+            measure(lambda: _pitch_std(mag, sr), repeat),
+            measure(lambda: yin(y, sr), repeat),
+        ]
+        print(f"{seconds:>9.0f} " + " ".join(
+            f"{t * 1000:>7.1f} / {peak / 1e6:<5.0f}".rjust(w) for (t, peak), w in zip(cells, (18, 15, 13, 13))
+        ))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10, 30, 60])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sample-rate", type=int, default=FEATURE_SAMPLE_RATE)
+    args = parser.parse_args()
+    accuracy(args.sample_rate)
+    speed(args.sample_rate, args.durations, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+JSON/base64 vs raw binary upload: API-process latency and peak memory per request.
+
+    python -m benchmarks.bench_upload [--full]
+
+By default the worker pool is replaced by a stub so only transport, parsing
+and decode-to-bytes are measured; --full runs the real detection pipeline.
+"""
+import argparse
+import base64
+import time
+import tracemalloc
+import numpy as np
+from fastapi.testclient import TestClient
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.cache import ResultCache
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+
+class StubPool:
+    def check_capacity(self, n=1):
+        pass
+    async def run(self, fn, *args):
+        return {"classification": "HUMAN", "confidenceScore": 0.5, "explanation": "stub"}, None
+
+def measure(send, repeat):
+    send()  # warm up
+    latencies = []
+    peaks = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = send()
+        latencies.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert response.status_code == 200, response.text
+    return np.median(latencies) * 1000, max(peaks) / 1e6
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[1, 10, 60])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--full", action="store_true", help="run the real pipeline instead of a stub")
+    args = parser.parse_args()
+
+    if not args.full:
+        main.get_pool = lambda: StubPool()
+    # Never answer from the cache: every request must go through the pipeline
+    main.get_cache = lambda: ResultCache(max_entries=0)
+    client = TestClient(main.app)
+
+    print(f"{'clip (s)':>9} {'mp3 (KB)':>9} {'json ms':>8} {'raw ms':>8} {'json peak MB':>13} {'raw peak MB':>12}")
+    for seconds in args.durations:
+        mp3 = encode_mp3(speech_like(seconds))
+        payload = {"language": "English", "audioFormat": "mp3", "audioBase64": base64.b64encode(mp3).decode()}
+        json_ms, json_mb = measure(
+            lambda: client.post("/api/voice-detection", headers=HEADERS, json=payload), args.repeat)
+        raw_ms, raw_mb = measure(
+            lambda: client.post("/api/voice-detection/upload?language=English",
+                                headers={**HEADERS, "content-type": "application/octet-stream"}, content=mp3),
+            args.repeat)
+        print(f"{seconds:>9.0f} {len(mp3) / 1024:>9.0f} {json_ms:>8.1f} {raw_ms:>8.1f} {json_mb:>13.2f} {raw_mb:>12.2f}")
+
+if __name__ == "__main__":
+    main_cli()
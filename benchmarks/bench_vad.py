@@ -0,0 +1,52 @@
+"""
+Compute saved by silence trimming on silence-heavy clips (voicemail-like:
+speech between a quiet lead-in and a long quiet tail).
+
+    python -m benchmarks.bench_vad
+    python -m benchmarks.bench_vad --speech 10 --silence 0 10 30 60
+
+For each clip it reports the feature extraction time without and with
+trimming, the share of frames the STFT skips, and how much audio reaches
+Whisper (language ID gets only the speech, at most LID_SECONDS of it).
+"""
+import argparse
+import numpy as np
+from benchmarks.bench_features import best_of
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features, speech_frames
+from core.lid import voiced_prefix, LID_SAMPLE_RATE
+
+def voicemail(speech_seconds, silence_seconds, sr, seed=0):
+    rng = np.random.RandomState(seed)
+    lead = min(5.0, silence_seconds / 2)
+    quiet = lambda seconds: 0.0005 * rng.randn(int(seconds * sr))
+    speech = speech_like(speech_seconds, sr=sr, seed=seed)
+    return np.concatenate([quiet(lead), speech, quiet(silence_seconds - lead)]).astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--speech", type=float, default=10.0, help="seconds of speech per clip")
+    parser.add_argument("--silence", type=float, nargs="+", default=[0, 10, 30, 60],
+                        help="seconds of silence around the speech")
+    parser.add_argument("--sample-rate", type=int, default=22050)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sr = args.sample_rate
+    print(f"{'clip (s)':>9} {'silent frames':>14} {'full (ms)':>10} {'trimmed (ms)':>13} {'saved':>6} "
+          f"{'LID input (s)':>16}")
+    for silence in args.silence:
+        y = voicemail(args.speech, silence, sr)
+        silent = 1 - speech_frames(y).mean()
+        extract_features(y, sr, trim=True)
+        full = best_of(lambda: extract_features(y, sr), args.repeat)
+        trimmed = best_of(lambda: extract_features(y, sr, trim=True), args.repeat)
+
+        # Audio handed to Whisper: the whole clip untrimmed, its speech (up to LID_SECONDS) trimmed
+        lid_y = voicemail(args.speech, silence, LID_SAMPLE_RATE)
+        voiced = len(voiced_prefix(lid_y)) / LID_SAMPLE_RATE
+        print(f"{len(y) / sr:>9.0f} {silent:>14.0%} {full * 1000:>10.1f} {trimmed * 1000:>13.1f} "
+              f"{1 - trimmed / full:>6.0%} {len(lid_y) / LID_SAMPLE_RATE:>7.0f} -> {voiced:<5.1f}")
+
+if __name__ == "__main__":
+    main()
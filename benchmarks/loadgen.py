@@ -0,0 +1,262 @@
+"""
+Load generator: replays request payloads against a running server at a fixed
+concurrency or arrival rate and reports throughput, latency percentiles,
+errors and server memory over time.
+
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000 --concurrency 8 --duration 60
+    python -m benchmarks.loadgen --rate 20 --requests 1000 --jsonl captured.jsonl --server-pid 1234
+    python -m benchmarks.loadgen --mp3-dir samples/ --raw --language English
+
+Payload sources (one of):
+  --jsonl FILE   one JSON request body per line, or {"endpoint": ..., "body": ...};
+                 lines without audio are skipped
+  --mp3-dir DIR  every *.mp3, sent as base64 JSON (or as the raw body with --raw)
+  (default)      synthesized speech-like clips, so it runs with no sample data
+
+--concurrency keeps that many requests in flight (closed loop). --rate sends
+requests on a fixed schedule whatever the server does (open loop); latency
+is then measured from the scheduled send time, so queueing in the client is
+not hidden. --server-pid samples the RSS of that process and its children
+(the detection workers) while the test runs.
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import time
+import numpy as np
+import httpx
+
+API_KEY = "sk_test_123456789"
+JSON_ENDPOINT = "/api/voice-detection"
+UPLOAD_ENDPOINT = "/api/voice-detection/upload"
+
+def load_jsonl(path, endpoint=JSON_ENDPOINT):
+    """
+    [(endpoint, json body, raw body)] from a JSONL capture.
+    """
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            body = record.get("body", record)
+            if not isinstance(body, dict) or not (body.get("audioBase64") or body.get("items")):
+                continue
+            payloads.append((record.get("endpoint", endpoint), body, None))
+    return payloads
+
+def load_mp3_dir(directory, language=None, raw=False):
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.mp3"))):
+        with open(path, "rb") as f:
+            payloads.append(_mp3_payload(f.read(), language, raw))
+    return payloads
+
+def synth_payloads(durations=(2, 5, 10), language=None, raw=False):
+    from benchmarks.synth import speech_like, encode_mp3
+    return [_mp3_payload(encode_mp3(speech_like(seconds, seed=i)), language, raw)
+            for i, seconds in enumerate(durations)]
+
+def _mp3_payload(mp3, language, raw):
+    if raw:
+        query = f"?language={language}" if language else ""
+        return (UPLOAD_ENDPOINT + query, None, mp3)
+    body = {"audioFormat": "mp3", "audioBase64": base64.b64encode(mp3).decode()}
+    if language:
+        body["language"] = language
+    return (JSON_ENDPOINT, body, None)
+
+def process_rss_mb(pid):
+    """
+    Resident memory of a process plus all its descendants, in MB (Linux).
+    """
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total_kb / 1024
+
+async def _sample_rss(pid, interval, start, samples, stop):
+    while not stop.is_set():
+        samples.append((round(time.perf_counter() - start, 2), round(process_rss_mb(pid), 1)))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def _send(client, payload, api_key):
+    endpoint, body, raw = payload
+    headers = {"x-api-key": api_key}
+    if raw is not None:
+        headers["content-type"] = "application/octet-stream"
+        return await client.post(endpoint, headers=headers, content=raw)
+    return await client.post(endpoint, headers=headers, json=body)
+
+async def run_load(client, payloads, concurrency=None, rate=None, requests=None, duration=None,
+                   api_key=API_KEY, server_pid=None, rss_interval=1.0):
+    """
+    Drive `client` (an httpx.AsyncClient) and return a report dict.
+    Stops after `requests` sends or `duration` seconds, whichever comes first.
+    """
+    if not payloads:
+        raise ValueError("No payloads to send")
+    if requests is None and duration is None:
+        requests = len(payloads)
+    records = []  # (latency seconds, status code or error name)
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+    issued = 0
+
+    def next_payload():
+        # Shared counter: every send takes the next payload, cycling through the list
+        nonlocal issued
+        if (requests is not None and issued >= requests) or (deadline and time.perf_counter() >= deadline):
+            return None
+        payload = payloads[issued % len(payloads)]
+        issued += 1
+        return payload
+
+    async def one(payload, sent_at):
+        try:
+            response = await _send(client, payload, api_key)
+            outcome = response.status_code
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        records.append((time.perf_counter() - sent_at, outcome))
+
+    rss, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(server_pid, rss_interval, start, rss, stop)) if server_pid else None
+
+    if rate:
+        # Open loop: send on schedule even if earlier requests are still running
+        tasks = []
+        while True:
+            scheduled = start + issued / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            payload = next_payload()
+            if payload is None:
+                break
+            tasks.append(asyncio.create_task(one(payload, scheduled)))
+        await asyncio.gather(*tasks)
+    else:
+        async def worker():
+            while (payload := next_payload()) is not None:
+                await one(payload, time.perf_counter())
+        await asyncio.gather(*(worker() for _ in range(concurrency or 1)))
+
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if sampler is not None:
+        await sampler
+        rss.append((round(elapsed, 2), round(process_rss_mb(server_pid), 1)))
+    return summarize(records, elapsed, rss, concurrency=None if rate else (concurrency or 1), rate=rate)
+
+def summarize(records, elapsed, rss=(), concurrency=None, rate=None):
+    latencies = np.array([latency for latency, _ in records]) * 1000
+    ok = np.array([latency for latency, outcome in records if outcome == 200]) * 1000
+    outcomes = {}
+    for _, outcome in records:
+        outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+
+    def percentiles(values):
+        if not len(values):
+            return None
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {"p50": round(float(p50), 1), "p95": round(float(p95), 1), "p99": round(float(p99), 1),
+                "max": round(float(values.max()), 1)}
+
+    return {
+        "mode": "rate" if rate else "concurrency",
+        "concurrency": concurrency,
+        "rate": rate,
+        "requests": len(records),
+        "seconds": round(elapsed, 2),
+        "throughput": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "errorRate": round(1 - len(ok) / len(records), 4) if records else 0.0,
+        "statuses": outcomes,
+        "latencyMs": percentiles(latencies),
+        "okLatencyMs": percentiles(ok),
+        "rssMb": list(rss),
+        "peakRssMb": max((mb for _, mb in rss), default=None),
+    }
+
+def print_report(report):
+    target = f"rate {report['rate']}/s" if report["mode"] == "rate" else f"concurrency {report['concurrency']}"
+    print(f"Load: {report['requests']} requests in {report['seconds']}s at {target}")
+    print(f"Load: throughput {report['throughput']} ok/s, error rate {report['errorRate']:.2%}, "
+          f"statuses {report['statuses']}")
+    latency = report["latencyMs"]
+    if latency:
+        print(f"Load: latency p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+              f"p99 {latency['p99']} ms, max {latency['max']} ms")
+    if report["rssMb"]:
+        trace = " ".join(f"{t:g}s:{mb:.0f}" for t, mb in report["rssMb"])
+        print(f"Load: server RSS (MB) {trace}; peak {report['peakRssMb']:.0f}")
+
+async def _main(args, payloads):
+    limits = httpx.Limits(max_connections=args.concurrency or args.max_connections)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(client, payloads, concurrency=args.concurrency, rate=args.rate,
+                              requests=args.requests, duration=args.duration, api_key=args.api_key,
+                              server_pid=args.server_pid, rss_interval=args.rss_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", default=API_KEY)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--jsonl", help="captured request bodies, one JSON object per line")
+    source.add_argument("--mp3-dir", help="directory of .mp3 files")
+    parser.add_argument("--raw", action="store_true", help="send MP3s as raw bodies to the upload endpoint")
+    parser.add_argument("--language", help="language for MP3/synthesized payloads (omit to exercise LID)")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, help="requests kept in flight (default 4)")
+    load.add_argument("--rate", type=float, help="requests per second, sent on a fixed schedule")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--max-connections", type=int, default=256, help="connection cap in --rate mode")
+    parser.add_argument("--server-pid", type=int, help="sample RSS of this process and its children")
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+    if not args.rate and not args.concurrency:
+        args.concurrency = 4
+    if args.requests is None and args.duration is None:
+        args.duration = 30.0
+
+    if args.jsonl:
+        payloads = load_jsonl(args.jsonl)
+    elif args.mp3_dir:
+        payloads = load_mp3_dir(args.mp3_dir, args.language, args.raw)
+    else:
+        payloads = synth_payloads(language=args.language, raw=args.raw)
+    print(f"Load: {len(payloads)} distinct payload(s) against {args.url}")
+
+    report = asyncio.run(_main(args, payloads))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Load: report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
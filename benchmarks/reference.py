@@ -0,0 +1,33 @@
+import librosa
+import numpy as np
+
+def reference_features(y, sr, trim=False):
+    """
+    The original per-feature librosa implementation of load_audio_features,
+    kept for parity tests and benchmarks.
+    trim: keep only the frames librosa.effects.split(top_db=20) counts as
+    speech for flatness and pitch.
+    """
+    zcr = np.mean(librosa.feature.zero_crossing_rate(y=y))
+    flatness = librosa.feature.spectral_flatness(y=y)[0]
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+    if trim:
+        # The frame decision effects.split makes, on the same 2048/512 frames
+        power = librosa.feature.rms(y=y, frame_length=2048, hop_length=512)[0] ** 2
+        speech = librosa.power_to_db(power, ref=np.max, top_db=None) > -20
+        flatness = flatness[speech]
+        pitches, magnitudes = pitches[:, speech], magnitudes[:, speech]
+    flatness = np.mean(flatness)
+    pitch_values = pitches[magnitudes > np.median(magnitudes)]
+    pitch_std = np.std(pitch_values) if len(pitch_values) > 0 else 0
+    non_silent = librosa.effects.split(y, top_db=20)
+    non_silent_duration = sum([(e-s) for s,e in non_silent]) / sr
+    total_duration = librosa.get_duration(y=y, sr=sr)
+    silence_ratio = 1.0 - (non_silent_duration / total_duration) if total_duration > 0 else 0.0
+    return {
+        "zero_crossing_rate": zcr,
+        "spectral_flatness": flatness,
+        "pitch_std": pitch_std,
+        "silence_ratio": silence_ratio,
+        "duration": total_duration
+    }
@@ -0,0 +1,201 @@
+"""
+Detection pipeline benchmark suite: per-stage and end-to-end latency on
+synthesized clips, written as JSON and optionally compared with a baseline.
+
+    python -m benchmarks.suite [--output bench.json] [--compare baseline.json]
+
+Clips are generated offline from fixed seeds (see benchmarks.synth), so runs
+are repeatable and need no network. Stages: decode_base64_to_audio,
+load_audio_features, classify_voice, LanguageDetector.detect (skipped when
+the Whisper model cannot be loaded) and POST /api/voice-detection through
+TestClient on the real worker pool. With --compare, a benchmark whose median
+is more than --tolerance slower than the baseline (and by more than
+--min-delta-ms) is flagged and the exit status is 1.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmarks.synth import speech_like, encode_mp3
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+# Voice styles: a natural-sounding voice and a flat, pause-free "synthetic" one
+VOICES = {
+    "natural": {"seed": 0},
+    "flat": {"seed": 1, "pitch_jitter": 2.0, "pause_ratio": 0.0, "noise": 0.0005},
+}
+
+def make_clips(durations):
+    """
+    {name: base64 MP3} for every duration and voice style.
+    """
+    clips = {}
+    for seconds in durations:
+        for voice, params in VOICES.items():
+            mp3 = encode_mp3(speech_like(seconds, **params))
+            clips[f"{voice}-{seconds:g}s"] = base64.b64encode(mp3).decode()
+    return clips
+
+def time_call(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+    return {
+        "median_ms": round(float(np.median(times)), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "min_ms": round(float(times.min()), 3),
+        "runs": len(times),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def _stage_benchmarks(clips, repeat):
+    from core.audio_utils import decode_base64_to_audio, load_audio_features, feature_spec, feature_options
+    from core.detector import classify_voice, get_registry
+    results, skipped = {}, {}
+
+    # Features are timed the way the serving model computes them (rate, trimming, pitch)
+    try:
+        spec = get_registry().get().features
+        has_model = True
+    except FileNotFoundError:
+        spec, has_model = feature_spec(), False
+        skipped["classify_voice"] = "model.pkl not found (run train_model.py)"
+    sr, options = spec["sample_rate"], feature_options(spec)
+
+    for name, b64 in clips.items():
+        print(f"Bench: {name}")
+        results[f"decode_base64_to_audio/{name}"] = time_call(lambda: decode_base64_to_audio(b64, sr), repeat)
+        results[f"load_audio_features/{name}"] = time_call(lambda: load_audio_features(b64, sr, **options), repeat)
+        if has_model:
+            results[f"classify_voice/{name}"] = time_call(lambda: classify_voice(b64, "English"), repeat)
+    return results, skipped
+
+def _lid_benchmarks(clips, repeat):
+    from core.audio_utils import DecodedAudio
+    from core.lid import get_detector, LID_SAMPLE_RATE
+    try:
+        detector = get_detector()
+    except Exception as e:
+        return {}, {"LanguageDetector.detect": f"Whisper model unavailable: {str(e).splitlines()[0]}"}
+    results = {}
+    for name, b64 in clips.items():
+        pcm = DecodedAudio.from_base64(b64).samples(LID_SAMPLE_RATE)
+        results[f"LanguageDetector.detect/{name}"] = time_call(lambda: detector.detect(pcm), repeat)
+    return results, {}
+
+def _endpoint_benchmarks(clips, repeat):
+    from fastapi.testclient import TestClient
+    import main
+    from core.cache import ResultCache
+    # Every request must run the pipeline, never the cache
+    main.get_cache = lambda: ResultCache(max_entries=0)
+    # No startup event (it would load Whisper); spawn the workers up front instead
+    client = TestClient(main.app)
+    main.get_pool().start()
+    results = {}
+    try:
+        for name, b64 in clips.items():
+            payload = {"language": "English", "audioFormat": "mp3", "audioBase64": b64}
+            def send():
+                response = client.post("/api/voice-detection", headers=HEADERS, json=payload)
+                assert response.status_code == 200, response.text
+            results[f"endpoint/{name}"] = time_call(send, repeat)
+    finally:
+        main.get_pool().shutdown()
+    return results
+
+def run_suite(durations, repeat, lid=True, endpoint=True):
+    clips = make_clips(durations)
+    results, skipped = _stage_benchmarks(clips, repeat)
+    if lid:
+        lid_results, lid_skipped = _lid_benchmarks(clips, repeat)
+        results.update(lid_results)
+        skipped.update(lid_skipped)
+    if endpoint:
+        results.update(_endpoint_benchmarks(clips, repeat))
+    return {"environment": environment(), "repeat": repeat, "results": results, "skipped": skipped}
+
+def compare(current, baseline, tolerance=0.15, min_delta_ms=0.5):
+    """
+    Compare medians benchmark by benchmark. Returns rows of
+    (name, baseline ms, current ms, ratio, regressed); benchmarks missing
+    from either side are left out.
+    """
+    rows = []
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        old, new = base["median_ms"], result["median_ms"]
+        ratio = new / old if old > 0 else float("inf")
+        regressed = ratio > 1.0 + tolerance and new - old > min_delta_ms
+        rows.append((name, old, new, ratio, regressed))
+    return rows
+
+def print_results(report):
+    print(f"{'benchmark':<44} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}")
+    for name, result in sorted(report["results"].items()):
+        print(f"{name:<44} {result['median_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['min_ms']:>10.2f}")
+    for name, reason in report["skipped"].items():
+        print(f"{name:<44} skipped: {reason}")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[1, 5, 30])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    parser.add_argument("--no-lid", action="store_true", help="skip LanguageDetector.detect")
+    parser.add_argument("--no-endpoint", action="store_true", help="skip the TestClient endpoint runs")
+    args = parser.parse_args()
+
+    report = run_suite(args.durations, args.repeat, lid=not args.no_lid, endpoint=not args.no_endpoint)
+    print_results(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Bench: results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        print(f"\n{'benchmark':<44} {'baseline':>10} {'current':>10} {'ratio':>7}")
+        for name, old, new, ratio, regressed in rows:
+            print(f"{name:<44} {old:>10.2f} {new:>10.2f} {ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+        regressions = [row for row in rows if row[4]]
+        if regressions:
+            print(f"Bench: {len(regressions)} regression(s) over {args.tolerance:.0%} against {args.compare}")
+            sys.exit(1)
+        print(f"Bench: no regressions against {args.compare}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,52 @@
+import io
+import av
+import numpy as np
+
+def speech_like(seconds, sr=22050, seed=0, f0=140.0, pitch_jitter=25.0, pause_ratio=0.2, noise=0.003,
+                return_f0=False):
+    """
+    Deterministic speech-like signal: a harmonic voice with a wandering f0,
+    syllable-rate amplitude envelope, pauses and a little background noise.
+    Lower pitch_jitter/pause_ratio/noise gives a flatter, "synthetic" voice.
+    return_f0: also return the true f0 per sample and where the voice is audible.
+    """
+    rng = np.random.RandomState(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+
+    # f0 contour: slow random walk plus vibrato
+    steps = rng.randn(int(seconds * 20) + 2)
+    walk = np.interp(t, np.linspace(0, seconds, len(steps)), np.cumsum(steps))
+    walk = walk / (np.abs(walk).max() + 1e-9)
+    f0_contour = f0 + pitch_jitter * walk + 3.0 * np.sin(2 * np.pi * 5.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0_contour) / sr
+
+    voice = np.zeros(n)
+    for k, amp in enumerate([1.0, 0.6, 0.4, 0.25, 0.15, 0.1], start=1):
+        voice += amp * np.sin(k * phase)
+
+    # Syllables (~4 Hz) separated by pauses
+    envelope = 0.5 * (1 - np.cos(2 * np.pi * 4.0 * t)) ** 2
+    n_blocks = max(1, int(seconds * 2))
+    gate = (rng.rand(n_blocks) >= pause_ratio).astype(float)
+    envelope *= gate[np.minimum((t * 2).astype(int), n_blocks - 1)]
+
+    y = 0.2 * voice * envelope + noise * rng.randn(n)
+    if return_f0:
+        return y.astype(np.float32), f0_contour, envelope > 0.1
+    return y.astype(np.float32)
+
+def encode_mp3(y, sr=22050):
+    """
+    Encode mono float PCM to MP3 bytes in memory (PyAV's bundled LAME).
+    """
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="mp3") as container:
+        stream = container.add_stream("libmp3lame", rate=sr, layout="mono")
+        frame = av.AudioFrame.from_ndarray(np.asarray(y, dtype=np.float32)[None, :], format="flt", layout="mono")
+        frame.sample_rate = sr
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
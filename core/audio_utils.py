@@ -1,68 +1,598 @@
+import av
 import base64
+import hashlib
+import io
 import librosa
 import numpy as np
+import scipy.fft
 from pydub import AudioSegment
 import soundfile as sf
-import tempfile
 import os
+import threading
+from core.pitch import yin
+from core.timing import stage
+from core.validation import PayloadError
 
-def decode_base64_to_audio(audio_base64):
+# Analysis rate for training new models (served models use the rate they were
+# trained at). 16000 lets LID and features share one resampled buffer.
+FEATURE_SAMPLE_RATE = int(os.getenv("ANALYSIS_SAMPLE_RATE", "22050"))
+# Bump whenever extract_features changes what it computes
+FEATURE_VERSION = 1
+# Newly trained models compute spectral and pitch features on speech frames
+# only; the choice is saved in the model's feature spec and served as trained
+TRIM_SILENCE = os.getenv("TRIM_SILENCE", "1") != "0"
+# pitch_std source for newly trained models (see PITCH_BACKENDS); saved in the feature spec
+PITCH_BACKEND = os.getenv("PITCH_BACKEND", "piptrack")
+# Frames per block of the spectral pass (STFT, flatness, pitch peaks): its
+# scratch memory is about 6 MB at 256 frames, whatever the clip length
+FEATURE_BLOCK_FRAMES = int(os.getenv("FEATURE_BLOCK_FRAMES", "256"))
+# How MP3 bytes become PCM at a given rate (see DECODERS below). The default
+# keeps soxr resampling, which the model was trained with; one-pass "pyav"
+# uses libswresample, whose filter shifts spectral flatness noticeably.
+DECODER_BACKEND = os.getenv("DECODER_BACKEND", "pyav_soxr")
+
+class DecodedAudio:
     """
-    Decode base64 string to audio data.
-    Returns: (y, sr) - audio samples and sample rate
+    Request-scoped audio. The MP3 bytes are decoded once, in memory, and the
+    PCM is cached per sample rate so LID (16 kHz) and feature extraction
+    (22.05 kHz) share a single decode.
     """
-    try:
-        # Check if it's already a path (legacy support)
-        if hasattr(audio_base64, "read"):
-             # It's a file-like object
-             pass
-        
-        audio_bytes = base64.b64decode(audio_base64)
-        
-        # Use a temporary file for robust librosa loading (ffmpeg wrapper)
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-            tmp.write(audio_bytes)
-            tmp_path = tmp.name
-        
-        # Load with librosa
+    def __init__(self, audio_bytes, backend=None, max_seconds=None):
+        self.audio_bytes = audio_bytes
+        self.backend = backend or DECODER_BACKEND
+        # Duration limit enforced while decoding (header estimates can be off)
+        self.max_seconds = max_seconds
+        if self.backend not in DECODERS:
+            raise ValueError(f"Unknown decoder backend: {self.backend}")
+        self._digest = None
+        self._native = None
+        self._resampled = {}
+        self._speech = {}
+
+    @classmethod
+    def from_base64(cls, audio_base64, max_seconds=None):
+        # Fix incorrect Base64 padding if present
+        missing_padding = len(audio_base64) % 4
+        if missing_padding:
+            audio_base64 += '=' * (4 - missing_padding)
+        try:
+            with stage("base64"):
+                return cls(base64.b64decode(audio_base64), max_seconds=max_seconds)
+        except Exception as e:
+            raise ValueError(f"Failed to decode audio: {str(e)}")
+
+    def copy(self, rates=()):
+        """
+        Same audio, without the decoded-PCM caches (safe to decode from another
+        thread), except the PCM already decoded at `rates`.
+        """
+        audio = DecodedAudio(self.audio_bytes, backend=self.backend, max_seconds=self.max_seconds)
+        audio._digest = self._digest
+        for sr in rates:
+            if sr in self._resampled:
+                audio._resampled[sr] = self._resampled[sr]
+            if sr in self._speech:
+                audio._speech[sr] = self._speech[sr]
+        return audio
+
+    @property
+    def digest(self):
+        """
+        Content hash of the encoded audio, used as a cache key.
+        """
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.audio_bytes).hexdigest()
+        return self._digest
+
+    def _check_duration(self, n, sr):
+        if self.max_seconds is not None and n > self.max_seconds * sr:
+            raise PayloadError(f"Audio is longer than the limit of {self.max_seconds:.0f}s", "too_long", 413)
+
+    def _iter_pcm(self, sr=None):
+        """
+        Decode incrementally, yielding mono float32 blocks at `sr` (native rate if None).
+        Stops with PayloadError as soon as the audio runs past max_seconds.
+        """
         try:
-            y, sr = librosa.load(tmp_path, sr=22050)
-        finally:
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-                
-        return y, sr
+            with av.open(io.BytesIO(self.audio_bytes)) as container:
+                stream = container.streams.audio[0]
+                rate = sr or stream.rate
+                # Planar float; we downmix ourselves like librosa does
+                resampler = av.AudioResampler(format="fltp", layout=stream.layout.name, rate=rate)
+                decoded = 0
+                for frame in container.decode(stream):
+                    for out in resampler.resample(frame):
+                        decoded += out.samples
+                        self._check_duration(decoded, rate)
+                        yield out.to_ndarray().mean(axis=0, dtype=np.float32)
+                for out in resampler.resample(None):
+                    yield out.to_ndarray().mean(axis=0, dtype=np.float32)
+        except PayloadError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to decode audio: {str(e)}")
+
+    def _native_rate(self):
+        try:
+            with av.open(io.BytesIO(self.audio_bytes)) as container:
+                return container.streams.audio[0].rate
+        except Exception as e:
+            raise ValueError(f"Failed to decode audio: {str(e)}")
+
+    def _decode(self):
+        sr = self._native_rate()
+        chunks = list(self._iter_pcm())
+        if not chunks:
+            raise ValueError("Failed to decode audio: no audio frames found")
+        return np.concatenate(chunks), sr
+
+    def iter_windows(self, sr, seconds):
+        """
+        Decode in a streaming fashion and yield consecutive windows of `seconds`
+        of mono PCM at `sr`. At most about a window and a half is held in memory
+        and nothing is cached. A tail shorter than half a window is merged into
+        the last window.
+        """
+        size = max(1, int(seconds * sr))
+        # A window is yielded once half a window follows it: whatever comes
+        # after can then no longer be a short tail that belongs to it
+        hold = size + size // 2
+        blocks = []
+        buffered = 0
+        yielded = False
+        for block in self._iter_pcm(sr):
+            blocks.append(block)
+            buffered += len(block)
+            if buffered >= hold:
+                y = np.concatenate(blocks)
+                start = 0
+                while len(y) - start >= hold:
+                    yield y[start:start + size]
+                    start += size
+                blocks = [y[start:]]
+                buffered = len(y) - start
+                yielded = True
+
+        # What is left is the last window, a short tail included, or a tail of half a window or more
+        if buffered:
+            yield np.concatenate(blocks)
+        elif not yielded:
+            raise ValueError("Failed to decode audio: no audio frames found")
+
+    def head(self, sr, seconds):
+        """
+        The first `seconds` of mono PCM at `sr` (all of it if shorter). Decoding
+        stops there and nothing is cached.
+        """
+        size = max(1, int(seconds * sr))
+        blocks = []
+        buffered = 0
+        for block in self._iter_pcm(sr):
+            blocks.append(block)
+            buffered += len(block)
+            if buffered >= size:
+                break
+        if not buffered:
+            raise ValueError("Failed to decode audio: no audio frames found")
+        return np.concatenate(blocks)[:size]
+
+    def native(self):
+        """
+        (PCM, sample rate) at the file's own rate, decoded once and cached.
+        """
+        if self._native is None:
+            self._native = self._decode()
+        return self._native
+
+    def samples(self, sr=FEATURE_SAMPLE_RATE):
+        """
+        Mono float32 PCM at the requested sample rate.
+        """
+        if sr not in self._resampled:
+            with stage("decode"):
+                self._resampled[sr] = DECODERS[self.backend](self, sr)
+        return self._resampled[sr]
+
+    def speech_frames(self, sr=FEATURE_SAMPLE_RATE):
+        """
+        Per-frame speech mask of the PCM at `sr` (see speech_frames()), computed once.
+        """
+        if sr not in self._speech:
+            y = self.samples(sr)
+            with stage("vad"):
+                self._speech[sr] = speech_frames(y)
+        return self._speech[sr]
+
+    def speech_intervals(self, sr=FEATURE_SAMPLE_RATE):
+        """
+        [start, end) sample intervals of speech in the PCM at `sr`, shape (n, 2).
+        """
+        return _mask_intervals(self.speech_frames(sr), len(self.samples(sr)))
+
+def _decode_pyav(audio, sr):
+    # libswresample converts while decoding: one pass straight to the target rate
+    chunks = list(audio._iter_pcm(sr))
+    if not chunks:
+        raise ValueError("Failed to decode audio: no audio frames found")
+    return np.concatenate(chunks)
+
+def _decode_pyav_soxr(audio, sr):
+    # One native-rate decode shared by every rate, then a soxr resample per rate
+    y, native_sr = audio.native()
+    if native_sr != sr:
+        y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+    return y
+
+def _decode_librosa(audio, sr):
+    # Fallback without PyAV: libsndfile (or audioread) decode + soxr resample
+    try:
+        y, _ = librosa.load(io.BytesIO(audio.audio_bytes), sr=sr, mono=True)
     except Exception as e:
         raise ValueError(f"Failed to decode audio: {str(e)}")
+    if not len(y):
+        raise ValueError("Failed to decode audio: no audio frames found")
+    audio._check_duration(len(y), sr)
+    return y.astype(np.float32, copy=False)
+
+DECODERS = {
+    "pyav": _decode_pyav,
+    "pyav_soxr": _decode_pyav_soxr,
+    "librosa": _decode_librosa,
+}
 
-def load_audio_features(audio_base64):
+def as_decoded_audio(audio):
     """
-    Extract audio features needed for classification.
+    Accept a DecodedAudio or a base64 string (legacy callers).
+    """
+    if isinstance(audio, DecodedAudio):
+        return audio
+    return DecodedAudio.from_base64(audio)
+
+def decode_base64_to_audio(audio_base64, sr=FEATURE_SAMPLE_RATE):
     """
-    y, sr = decode_base64_to_audio(audio_base64)
-    
+    Decode base64 string to audio data.
+    Returns: (y, sr) - audio samples and sample rate
+    """
+    audio = as_decoded_audio(audio_base64)
+    return audio.samples(sr), sr
+
+# Framing shared by every feature (librosa defaults)
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+# effects.split threshold used for the silence ratio
+TOP_DB = 20
+# piptrack defaults
+PITCH_FMIN = 150.0
+PITCH_FMAX = 4000.0
+PITCH_THRESHOLD = 0.1
+
+_window = np.hanning(FRAME_LENGTH + 1)[:-1].astype(np.float32)
+
+class Scratch:
+    """
+    Work arrays reused from one clip to the next. Each is grown to the
+    largest size asked for and kept, so a worker's feature memory settles
+    at what its longest clip needed instead of being reallocated per request.
+    """
+    def __init__(self):
+        self._arrays = {}
+
+    def get(self, name, shape, dtype=np.float32):
+        """
+        Uninitialised array of `shape` backed by the buffer called `name`.
+        """
+        size = int(np.prod(shape))
+        array = self._arrays.get(name)
+        if array is None or array.size < size or array.dtype != dtype:
+            array = self._arrays[name] = np.empty(size, dtype=dtype)
+        return array[:size].reshape(shape)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+# One Scratch per thread, for the feature pass: that runs in worker processes
+# (a clip at a time) and training; speech_frames, which API threads call, has none
+_scratch = threading.local()
+
+def get_scratch():
+    scratch = getattr(_scratch, "value", None)
+    if scratch is None:
+        scratch = _scratch.value = Scratch()
+    return scratch
+
+def _zcr_frames(y, n_frames, scratch=None):
+    """
+    Per-frame zero crossing count (librosa.feature.zero_crossing_rate times
+    FRAME_LENGTH). Crossings are found once and summed per hop; a frame is
+    four hops, minus its first sample, which never counts (pad=False).
+    """
+    scratch = scratch or get_scratch()
+    if len(y) < 2:
+        return np.zeros(n_frames, dtype=np.int32)
+    # signbit after zeroing |y| <= 1e-10 is just y < -1e-10
+    signs = np.less(y, -1e-10, out=scratch.get("signs", (len(y),), bool))
+    # Crossings padded with False to whole hops, so they can be summed per hop
+    n_hops = -(-(len(y) - 1) // HOP_LENGTH)
+    padded = scratch.get("crossings", (n_hops, HOP_LENGTH), bool)
+    crossings = np.not_equal(signs[1:], signs[:-1], out=padded.reshape(-1)[:len(y) - 1])
+    padded.reshape(-1)[len(y) - 1:] = False
+
+    # The edge padding (half a frame, `lead` hops) adds no crossings, so frame t
+    # spans crossings[(t - lead) * HOP, (t - lead) * HOP + FRAME_LENGTH - 1)
+    lead = FRAME_LENGTH // 2 // HOP_LENGTH
+    hops_per_frame = FRAME_LENGTH // HOP_LENGTH
+    hops = padded[:n_frames + hops_per_frame - lead].sum(axis=1, dtype=np.int32)
+    per_hop = np.zeros(n_frames + hops_per_frame, dtype=np.int32)
+    per_hop[lead:lead + len(hops)] = hops
+    running = np.zeros(len(per_hop) + 1, dtype=np.int32)
+    np.cumsum(per_hop, out=running[1:])
+    counts = running[hops_per_frame:hops_per_frame + n_frames] - running[:n_frames]
+    last = np.arange(n_frames) * HOP_LENGTH + (FRAME_LENGTH - FRAME_LENGTH // 2 - 1)
+    inside = last < len(crossings)
+    counts[inside] -= crossings[last[inside]]
+    return counts
+
+def _median_with_zeros(values, n_total):
+    """
+    np.median of an array holding `values` and (n_total - len(values)) zeros,
+    without materialising the zeros.
+    """
+    values = np.sort(values)
+    n_zero = n_total - len(values)
+    n_neg = np.searchsorted(values, 0)
+
+    def kth(k):
+        if k < n_neg:
+            return values[k]
+        if k < n_neg + n_zero:
+            return 0.0
+        return values[k - n_zero]
+
+    mid = n_total // 2
+    if n_total % 2:
+        return kth(mid)
+    return (kth(mid - 1) + kth(mid)) / 2
+
+def _pitch_peaks(mag, sr):
+    """
+    librosa.piptrack peaks from a magnitude spectrogram (frames x bins),
+    looking only at the bins inside [fmin, fmax).
+    Returns (pitches, magnitudes, frame index) of every peak, frame by frame.
+    """
+    n_bins = mag.shape[1]
+    freqs = np.arange(n_bins) * sr / FRAME_LENGTH
+    fmax = min(PITCH_FMAX, sr / 2)
+    in_range = np.flatnonzero((freqs >= PITCH_FMIN) & (freqs < fmax))
+    if len(in_range) == 0:
+        return np.zeros(0, dtype=mag.dtype), np.zeros(0, dtype=mag.dtype), np.zeros(0, dtype=np.intp)
+    lo, hi = in_range[0], in_range[-1] + 1
+
+    ref = PITCH_THRESHOLD * mag.max(axis=1, keepdims=True)
+    sub = mag[:, lo - 1:hi + 1]
+    left, center, right = sub[:, :-2], sub[:, 1:-1], sub[:, 2:]
+
+    # Local maxima of the thresholded spectrum along frequency
+    thresholded = sub * (sub > ref)
+    peaks = (thresholded[:, 1:-1] > thresholded[:, :-2]) & (thresholded[:, 1:-1] >= thresholded[:, 2:])
+    frame_idx, bin_idx = np.nonzero(peaks)
+    l, c, r = left[frame_idx, bin_idx], center[frame_idx, bin_idx], right[frame_idx, bin_idx]
+
+    # Parabolic interpolation of the peak position and height
+    a = r + l - 2 * c
+    b = (r - l) / 2
+    shift = np.zeros_like(c)
+    ok = np.abs(b) < np.abs(a)
+    shift[ok] = -b[ok] / a[ok]
+    # bin_idx is int64: add the shift in float32 so the pitches stay float32
+    pitches = (bin_idx + lo).astype(mag.dtype)
+    pitches += shift
+    pitches *= mag.dtype.type(sr / FRAME_LENGTH)
+    magnitudes = c + 0.5 * b * shift
+    return pitches, magnitudes, frame_idx
+
+def _peak_spread(pitches, magnitudes, n_cells):
+    """
+    pitch_std from piptrack peaks, where n_cells is the size of the
+    pitch/magnitude matrix they came from (every other cell holds 0).
+    """
+    if len(pitches) == 0:
+        return 0.0
+
+    # Filter out noise (magnitude below the median of the full pitch/magnitude matrix)
+    threshold = _median_with_zeros(magnitudes, n_cells)
+    pitch_values = pitches[magnitudes > threshold]
+    if threshold < 0:
+        pitch_values = np.concatenate([pitch_values, np.zeros(n_cells - len(magnitudes), dtype=pitches.dtype)])
+    return float(np.std(pitch_values, dtype=np.float64)) if len(pitch_values) > 0 else 0.0
+
+def _pitch_std(mag, sr):
+    """
+    pitch_std as computed from librosa.piptrack, using the shared magnitude spectrogram.
+    """
+    pitches, magnitudes, _ = _pitch_peaks(mag, sr)
+    return _peak_spread(pitches, magnitudes, mag.size)
+
+def _pitch_piptrack(y, sr, peaks):
+    # Spread of every spectral peak in [PITCH_FMIN, PITCH_FMAX), as trained originally
+    return _peak_spread(*peaks)
+
+def _pitch_yin(y, sr, peaks):
+    # Spread of f0 over voiced frames; YIN's voicing already leaves silence out
+    f0, voiced = yin(y, sr)
+    return float(np.std(f0[voiced], dtype=np.float64)) if voiced.any() else 0.0
+
+PITCH_BACKENDS = {
+    "piptrack": _pitch_piptrack,
+    "yin": _pitch_yin,
+}
+
+def _flatness_frames(mag, out=None):
+    """
+    Per-frame spectral flatness of the power spectrum (amin=1e-10).
+    out: array shaped like mag for the power spectrum (overwritten).
+    """
+    power_spec = np.square(mag, out=out)
+    np.maximum(power_spec, 1e-10, out=power_spec)
+    mean = np.mean(power_spec, axis=1)
+    gmean = np.exp(np.mean(np.log(power_spec, out=power_spec), axis=1))
+    return gmean / mean
+
+def _frame(y, scratch=None):
+    # Centered, zero-padded frames as used by stft and rms: a view of the
+    # padded signal, which is written into `scratch` when one is given
+    pad = FRAME_LENGTH // 2
+    if scratch is None:
+        padded = np.pad(y, pad)
+    else:
+        padded = scratch.get("padded", (len(y) + 2 * pad,), y.dtype)
+        padded[:pad] = 0
+        padded[pad:pad + len(y)] = y
+        padded[pad + len(y):] = 0
+    return np.lib.stride_tricks.sliding_window_view(padded, FRAME_LENGTH)[::HOP_LENGTH]
+
+def _frame_blocks(n_frames):
+    # [start, stop) of each block of the spectral pass
+    starts = range(0, n_frames, FEATURE_BLOCK_FRAMES)
+    return [(start, min(start + FEATURE_BLOCK_FRAMES, n_frames)) for start in starts]
+
+def _frame_power(frames, scratch):
+    """
+    Mean square of every frame, squaring one block at a time into scratch.
+    """
+    power = np.empty(len(frames), dtype=frames.dtype)
+    for start, stop in _frame_blocks(len(frames)):
+        block = np.square(frames[start:stop], out=scratch.get("block", (stop - start, FRAME_LENGTH), frames.dtype))
+        np.mean(block, axis=1, out=power[start:stop])
+    return power
+
+def _magnitudes(frames, rows, scratch):
+    """
+    Windowed magnitude spectrum of frames[rows] (a slice, or frame indices
+    when trimming), computed in scratch buffers.
+    """
+    # frames[rows] with indices copies just this block (np.take would copy the whole strided view)
+    selected = frames[rows]
+    block = np.multiply(selected, _window, out=scratch.get("block", selected.shape))
+    # scipy's FFT works in float32 (numpy's goes through float64 internally)
+    spectrum = scipy.fft.rfft(block, axis=1, overwrite_x=True)
+    return np.abs(spectrum, out=scratch.get("mag", spectrum.shape))
+
+def _speech_mask(power):
+    # Frames within TOP_DB of the loudest one, as librosa.effects.split decides
+    db = 10.0 * np.log10(np.maximum(1e-10, power))
+    db -= 10.0 * np.log10(max(1e-10, power.max()))
+    return db > -TOP_DB
+
+def _mask_intervals(non_silent, n_samples):
+    """
+    [start, end) sample intervals of the runs of True frames in a speech mask.
+    """
+    edges = np.flatnonzero(np.diff(non_silent.astype(np.int8))) + 1
+    if non_silent[0]:
+        edges = np.concatenate([[0], edges])
+    if non_silent[-1]:
+        edges = np.concatenate([edges, [len(non_silent)]])
+    edges = np.minimum(edges * HOP_LENGTH, n_samples)
+    return edges.reshape(-1, 2)
+
+def _non_silent_intervals(power, n_samples):
+    """
+    [start, end) sample intervals librosa.effects.split(top_db=TOP_DB) would
+    return, from per-frame signal power.
+    """
+    return _mask_intervals(_speech_mask(power), n_samples)
+
+def speech_frames(y):
+    """
+    Boolean mask over the analysis frames of y (FRAME_LENGTH/HOP_LENGTH,
+    centered): True where the frame is speech rather than silence.
+    """
+    # Also runs on API threads (LID, the shared decode): framed a block at a
+    # time from y, so no thread keeps a padded copy of its longest clip
+    y = np.asarray(y, dtype=np.float32)
+    pad = FRAME_LENGTH // 2
+    n_frames = 1 + len(y) // HOP_LENGTH
+    power = np.empty(n_frames, dtype=np.float32)
+    for start, stop in _frame_blocks(n_frames):
+        first = start * HOP_LENGTH - pad
+        segment = np.zeros((stop - 1 - start) * HOP_LENGTH + FRAME_LENGTH, dtype=np.float32)
+        lo, hi = max(first, 0), min(first + len(segment), len(y))
+        segment[lo - first:hi - first] = y[lo:hi]
+        frames = np.lib.stride_tricks.sliding_window_view(segment, FRAME_LENGTH)[::HOP_LENGTH]
+        np.mean(np.square(frames), axis=1, out=power[start:stop])
+    return _speech_mask(power)
+
+def non_silent_intervals(y):
+    """
+    Speech (non-silent) intervals of y in samples, shape (n, 2).
+    """
+    return _mask_intervals(speech_frames(y), len(y))
+
+def extract_features(y, sr, trim=False, speech=None, pitch="piptrack"):
+    """
+    Compute the five classifier features from mono PCM.
+    The signal is framed once and one magnitude spectrogram is shared by
+    spectral flatness and the pitch tracker; RMS for the silence ratio comes
+    from the same frames. Everything stays float32, and the spectrogram is
+    computed FEATURE_BLOCK_FRAMES frames at a time in this thread's Scratch.
+    trim: compute flatness and pitch on speech frames only. The silence ratio
+    and duration always describe the whole clip.
+    speech: the speech_frames(y) mask, if the caller already has it.
+    pitch: a PITCH_BACKENDS name.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    scratch = get_scratch()
+    frames = _frame(y, scratch)
+    n_frames = len(frames)
+
     # Feature 1: Zero Crossing Rate
-    zcr = np.mean(librosa.feature.zero_crossing_rate(y=y))
-    
-    # Feature 2: Spectral Flatness
-    flatness = np.mean(librosa.feature.spectral_flatness(y=y))
-    
+    with stage("zcr"):
+        zcr = int(np.sum(_zcr_frames(y, n_frames, scratch), dtype=np.int64)) / (n_frames * FRAME_LENGTH)
+
+    # Feature 4: Silence Ratio (first: its speech mask decides which frames the STFT sees)
+    with stage("silence"):
+        if speech is None:
+            speech = _speech_mask(_frame_power(frames, scratch))
+        total_duration = len(y) / sr
+        intervals = _mask_intervals(speech, len(y))
+        non_silent_duration = int(np.sum(intervals[:, 1] - intervals[:, 0])) / sr
+        silence_ratio = 1.0 - (non_silent_duration / total_duration) if total_duration > 0 else 0.0
+
+    # Leading/trailing silence and pauses carry no voice: skip their STFT
+    selected = np.flatnonzero(speech) if trim and not speech.all() else None
+    n_selected = n_frames if selected is None else len(selected)
+
+    # One STFT for everything spectral, a block at a time: only the flatness
+    # sum and the piptrack peaks outlive a block
+    flatness_sum = 0.0
+    peak_blocks = [] if pitch == "piptrack" else None
+    for start, stop in _frame_blocks(n_selected):
+        rows = slice(start, stop) if selected is None else selected[start:stop]
+        with stage("stft"):
+            mag = _magnitudes(frames, rows, scratch)
+
+        # Feature 2: Spectral Flatness
+        with stage("flatness"):
+            flatness_frames = _flatness_frames(mag, out=scratch.get("power", mag.shape))
+            flatness_sum += float(np.sum(flatness_frames, dtype=np.float64))
+
+        if peak_blocks is not None:
+            with stage("pitch"):
+                peak_blocks.append(_pitch_peaks(mag, sr)[:2])
+    flatness = flatness_sum / n_selected
+
     # Feature 3: Pitch Standard Deviation
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    # Filter out noise (low magnitude)
-    pitch_values = pitches[magnitudes > np.median(magnitudes)]
-    pitch_std = np.std(pitch_values) if len(pitch_values) > 0 else 0
-    
-    # Feature 4: Silence Ratio
-    non_silent = librosa.effects.split(y, top_db=20)
-    non_silent_duration = sum([(e-s) for s,e in non_silent]) / sr
-    total_duration = librosa.get_duration(y=y, sr=sr)
-    silence_ratio = 1.0 - (non_silent_duration / total_duration) if total_duration > 0 else 0.0
-    
+    with stage("pitch"):
+        peaks = None
+        if peak_blocks is not None:
+            pitches, magnitudes = (np.concatenate(part) for part in zip(*peak_blocks))
+            peaks = (pitches, magnitudes, n_selected * (FRAME_LENGTH // 2 + 1))
+        pitch_std = PITCH_BACKENDS[pitch](y, sr, peaks)
+
     # Feature 5: Duration
     duration = total_duration
-    
+
     return {
         "zero_crossing_rate": zcr,
         "spectral_flatness": flatness,
@@ -70,3 +600,32 @@ def load_audio_features(audio_base64):
         "silence_ratio": silence_ratio,
         "duration": duration
     }
+
+def feature_spec(sr=FEATURE_SAMPLE_RATE, trim=TRIM_SILENCE, pitch=PITCH_BACKEND):
+    """
+    Identifies how features were computed. Saved with every model so the
+    server extracts features for it exactly the way it was trained.
+    """
+    if pitch not in PITCH_BACKENDS:
+        raise ValueError(f"Unknown pitch backend: {pitch}")
+    spec = {"version": FEATURE_VERSION, "sample_rate": int(sr)}
+    # Options are absent from the specs of models trained without them
+    if trim:
+        spec["trim_silence"] = True
+    if pitch != "piptrack":
+        spec["pitch"] = pitch
+    return spec
+
+def feature_options(spec):
+    """
+    extract_features keyword arguments for a feature spec.
+    """
+    return {"trim": spec.get("trim_silence", False), "pitch": spec.get("pitch", "piptrack")}
+
+def load_audio_features(audio, sr=FEATURE_SAMPLE_RATE, trim=False, pitch="piptrack"):
+    """
+    Extract audio features needed for classification.
+    Accepts a DecodedAudio or a base64-encoded MP3.
+    """
+    audio = as_decoded_audio(audio)
+    return extract_features(audio.samples(sr), sr, trim, audio.speech_frames(sr), pitch)
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# In-process LRU bounds
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+# Optional on-disk tier that survives restarts (unset = memory only)
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH")
+CACHE_DB_MAX_ENTRIES = int(os.getenv("CACHE_DB_MAX_ENTRIES", "100000"))
+
+class ResultCache:
+    """
+    Content-addressed result cache: an LRU dict with size and TTL bounds,
+    optionally backed by a SQLite table. Values must be JSON-serializable.
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, db_path=CACHE_DB_PATH,
+                 db_max_entries=CACHE_DB_MAX_ENTRIES, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_max_entries = db_max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._db_writes = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._evictions += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self._disk_hits += 1
+                    return value
+
+            self._misses += 1
+            return None
+
+    def set(self, key, value):
+        expires = self._clock() + self.ttl
+        with self._lock:
+            self._store(key, value, expires)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires)
+                )
+                self._db_writes += 1
+                if self._db_writes % 1000 == 0:
+                    self._prune_db()
+
+    def _store(self, key, value, expires):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _prune_db(self):
+        self._db.execute("DELETE FROM results WHERE expires <= ?", (self._clock(),))
+        self._db.execute(
+            "DELETE FROM results WHERE key NOT IN (SELECT key FROM results ORDER BY expires DESC LIMIT ?)",
+            (self.db_max_entries,)
+        )
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "diskHits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hitRate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk": self._db is not None,
+            }
+
+_cache = None
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
@@ -1,17 +1,290 @@
-from models import ClassificationEnum
-from core.audio_utils import load_audio_features
+from models import ClassificationEnum, SEGMENT_SECONDS
+from core.audio_utils import (
+    load_audio_features, extract_features, as_decoded_audio, feature_spec, feature_options,
+    FEATURE_VERSION, PITCH_BACKENDS
+)
+from core.forest import CompiledForest
+from core.timing import stage, record
+from core.validation import PayloadError
+from collections import namedtuple
+import hashlib
+import io
 import joblib
 import numpy as np
 import os
+import shutil
+import threading
+import time
 
-MODEL_PATH = "model.pkl"
+MODEL_PATH = os.getenv("MODEL_PATH", "model.pkl")
+# Seconds between stat() checks of the model file for hot reload
+MODEL_CHECK_INTERVAL = float(os.getenv("MODEL_CHECK_INTERVAL", "1.0"))
+# Serve random forests through the flat-array evaluator exported next to the model
+COMPILED_FOREST = os.getenv("COMPILED_FOREST", "1") != "0"
+
+# model.pkl files written before feature specs were stored hold a bare
+# classifier trained on version 1 features at 22.05 kHz
+LEGACY_FEATURE_SPEC = {"version": 1, "sample_rate": 22050}
+
+# Immutable snapshot of a loaded model. Requests grab one reference and use
+# it for the whole call, so a concurrent reload can never hand them a
+# half-initialised classifier.
+LoadedModel = namedtuple("LoadedModel", ["clf", "version", "mtime", "load_seconds", "loaded_at", "features"],
+                         defaults=(LEGACY_FEATURE_SPEC,))
+
+def forest_dir(path, version):
+    """
+    Directory holding the flat-array export of model `version` saved at `path`.
+    """
+    return os.path.join(path + ".forest", version)
+
+def save_model(clf, path=MODEL_PATH, spec=None):
+    """
+    Save a classifier together with the feature spec it was trained on.
+    Written to a temp file and renamed so a running API never reloads a partial file.
+    Random forests are also exported as flat arrays (see core.forest), before
+    the model file itself, so a reload always finds the matching export.
+    """
+    buf = io.BytesIO()
+    joblib.dump({"model": clf, "features": spec or feature_spec()}, buf)
+    data = buf.getvalue()
+    version = hashlib.sha256(data).hexdigest()[:12]
+
+    exported = None
+    if hasattr(clf, "estimators_") and getattr(clf, "n_outputs_", 1) == 1:
+        exported = forest_dir(path, version)
+        if not os.path.isdir(exported):
+            tmp_dir = f"{exported}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            meta = {"model_version": version, "features": spec or feature_spec()}
+            CompiledForest.from_sklearn(clf).save(tmp_dir, meta)
+            os.rename(tmp_dir, exported)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    # Exports of older models are no longer reachable
+    root = path + ".forest"
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            if os.path.join(root, name) != exported:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return version
+
+class ModelRegistry:
+    """
+    Keeps the classifier in memory and hot-reloads it when model.pkl changes.
+    """
+    def __init__(self, path=MODEL_PATH, check_interval=MODEL_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._current = None
+        self._stat = None
+        self._next_check = 0.0
+        self._reloads = 0
+        self._lock = threading.Lock()
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, stat):
+        start = time.perf_counter()
+        # One open file for hashing and (if needed) unpickling: a concurrent
+        # rename can't make the version disagree with the model we load
+        with open(self.path, "rb") as f:
+            digest = hashlib.sha256()
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+            version = digest.hexdigest()[:12]
+
+            forest = None
+            exported = forest_dir(self.path, version)
+            if COMPILED_FOREST and os.path.isdir(exported):
+                # Read-only memory map: every process serving this model shares
+                # the same page-cache pages instead of holding its own copy
+                forest = CompiledForest.load(exported, mmap_mode="r")
+
+            if forest is not None and "features" in forest.meta:
+                # Everything needed is in the export; skip unpickling the sklearn model
+                clf, spec = forest, forest.meta["features"]
+            else:
+                f.seek(0)
+                artifact = joblib.load(f)
+                if isinstance(artifact, dict):
+                    clf, spec = artifact["model"], artifact["features"]
+                else:
+                    clf, spec = artifact, LEGACY_FEATURE_SPEC
+                clf = forest or clf
+        # Never serve a model features computed differently from its training data
+        if spec["version"] != FEATURE_VERSION:
+            raise ValueError(
+                f"Model {version} was trained on feature version {spec['version']}, "
+                f"this build computes version {FEATURE_VERSION}; retrain it"
+            )
+        if spec.get("pitch", "piptrack") not in PITCH_BACKENDS:
+            raise ValueError(f"Model {version} needs unknown pitch backend {spec['pitch']!r}")
+        load_seconds = time.perf_counter() - start
+        # A hot reload inside a request counts against that request
+        record("model_load", load_seconds)
+        print(f"Detector: Loaded model {version} ({spec['sample_rate']} Hz features, {spec.get('pitch', 'piptrack')}"
+              f"{', compiled forest' if isinstance(clf, CompiledForest) else ''}) in {load_seconds * 1000:.1f} ms")
+        return LoadedModel(clf, version, stat[0] / 1e9, load_seconds, time.time(), spec)
+
+    def get(self):
+        """
+        Return the current LoadedModel, reloading it first if the file changed.
+        """
+        current = self._current
+        now = time.monotonic()
+        if current is not None and now < self._next_check:
+            return current
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            current = self._current
+            if current is not None and time.monotonic() < self._next_check:
+                return current
+            self._next_check = time.monotonic() + self.check_interval
+
+            stat = self._file_stat()
+            if stat is None:
+                if current is None:
+                    # Fallback if model missing (should run train_model.py)
+                    raise FileNotFoundError("Model file missing")
+                # Keep serving the last good model if the file disappears
+                return current
+            if current is not None and stat == self._stat:
+                return current
+
+            try:
+                loaded = self._load(stat)
+            except Exception as e:
+                if current is None:
+                    raise
+                # A half-written file must not take the service down
+                print(f"Detector: Model reload failed, keeping {current.version}: {e}")
+                return current
+
+            self._stat = stat
+            if current is not None:
+                self._reloads += 1
+            self._current = loaded
+            return loaded
+
+    def info(self):
+        current = self._current
+        if current is None:
+            return {"loaded": False, "path": self.path}
+        return {
+            "loaded": True,
+            "path": self.path,
+            "version": current.version,
+            "mtime": current.mtime,
+            "loadedAt": current.loaded_at,
+            "loadSeconds": round(current.load_seconds, 4),
+            "reloads": self._reloads,
+            "features": current.features,
+            "compiled": isinstance(current.clf, CompiledForest),
+        }
+
+_registry = None
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
+
+# Feature vector in correct order for model
+FEATURE_ORDER = ["zero_crossing_rate", "spectral_flatness", "pitch_std", "silence_ratio", "duration"]
+
+def explain(prediction_label, features_dict):
+    """
+    Human-readable reasons for a prediction.
+    """
+    # Interpretation Logic
+    explanation_map = {
+        "HUMAN": {
+            "high_pitch": features_dict["pitch_std"] > 20,
+            "natural_silence": features_dict["silence_ratio"] > 0.1,
+            "spectral_variance": features_dict["spectral_flatness"] > 0.02
+        },
+        "AI_GENERATED": {
+            "flat_pitch": features_dict["pitch_std"] < 15,
+            "continuous_stream": features_dict["silence_ratio"] < 0.08,
+            "clean_spectrum": features_dict["spectral_flatness"] < 0.015
+        }
+    }
+    
+    reasons = []
+    if prediction_label == "HUMAN":
+        if explanation_map["HUMAN"]["high_pitch"]:
+            reasons.append("Natural pitch variability")
+        if explanation_map["HUMAN"]["natural_silence"]:
+            reasons.append("Human breathing patterns")
+        if explanation_map["HUMAN"]["spectral_variance"]:
+            reasons.append("Complex spectral characteristics")
+        return " and ".join(reasons) if reasons else "Natural speech patterns detected"
+    else:
+        if explanation_map["AI_GENERATED"]["flat_pitch"]:
+            reasons.append("Monotonic pitch")
+        if explanation_map["AI_GENERATED"]["continuous_stream"]:
+            reasons.append("No natural pauses")
+        if explanation_map["AI_GENERATED"]["clean_spectrum"]:
+            reasons.append("Overly clean audio")
+        return " and ".join(reasons) if reasons else "AI-like speech patterns detected"
+
+def predict_features(features_list, model=None):
+    """
+    Classify a list of feature dicts with a single predict_proba call.
+    Returns one result dict per input, in order.
+    """
+    # Get in-memory model (reloaded only when model.pkl changes)
+    clf = (model or get_registry().get()).clf
+
+    feature_matrix = np.array([[f[name] for name in FEATURE_ORDER] for f in features_list])
+    with stage("predict"):
+        probs = clf.predict_proba(feature_matrix)
+    # Same label RandomForestClassifier.predict would return
+    class_idx = np.argmax(probs, axis=1)
+
+    results = []
+    for features_dict, row, idx in zip(features_list, probs, class_idx):
+        prediction_label = clf.classes_[idx]
+        results.append({
+            "classification": ClassificationEnum(prediction_label),
+            "confidenceScore": round(float(row[idx]), 2),
+            "explanation": explain(prediction_label, features_dict)
+        })
+    return results
+
+def _fallback_result(e):
+    print(f"Detector Error: {e}")
+    # Graceful fallback for demo/error purposes
+    return {
+        "classification": ClassificationEnum.HUMAN,
+        "confidenceScore": 0.5,
+        "explanation": f"Analysis uncertain due to processing error: {str(e)}"
+    }
+
+def _classify(audio):
+    # Extract features (Now returns correct dict keys matching new audio_utils)
+    model = get_registry().get()
+    spec = model.features
+    features_dict = load_audio_features(audio, spec["sample_rate"], **feature_options(spec))
+    return predict_features([features_dict], model)[0], model.version
 
 def classify_voice(base64_audio: str, language: str):
     """
     Main classification function.
     
     Args:
-        base64_audio: Base64-encoded MP3
+        base64_audio: Base64-encoded MP3, or a DecodedAudio already decoded by the caller
         language: One of [Tamil, English, Hindi, Malayalam, Telugu]
     
     Returns:
@@ -22,78 +295,109 @@ def classify_voice(base64_audio: str, language: str):
         }
     """
     try:
-        # Load model
-        if not os.path.exists(MODEL_PATH):
-            # Fallback if model missing (should run train_model.py)
-            raise FileNotFoundError("Model file missing")
-            
-        clf = joblib.load(MODEL_PATH)
-        
-        # Extract features (Now returns correct dict keys matching new audio_utils)
-        features_dict = load_audio_features(base64_audio)
-        
-        # Feature vector in correct order for model
-        feature_vector = np.array([[
-            features_dict["zero_crossing_rate"],
-            features_dict["spectral_flatness"],
-            features_dict["pitch_std"],
-            features_dict["silence_ratio"],
-            features_dict["duration"]
-        ]])
-
-        # Predict
-        prediction_label = clf.predict(feature_vector)[0]
-        
-        # Get confidence
-        probs = clf.predict_proba(feature_vector)[0]
-        class_idx = list(clf.classes_).index(prediction_label)
-        confidence = probs[class_idx]
-        
-        # Interpretation Logic
-        explanation_map = {
-            "HUMAN": {
-                "high_pitch": features_dict["pitch_std"] > 20,
-                "natural_silence": features_dict["silence_ratio"] > 0.1,
-                "spectral_variance": features_dict["spectral_flatness"] > 0.02
-            },
-            "AI_GENERATED": {
-                "flat_pitch": features_dict["pitch_std"] < 15,
-                "continuous_stream": features_dict["silence_ratio"] < 0.08,
-                "clean_spectrum": features_dict["spectral_flatness"] < 0.015
-            }
-        }
-        
-        reasons = []
-        if prediction_label == "HUMAN":
-            if explanation_map["HUMAN"]["high_pitch"]:
-                reasons.append("Natural pitch variability")
-            if explanation_map["HUMAN"]["natural_silence"]:
-                reasons.append("Human breathing patterns")
-            if explanation_map["HUMAN"]["spectral_variance"]:
-                reasons.append("Complex spectral characteristics")
-            explanation = " and ".join(reasons) if reasons else "Natural speech patterns detected"
-        else:
-            if explanation_map["AI_GENERATED"]["flat_pitch"]:
-                reasons.append("Monotonic pitch")
-            if explanation_map["AI_GENERATED"]["continuous_stream"]:
-                reasons.append("No natural pauses")
-            if explanation_map["AI_GENERATED"]["clean_spectrum"]:
-                reasons.append("Overly clean audio")
-            explanation = " and ".join(reasons) if reasons else "AI-like speech patterns detected"
-            
-        classification = ClassificationEnum(prediction_label)
-
-        return {
-            "classification": classification,
-            "confidenceScore": round(float(confidence), 2),
-            "explanation": explanation
-        }
+        return _classify(base64_audio)[0]
+    except Exception as e:
+        return _fallback_result(e)
 
+def classify_voice_versioned(audio, language):
+    """
+    classify_voice plus the version of the model that produced the result.
+    The version is None when the result is the error fallback (so it is never cached).
+    """
+    try:
+        return _classify(audio)
+    except PayloadError:
+        # Over the duration limit: the client's error, not a processing one
+        raise
     except Exception as e:
-        print(f"Detector Error: {e}")
-        # Graceful fallback for demo/error purposes
-        return {
-            "classification": ClassificationEnum.HUMAN,
-            "confidenceScore": 0.5,
-            "explanation": f"Analysis uncertain due to processing error: {str(e)}"
-        }
+        return _fallback_result(e), None
+
+def classify_batch(outcomes, model=None):
+    """
+    Classify many clips whose features were extracted elsewhere (in parallel
+    worker processes): the stacked feature matrix goes through one predict_proba.
+    outcomes: a feature dict or the Exception raised for that clip.
+    model: the registry snapshot the features were extracted for (default: current).
+    Returns a result dict or an Exception per clip, in input order.
+    """
+    outcomes = list(outcomes)
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            print(f"Detector Error: {outcome}")
+
+    ok = [i for i, outcome in enumerate(outcomes) if isinstance(outcome, dict)]
+    if ok:
+        try:
+            predictions = predict_features([outcomes[i] for i in ok], model)
+        except Exception as e:
+            print(f"Detector Error: {e}")
+            predictions = [e] * len(ok)
+        for i, prediction in zip(ok, predictions):
+            outcomes[i] = prediction
+    return outcomes
+
+def classify_segments(audio, window_seconds=SEGMENT_SECONDS, aggregate="max",
+                      early_exit_threshold=None, early_exit_segments=1):
+    """
+    Score a long recording window by window with the same classifier, so a
+    short synthetic splice is not averaged away. The audio is decoded as a
+    stream: peak memory depends on the window length, not the file length.
+
+    aggregate: "max" (the most AI-like window decides) or "mean".
+    early_exit_threshold: stop decoding once early_exit_segments windows have
+    an AI probability at or above it.
+    Returns (result dict, model version).
+    """
+    model = get_registry().get()
+    clf = model.clf
+    sr = model.features["sample_rate"]
+    options = feature_options(model.features)
+    ai_index = list(clf.classes_).index(ClassificationEnum.AI_GENERATED.value)
+
+    segments = []
+    ai_probs = []
+    window_features = []
+    start = 0.0
+    hits = 0
+    early_exit = False
+    for y in as_decoded_audio(audio).iter_windows(sr, window_seconds):
+        features = extract_features(y, sr, **options)
+        with stage("predict"):
+            ai_prob = float(clf.predict_proba(np.array([[features[name] for name in FEATURE_ORDER]]))[0, ai_index])
+        end = start + len(y) / sr
+        is_ai = ai_prob >= 0.5
+        segments.append({
+            "start": round(start, 2),
+            "end": round(end, 2),
+            "classification": ClassificationEnum.AI_GENERATED if is_ai else ClassificationEnum.HUMAN,
+            "confidenceScore": round(ai_prob if is_ai else 1.0 - ai_prob, 2)
+        })
+        ai_probs.append(ai_prob)
+        window_features.append(features)
+        start = end
+
+        if early_exit_threshold is not None and ai_prob >= early_exit_threshold:
+            hits += 1
+            if hits >= early_exit_segments:
+                early_exit = True
+                break
+
+    score = max(ai_probs) if aggregate == "max" else float(np.mean(ai_probs))
+    label = ClassificationEnum.AI_GENERATED if score >= 0.5 else ClassificationEnum.HUMAN
+    # Explain with the window that most supports the verdict
+    key = int(np.argmax(ai_probs)) if label == ClassificationEnum.AI_GENERATED else int(np.argmin(ai_probs))
+    explanation = explain(label.value, window_features[key])
+    explanation += f" (strongest at {segments[key]['start']:.1f}-{segments[key]['end']:.1f}s)"
+
+    print(f"Detector: {len(segments)} segment(s), {aggregate} AI probability {score:.2f}"
+          f"{', early exit' if early_exit else ''}")
+    result = {
+        "classification": label,
+        "confidenceScore": round(score if label == ClassificationEnum.AI_GENERATED else 1.0 - score, 2),
+        "explanation": explanation,
+        "aggregate": aggregate,
+        "analyzedSeconds": round(start, 2),
+        "earlyExit": early_exit,
+        "segments": segments
+    }
+    return result, model.version
@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+
+# Where train_model.py keeps extracted training features between runs
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "feature_cache")
+# Rows per chunk file; an interrupted run loses at most one unfinished chunk
+FEATURE_CACHE_CHUNK = int(os.getenv("FEATURE_CACHE_CHUNK", "256"))
+
+class FeatureStore:
+    """
+    On-disk cache of training features keyed by file path, mtime and feature
+    spec. Rows live in .npy chunks that are memory-mapped on open, each next
+    to a .json list of its keys; both are written to a temp name and renamed,
+    so a chunk is either complete or absent. Files that failed to decode are
+    stored as NaN rows so they are not retried until they change.
+    """
+    def __init__(self, root, spec):
+        self.spec = dict(spec)
+        # One directory per feature spec: changing the features never reuses old rows
+        tag = hashlib.sha1(json.dumps(self.spec, sort_keys=True).encode()).hexdigest()[:12]
+        self.root = os.path.join(root, f"v{self.spec['version']}-{self.spec['sample_rate']}-{tag}")
+        os.makedirs(self.root, exist_ok=True)
+        self._rows = {}
+        self._chunks = 0
+        for keys_path in sorted(glob.glob(os.path.join(self.root, "chunk-*.json"))):
+            data_path = keys_path[:-len(".json")] + ".npy"
+            if not os.path.exists(data_path):
+                continue
+            with open(keys_path) as f:
+                keys = json.load(f)
+            data = np.load(data_path, mmap_mode="r")
+            for i, key in enumerate(keys):
+                self._rows[key] = data[i]
+            self._chunks += 1
+
+    @staticmethod
+    def key(path):
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, key):
+        return self._rows.get(key)
+
+    def add(self, keys, rows):
+        """
+        Persist one chunk of rows (shape (len(keys), n_features)).
+        """
+        if not keys:
+            return
+        rows = np.asarray(rows, dtype=np.float64)
+        base = os.path.join(self.root, f"chunk-{os.getpid()}-{self._chunks:06d}")
+        self._chunks += 1
+        # Data first, keys last: a chunk only counts once its key list exists
+        np.save(base + ".npy.tmp.npy", rows)
+        os.replace(base + ".npy.tmp.npy", base + ".npy")
+        with open(base + ".json.tmp", "w") as f:
+            json.dump(list(keys), f)
+        os.replace(base + ".json.tmp", base + ".json")
+        for key, row in zip(keys, rows):
+            self._rows[key] = row
+
+def _file_features(args):
+    # Runs in a worker process
+    path, sr, options, feature_order = args
+    import librosa
+    from core.audio_utils import extract_features
+    try:
+        y, _ = librosa.load(path, sr=sr)
+        features = extract_features(y, sr, **options)
+        return path, [features[name] for name in feature_order]
+    except Exception as e:
+        print(f"FeatureStore: Error processing {path}: {e}")
+        return path, [np.nan] * len(feature_order)
+
+def extract_dataset(paths, store, feature_order, workers=None, chunk_size=FEATURE_CACHE_CHUNK):
+    """
+    Features for every path, as an (n, len(feature_order)) array in input order
+    (NaN rows for files that could not be processed). Cached rows are reused;
+    only new or modified files are decoded, in parallel worker processes.
+    """
+    keys = [FeatureStore.key(path) for path in paths]
+    missing = [(path, key) for path, key in zip(paths, keys) if key not in store]
+    print(f"FeatureStore: {len(paths) - len(missing)} cached, {len(missing)} to extract")
+
+    if missing:
+        key_for = dict(missing)
+        from core.audio_utils import feature_options
+        options = feature_options(store.spec)
+        jobs = [(path, store.spec["sample_rate"], options, list(feature_order)) for path, _ in missing]
+        pending_keys, pending_rows = [], []
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for path, row in executor.map(_file_features, jobs, chunksize=4):
+                pending_keys.append(key_for[path])
+                pending_rows.append(row)
+                if len(pending_keys) >= chunk_size:
+                    store.add(pending_keys, pending_rows)
+                    done += len(pending_keys)
+                    pending_keys, pending_rows = [], []
+                    print(f"FeatureStore: {done}/{len(missing)} extracted")
+        store.add(pending_keys, pending_rows)
+
+    return np.array([store.get(key) for key in keys]).reshape(len(keys), len(feature_order))
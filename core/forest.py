@@ -0,0 +1,132 @@
+import json
+import os
+import numpy as np
+
+# Rows scored per block, bounding the (rows x trees) temporaries
+FOREST_BLOCK_ROWS = 1024
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into NumPy arrays.
+
+    All trees share one node table (children[node] = [left, right], leaves
+    point to themselves). Every (row, tree) pair walks down with vectorized
+    index arithmetic, one level per step, dropping pairs as they hit a leaf.
+    Probabilities reproduce sklearn bit for bit: inputs are compared as
+    float32 (like sklearn's tree code), per-tree leaf fractions are summed in
+    tree order (cumsum is strictly sequential) and divided by the tree count.
+
+    There is no per-call validation or thread dispatch, so small batches are
+    an order of magnitude faster than sklearn; past a few hundred rows
+    sklearn's compiled traversal wins (see benchmarks/bench_forest.py).
+    """
+    ARRAYS = ("feature", "threshold", "children", "leaf_proba", "roots")
+
+    def __init__(self, feature, threshold, children, leaf_proba, roots, classes, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self._children_flat = children.reshape(-1)
+        self._is_leaf = children[:, 0] == np.arange(len(children))
+
+    @classmethod
+    def from_sklearn(cls, clf):
+        import sklearn
+        # Before 1.4 tree_.value held class counts that predict_proba normalized
+        normalize_leaves = tuple(int(p) for p in sklearn.__version__.split(".")[:2]) < (1, 4)
+        feature, threshold, children, leaf_proba, roots = [], [], [], [], []
+        offset = 0
+        n_classes = len(clf.classes_)
+        for estimator in clf.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            children.append(np.column_stack([
+                np.where(is_leaf, nodes, tree.children_left),
+                np.where(is_leaf, nodes, tree.children_right),
+            ]) + offset)
+            proba = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+            if normalize_leaves:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+            leaf_proba.append(proba)
+            offset += tree.node_count
+        return cls(
+            np.concatenate(feature).astype(np.intp),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(children).astype(np.intp),
+            np.concatenate(leaf_proba),
+            np.array(roots, dtype=np.intp),
+            clf.classes_,
+            max(estimator.tree_.max_depth for estimator in clf.estimators_),
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def save(self, directory, meta=None):
+        """
+        Write one .npy per array plus meta.json into a new directory.
+        """
+        os.makedirs(directory)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        meta = dict(meta or {}, classes=self.classes_.tolist(), max_depth=self.max_depth)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        forest = cls(*arrays, meta["classes"], meta["max_depth"])
+        forest.meta = meta
+        return forest
+
+    def apply(self, X):
+        """
+        Leaf index (into the shared node table) for every row and tree.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        x_flat = X.reshape(-1)
+        leaves = np.tile(self.roots, n_rows)
+        # Offset of each pair's row in x_flat
+        row_base = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+
+        active = np.flatnonzero(~self._is_leaf[leaves])
+        nodes = leaves[active]
+        row_base = row_base[active]
+        while len(active):
+            values = np.take(x_flat, row_base + np.take(self.feature, nodes))
+            go_right = ~(values <= np.take(self.threshold, nodes))
+            nodes = np.take(self._children_flat, 2 * nodes + go_right)
+            done = np.take(self._is_leaf, nodes)
+            if done.any():
+                leaves[active[done]] = nodes[done]
+                keep = ~done
+                active, nodes, row_base = active[keep], nodes[keep], row_base[keep]
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), FOREST_BLOCK_ROWS):
+            leaves = self.apply(X[start:start + FOREST_BLOCK_ROWS])
+            # Sum trees in order, exactly like sklearn's accumulation loop
+            out[start:start + len(leaves)] = np.cumsum(self.leaf_proba[leaves], axis=1)[:, -1]
+        out /= self.n_trees
+        return out
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
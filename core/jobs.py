@@ -0,0 +1,343 @@
+from core.audio_utils import DecodedAudio
+from core.detector import classify_voice_versioned, classify_segments
+from core.timing import StageTimer, TRACE_MEMORY
+from core.workers import PoolFullError
+from contextlib import contextmanager
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import tracemalloc
+import uuid
+
+# SQLite file holding queued jobs and their results (shared by every API process on the host)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+# Processes consuming the job queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+# Queued (not yet running) jobs accepted before submissions get 503
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# How long finished jobs and their results are kept
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "86400"))
+# A running job whose worker stops renewing its lease for this many seconds is assumed lost and requeued
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "900"))
+# Runs allowed per job; a job that keeps killing its worker is failed after this
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Seconds an idle worker waits before polling the queue again
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+
+_COLUMNS = ("id", "state", "language", "mode", "options", "result", "error",
+            "created", "started", "finished", "attempts", "worker")
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _worker_alive(name):
+    host, _, pid = name.rpartition(":")
+    if host != socket.gethostname():
+        # Another host's worker: only its lease can tell
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+class JobStore:
+    """
+    Durable job queue in a SQLite table. Jobs move queued -> running ->
+    done | failed; the audio is dropped once a job finishes and finished
+    jobs expire after result_ttl seconds. Safe to share between processes.
+    """
+    def __init__(self, path=JOB_DB_PATH, result_ttl=JOB_RESULT_TTL_SECONDS, timeout=JOB_TIMEOUT_SECONDS,
+                 max_attempts=JOB_MAX_ATTEMPTS, max_queued=JOB_QUEUE_SIZE, clock=time.time):
+        self.path = path
+        self.result_ttl = result_ttl
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.max_queued = max_queued
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, audio BLOB, language TEXT, mode TEXT NOT NULL, "
+            "options TEXT NOT NULL, result TEXT, error TEXT, created REAL NOT NULL, started REAL, "
+            "finished REAL, expires REAL, lease REAL, attempts INTEGER NOT NULL DEFAULT 0, worker TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created)")
+
+    def _row(self, row):
+        job = dict(zip(_COLUMNS, row))
+        job["options"] = json.loads(job["options"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, audio_bytes, language=None, mode="segmented", options=None):
+        """
+        Store a new job and return its id. Raises PoolFullError when the queue is full.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                queued = self._db.execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued'").fetchone()[0]
+                if queued >= self.max_queued:
+                    raise PoolFullError(f"Job queue is full ({queued}/{self.max_queued})")
+                self._db.execute(
+                    "INSERT INTO jobs (id, state, audio, language, mode, options, created) "
+                    "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                    (job_id, bytes(audio_bytes), language, mode, json.dumps(options or {}), self._clock())
+                )
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return job_id
+
+    def get(self, job_id):
+        """
+        The job as a dict (without its audio), or None if unknown or expired.
+        """
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ? AND (expires IS NULL OR expires > ?)",
+                (job_id, self._clock())
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def claim(self, worker):
+        """
+        Take the oldest queued job for `worker`. Returns the job with its
+        "audio" bytes, or None when the queue is empty.
+        """
+        now = self._clock()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    f"SELECT {', '.join(_COLUMNS)}, audio FROM jobs WHERE state = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'running', started = ?, lease = ?, worker = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (now, now + self.timeout, worker, row[0])
+                    )
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        if row is None:
+            return None
+        job = self._row(row[:-1])
+        job.update(state="running", started=now, worker=worker, attempts=job["attempts"] + 1, audio=row[-1])
+        return job
+
+    def renew(self, job_id, worker):
+        """
+        Extend the lease of a job `worker` is still running. Returns False if it no longer holds the job.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (self._clock() + self.timeout, job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def _finish(self, job_id, worker, state, result=None, error=None):
+        now = self._clock()
+        with self._lock:
+            # Only the worker holding the job may finish it (a requeued job has a new owner)
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = ?, audio = NULL, finished = ?, expires = ?, "
+                "lease = NULL WHERE id = ? AND worker = ? AND state = 'running'",
+                (state, json.dumps(result) if result is not None else None, error, now,
+                 now + self.result_ttl, job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        return self._finish(job_id, worker, "done", result=result)
+
+    def fail(self, job_id, worker, message):
+        return self._finish(job_id, worker, "failed", error=message)
+
+    def recover(self, alive=_worker_alive):
+        """
+        Requeue running jobs whose worker died or whose lease ran out (e.g.
+        after a crash or restart). Jobs out of attempts are failed instead.
+        Returns the number of jobs requeued.
+        """
+        now = self._clock()
+        requeued = 0
+        with self._lock:
+            rows = self._db.execute("SELECT id, worker, lease, attempts FROM jobs WHERE state = 'running'").fetchall()
+            for job_id, worker, lease, attempts in rows:
+                if lease is not None and lease > now and alive(worker or ""):
+                    continue
+                if attempts >= self.max_attempts:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'failed', error = ?, audio = NULL, finished = ?, expires = ?, "
+                        "lease = NULL WHERE id = ? AND state = 'running'",
+                        (f"Job abandoned after {attempts} attempts", now, now + self.result_ttl, job_id)
+                    )
+                else:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'queued', worker = NULL, lease = NULL WHERE id = ? AND state = 'running'",
+                        (job_id,)
+                    )
+                    requeued += 1
+        if requeued:
+            print(f"Jobs: Requeued {requeued} interrupted job(s)")
+        return requeued
+
+    def purge_expired(self):
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE expires IS NOT NULL AND expires <= ?", (self._clock(),))
+        return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in ("queued", "running", "done", "failed")}
+
+def process_job(job):
+    """
+    Run one job: language ID if no language was given, then the same
+    classification as the synchronous endpoints. Returns the response dict.
+    """
+    options = job["options"]
+    audio = DecodedAudio(job["audio"], max_seconds=options.get("maxSeconds"))
+    language = job["language"]
+    if not language:
+        # Whisper only loads in job workers that actually see auto-detect jobs
+        from core.lid import get_detector, LID_SAMPLE_RATE, LID_SCAN_SECONDS
+        language = get_detector().detect(audio.head(LID_SAMPLE_RATE, LID_SCAN_SECONDS))
+        if language is None:
+            raise ValueError("Audio is not detectable")
+
+    if job["mode"] == "single":
+        result, model_version = classify_voice_versioned(audio, language)
+        if model_version is None:
+            raise RuntimeError(result["explanation"])
+    else:
+        result, _ = classify_segments(
+            audio, options["windowSeconds"], options["aggregate"],
+            options.get("earlyExitThreshold"), options.get("earlyExitSegments", 1)
+        )
+    return json.loads(json.dumps({"status": "success", "language": language, **result}))
+
+@contextmanager
+def _heartbeat(store, job_id, worker):
+    # Renew the lease while the job runs, so long jobs are not requeued under a live worker
+    stop = threading.Event()
+    def beat():
+        while not stop.wait(store.timeout / 3):
+            try:
+                if not store.renew(job_id, worker):
+                    return
+            except sqlite3.OperationalError as e:
+                print(f"Jobs: Lease renewal failed: {e}")
+    thread = threading.Thread(target=beat, name="job-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def run_once(store, worker=None):
+    """
+    Claim and run one job. Returns False when the queue was empty.
+    """
+    worker = worker or worker_name()
+    job = store.claim(worker)
+    if job is None:
+        return False
+    start = time.perf_counter()
+    timer = StageTimer()
+    try:
+        with timer.track_memory(), _heartbeat(store, job["id"], worker):
+            result = process_job(job)
+        store.complete(job["id"], worker, result)
+        memory = ""
+        if timer.peak_bytes is not None:
+            memory = f", peak {timer.peak_bytes / 1e6:.1f} MB" + (" (over MEMORY_BUDGET_MB)" if timer.over_budget else "")
+        print(f"Jobs: {job['id']} done in {time.perf_counter() - start:.1f}s{memory}")
+    except Exception as e:
+        print(f"Jobs: {job['id']} failed: {e}")
+        store.fail(job["id"], worker, str(e))
+    return True
+
+def _worker_main(db_path, stop, poll_interval):
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    store = JobStore(db_path)
+    worker = worker_name()
+    next_maintenance = 0.0
+    while not stop.is_set():
+        if time.monotonic() >= next_maintenance:
+            # Expired results and jobs stuck past their lease
+            store.purge_expired()
+            store.recover()
+            next_maintenance = time.monotonic() + 60
+        try:
+            busy = run_once(store, worker)
+        except sqlite3.OperationalError as e:
+            print(f"Jobs: Queue error: {e}")
+            busy = False
+        if not busy:
+            stop.wait(poll_interval)
+
+class JobRunner:
+    """
+    Worker processes consuming the job queue. Jobs interrupted by a restart
+    are requeued when the runner starts.
+    """
+    def __init__(self, db_path=JOB_DB_PATH, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.db_path = db_path
+        self.workers = max(0, workers)
+        self.poll_interval = poll_interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._procs = []
+
+    def start(self):
+        JobStore(self.db_path).recover()
+        for _ in range(self.workers):
+            proc = self._ctx.Process(target=_worker_main, args=(self.db_path, self._stop, self.poll_interval),
+                                     name="job-worker", daemon=True)
+            proc.start()
+            self._procs.append(proc)
+
+    def shutdown(self, timeout=5.0):
+        self._stop.set()
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                # Its job stays "running" and is requeued on the next start
+                proc.terminate()
+        self._procs = []
+
+    def stats(self):
+        return {"workers": self.workers, "alive": sum(p.is_alive() for p in self._procs)}
+
+_store = None
+def get_job_store():
+    global _store
+    if _store is None:
+        _store = JobStore()
+    return _store
+
+_runner = None
+def get_job_runner():
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+    return _runner
@@ -1,44 +1,116 @@
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from core.audio_utils import non_silent_intervals
+from core.workers import PoolFullError
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import numpy as np
 import os
+import threading
+import time
 
 # 'base' is ~140MB, much more accurate than 'tiny'
 # Recommended for local testing or paid cloud instances
-MODEL_SIZE = "base"
+MODEL_SIZE = os.getenv("LID_MODEL_SIZE", "base")
+# CTranslate2 model replicas: concurrent LID calls run in parallel up to this many
+LID_REPLICAS = int(os.getenv("LID_REPLICAS", "1"))
+# Intra-op threads per replica; keep LID_REPLICAS * LID_THREADS <= cores
+LID_THREADS = int(os.getenv("LID_THREADS", "2"))
+# LID requests allowed to wait for a free replica before we reject with 503
+LID_QUEUE_SIZE = int(os.getenv("LID_QUEUE_SIZE", str(LID_REPLICAS * 4)))
+# Whisper works on 16 kHz mono PCM
+LID_SAMPLE_RATE = 16000
+# "detect": language-ID pass only on a voiced prefix; "transcribe": legacy full transcribe() path
+LID_MODE = os.getenv("LID_MODE", "detect")
+# Seconds of voiced audio fed to the language-ID pass (Whisper looks at 30s windows)
+LID_SECONDS = float(os.getenv("LID_SECONDS", "30"))
+# Long recordings: how far into the file to look for those LID_SECONDS of speech,
+# so a voicemail's ringing or silent lead-in does not leave nothing to identify
+LID_SCAN_SECONDS = float(os.getenv("LID_SCAN_SECONDS", "120"))
+
+# Map simplified codes to full names
+ISO_MAP = {
+    'ta': 'Tamil', 'en': 'English', 'hi': 'Hindi',
+    'ml': 'Malayalam', 'te': 'Telugu'
+}
+
 _model = None
 
+def voiced_prefix(audio, seconds=LID_SECONDS, intervals=None):
+    """
+    The first `seconds` (None: all) of non-silent audio, with silent gaps removed.
+    intervals: the speech intervals of audio, if already computed.
+    """
+    if intervals is None:
+        intervals = non_silent_intervals(audio)
+    chunks = []
+    remaining = int(seconds * LID_SAMPLE_RATE) if seconds is not None else len(audio)
+    for start, end in intervals:
+        take = min(end - start, remaining)
+        chunks.append(audio[start:start + take])
+        remaining -= take
+        if remaining <= 0:
+            break
+    if not chunks:
+        return audio[:0]
+    return np.concatenate(chunks)
+
 class LanguageDetector:
     def __init__(self):
         global _model
         if _model is None:
             print(f"LID: Loading Faster-Whisper '{MODEL_SIZE}' model... (One-time setup)")
             try:
-                # cpu_threads=1 to be nice to free tier
                 # compute_type="int8" is the key for low RAM usage (<500MB)
-                _model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8", cpu_threads=2)
+                # num_workers replicas let calls from several threads run in parallel
+                _model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8",
+                                      cpu_threads=LID_THREADS, num_workers=LID_REPLICAS)
                 print("LID: Faster-Whisper model loaded.")
             except Exception as e:
                 print(f"LID Error loading model: {e}")
                 raise e
 
-    def detect(self, audio_file_path: str):
-        print(f"LID:Analyzing {audio_file_path} with Faster-Whisper...")
-        
-        try:
+    def identify(self, audio, mode=None, intervals=None):
+        """
+        Return (language code, probability) for a path or 16 kHz PCM array.
+        intervals: speech intervals of the array, if the caller has them.
+        """
+        mode = mode or LID_MODE
+        if mode == "transcribe":
+            if not isinstance(audio, str):
+                # Whisper would otherwise decode its way through the silence too
+                audio = voiced_prefix(audio, None, intervals)
             # transcription returns segments generator and info object
             # beam_size=1 is faster, lower memory
-            segments, info = _model.transcribe(audio_file_path, beam_size=1)
-            
-            code = info.language
-            conf = info.language_probability
-            
-            # Map simplified codes to full names
-            iso_map = {
-                'ta': 'Tamil', 'en': 'English', 'hi': 'Hindi', 
-                'ml': 'Malayalam', 'te': 'Telugu'
-            }
-            
-            mapped = iso_map.get(code)
-            
+            segments, info = _model.transcribe(audio, beam_size=1)
+            return info.language, info.language_probability
+
+        if isinstance(audio, str):
+            audio = decode_audio(audio, sampling_rate=LID_SAMPLE_RATE)
+        voiced = voiced_prefix(audio, intervals=intervals)
+        if len(voiced) == 0:
+            return None, 0.0
+        # Log-mel only for the voiced prefix, then only Whisper's language-detection pass
+        features = _model.feature_extractor(voiced)
+        code, conf, _ = _model.detect_language(features=features)
+        return code, conf
+
+    def detect(self, audio, intervals=None):
+        """
+        audio: path to a file, or mono float32 PCM at LID_SAMPLE_RATE
+        intervals: speech intervals of the PCM (DecodedAudio.speech_intervals), if known
+        """
+        if isinstance(audio, str):
+            print(f"LID:Analyzing {audio} with Faster-Whisper...")
+        else:
+            print(f"LID:Analyzing {len(audio) / LID_SAMPLE_RATE:.1f}s of audio with Faster-Whisper...")
+
+        try:
+            code, conf = self.identify(audio, intervals=intervals)
+
+            mapped = ISO_MAP.get(code)
+
             print(f"LID: Detected '{code}' ({mapped}) with conf {conf:.2f}")
 
             if mapped and conf > 0.4:
@@ -46,14 +118,99 @@ class LanguageDetector:
             else:
                 print(f"LID: Low confidence or unsupported language: {code}")
                 return None
-            
+
         except Exception as e:
             print(f"LID Critical Error: {e}")
             return None
 
+class LidService:
+    """
+    Bounded front end for language ID: one thread per Whisper replica and a
+    fixed-size queue, rejecting with PoolFullError (503) beyond that instead
+    of oversubscribing the cores.
+    """
+    def __init__(self, replicas=LID_REPLICAS, max_queue=LID_QUEUE_SIZE, threads=LID_THREADS):
+        self.replicas = max(1, replicas)
+        self.threads = threads
+        self.capacity = self.replicas + max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.replicas, thread_name_prefix="lid")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._started = time.monotonic()
+
+    def check_capacity(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise PoolFullError(f"Language ID queue is full ({self._in_flight}/{self.capacity})")
+
+    def _call(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._busy_seconds += time.perf_counter() - start
+
+    def _on_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def submit(self, fn, *args):
+        """
+        Queue fn(*args) (e.g. a detect() call) on a replica thread.
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise PoolFullError(f"Language ID queue is full ({self._in_flight}/{self.capacity})")
+            self._in_flight += 1
+        # Carry the caller's context so stages timed on the replica thread land in its request
+        future = self._executor.submit(contextvars.copy_context().run, self._call, fn, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self):
+        with self._lock:
+            in_flight = self._in_flight
+            uptime = time.monotonic() - self._started
+            return {
+                "model": MODEL_SIZE,
+                "replicas": self.replicas,
+                "threadsPerReplica": self.threads,
+                "capacity": self.capacity,
+                "inFlight": in_flight,
+                "queueDepth": max(0, in_flight - self.replicas),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "utilization": round(self._busy_seconds / (self.replicas * uptime), 4) if uptime > 0 else 0.0,
+                # Requests one replica completes per second of work: tune replicas x threads with this
+                "throughputPerReplica": round(self._completed / self._busy_seconds, 3) if self._busy_seconds else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_service = None
+def get_lid_service():
+    global _service
+    if _service is None:
+        _service = LidService()
+    return _service
+
 _detector = None
+_detector_lock = threading.Lock()
 def get_detector():
     global _detector
-    if _detector is None:
-        _detector = LanguageDetector()
+    # Replica threads may all ask for the detector on the first requests
+    with _detector_lock:
+        if _detector is None:
+            _detector = LanguageDetector()
     return _detector
@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from core.timing import StageTimer
+import threading
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds (bytes) for per-request peak memory
+MEMORY_BUCKETS = (1e6, 2e6, 5e6, 1e7, 2e7, 5e7, 1e8, 2e8, 5e8, 1e9)
+
+class Histogram:
+    """
+    Prometheus-style cumulative histogram, one series per label value.
+    """
+    def __init__(self, name, help, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for value, (counts, total) in sorted(series.items()):
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+class Counter:
+    """
+    Monotonic counter keyed by a tuple of label values.
+    """
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+def _counter_lines(name, help, label, values):
+    # Counters owned by other components, read when /metrics is scraped
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    lines += [f'{name}{{{label}="{key}"}} {value}' for key, value in values.items()]
+    return lines
+
+class Metrics:
+    """
+    Request and per-stage latency histograms plus error counters.
+    Stage times come from the request's StageTimer, so the pipeline itself
+    only pays for a perf_counter() pair per stage.
+    """
+    def __init__(self):
+        self.requests = Histogram("voice_request_duration_seconds", "End-to-end request latency.", "endpoint")
+        self.stages = Histogram(
+            "voice_stage_duration_seconds",
+            "Time spent in each pipeline stage per request (summed over clips and windows).",
+            "stage"
+        )
+        self.errors = Counter("voice_errors_total", "Responses with a 4xx/5xx status.", ("endpoint", "status"))
+        self.payloads = Counter("voice_payloads_total", "Payloads checked before decoding, by outcome.", ("result",))
+        # Only fed when workers trace allocations (TRACE_MEMORY=1)
+        self.memory = Histogram(
+            "voice_request_peak_memory_bytes",
+            "Peak memory traced in a worker process per request (largest over its worker calls).",
+            "endpoint", buckets=MEMORY_BUCKETS
+        )
+        self.over_budget = Counter(
+            "voice_memory_over_budget_total", "Requests whose worker peak exceeded MEMORY_BUDGET_MB.", ("endpoint",)
+        )
+
+    def observe_request(self, endpoint, status, timer):
+        self.requests.observe(endpoint, timer.total)
+        for name, seconds in list(timer.stages.items()):
+            self.stages.observe(name, seconds)
+        if status >= 400:
+            self.errors.inc(endpoint, str(status))
+        if timer.peak_bytes is not None:
+            self.memory.observe(endpoint, timer.peak_bytes)
+            if timer.over_budget:
+                self.over_budget.inc(endpoint)
+
+    def render(self, cache=None, pools=None):
+        """
+        Prometheus text exposition. cache: ResultCache.stats(); pools: {name: stats()}.
+        """
+        lines = self.requests.render() + self.stages.render() + self.errors.render() + self.payloads.render()
+        lines += self.memory.render() + self.over_budget.render()
+        if cache is not None:
+            lines += _counter_lines("voice_cache_hits_total", "Result cache hits.", "tier",
+                                    {"memory": cache["hits"], "disk": cache["diskHits"]})
+            lines += [
+                "# HELP voice_cache_misses_total Result cache misses.",
+                "# TYPE voice_cache_misses_total counter",
+                f"voice_cache_misses_total {cache['misses']}",
+            ]
+        if pools:
+            lines += _counter_lines("voice_rejected_total", "Requests rejected with 503 because a queue was full.",
+                                    "pool", {name: stats["rejected"] for name, stats in pools.items()})
+            lines += [
+                "# HELP voice_queue_in_flight Jobs running or queued.",
+                "# TYPE voice_queue_in_flight gauge",
+            ] + [f'voice_queue_in_flight{{pool="{name}"}} {stats["inFlight"]}' for name, stats in pools.items()]
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: gives every HTTP request a StageTimer, returns its
+    stages in a Server-Timing header and records them in `metrics`.
+    """
+    def __init__(self, app, metrics, skip=("/metrics",)):
+        self.app = app
+        self.metrics = metrics
+        self.skip = skip
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            with timer.activate():
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            # The route template, not the raw path, keeps label cardinality bounded
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.metrics.observe_request(endpoint, status, timer)
+
+_metrics = None
+def get_metrics():
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,122 @@
+import numpy as np
+import scipy.fft
+import soxr
+
+# YIN runs on the signal resampled to this rate: speech f0 needs nothing higher
+YIN_SAMPLE_RATE = 8000
+# f0 search range (Hz)
+YIN_FMIN = 60.0
+YIN_FMAX = 500.0
+# Frame and hop at YIN_SAMPLE_RATE: 47 ms frames (two periods at YIN_FMIN) every
+# 23 ms, the hop of the feature frames
+YIN_FRAME = 376
+YIN_HOP = 184
+# A frame is voiced when its normalised difference dips below this
+YIN_THRESHOLD = 0.15
+# Frames per FFT block: bounds the scratch memory (about 4 MB) whatever the
+# clip length; larger blocks are no faster
+YIN_BLOCK = 256
+
+_TAU_MIN = int(YIN_SAMPLE_RATE / YIN_FMAX)
+_TAU_MAX = int(np.ceil(YIN_SAMPLE_RATE / YIN_FMIN))
+# Smallest FFT whose circular autocorrelation is exact up to _TAU_MAX
+_N_FFT = 1 << int(np.ceil(np.log2(YIN_FRAME + _TAU_MAX + 1)))
+
+def _cmndf(frames):
+    """
+    YIN's cumulative mean normalised difference d'(tau) for tau = 0.._TAU_MAX,
+    one row per frame. The difference over the overlapping part of the frame,
+    d(tau) = E[0, N-tau) + E[tau, N) - 2 r(tau), needs one autocorrelation
+    (a single FFT) and a cumulative sum of squares per frame.
+    """
+    # scipy's FFT keeps float32 and is about twice as fast as numpy's on many short rows
+    spectrum = scipy.fft.rfft(frames, _N_FFT)
+    spectrum *= spectrum.conj()
+    r = scipy.fft.irfft(spectrum, _N_FFT)[:, :_TAU_MAX + 1]
+
+    squares = np.zeros((len(frames), YIN_FRAME + 1), dtype=np.float32)
+    np.cumsum(np.square(frames), axis=1, out=squares[:, 1:])
+    taus = np.arange(_TAU_MAX + 1)
+    diff = squares[:, YIN_FRAME - taus]
+    diff += squares[:, YIN_FRAME:]
+    diff -= squares[:, taus]
+    diff -= 2.0 * r
+    np.maximum(diff, 0.0, out=diff)
+
+    # d'(tau) = d(tau) / mean(d(1..tau)), and 1 at tau = 0
+    cmndf = np.cumsum(diff[:, 1:], axis=1)
+    np.maximum(cmndf, 1e-12, out=cmndf)
+    np.divide(diff[:, 1:] * taus[1:].astype(np.float32), cmndf, out=cmndf)
+    cmndf = np.concatenate([np.ones((len(frames), 1), dtype=np.float32), cmndf], axis=1)
+    return cmndf
+
+def yin_frames(frames):
+    """
+    (f0 in Hz, voiced) for each row of `frames` (YIN_FRAME samples at
+    YIN_SAMPLE_RATE). f0 is 0 where the frame is unvoiced.
+    """
+    cmndf = _cmndf(frames)
+    # First dip below the threshold that is a local minimum, within the f0 range
+    c = cmndf[:, _TAU_MIN - 1:]
+    center = c[:, 1:-1]
+    dips = (center < c[:, :-2]) & (center <= c[:, 2:]) & (center < YIN_THRESHOLD)
+    voiced = dips.any(axis=1)
+    first = np.argmax(dips, axis=1)
+
+    # Parabolic interpolation around the chosen lag
+    rows = np.arange(len(frames))
+    left, mid, right = c[rows, first], c[rows, first + 1], c[rows, first + 2]
+    curvature = left - 2.0 * mid + right
+    shift = np.zeros(len(frames), dtype=np.float32)
+    np.divide(left - right, 2.0 * curvature, out=shift, where=curvature > 0)
+    lag = (first + _TAU_MIN).astype(np.float32) + np.clip(shift, -1.0, 1.0)
+    f0 = np.where(voiced, YIN_SAMPLE_RATE / lag, np.float32(0.0))
+    return f0, voiced
+
+def _yin_blocks(frames):
+    f0 = np.zeros(len(frames), dtype=np.float32)
+    voiced = np.zeros(len(frames), dtype=bool)
+    for start in range(0, len(frames), YIN_BLOCK):
+        f0[start:start + YIN_BLOCK], voiced[start:start + YIN_BLOCK] = yin_frames(frames[start:start + YIN_BLOCK])
+    return f0, voiced
+
+def yin(y, sr):
+    """
+    Per-frame f0 (Hz, 0 where unvoiced) and voicing of mono PCM, tracked with
+    YIN on the signal resampled to YIN_SAMPLE_RATE. Frames are centered, like
+    the feature frames, every YIN_HOP samples of the resampled signal.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    if sr != YIN_SAMPLE_RATE:
+        y = soxr.resample(y, sr, YIN_SAMPLE_RATE)
+    y = np.pad(y, YIN_FRAME // 2)
+    if len(y) < YIN_FRAME:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool)
+    frames = np.lib.stride_tricks.sliding_window_view(y, YIN_FRAME)[::YIN_HOP]
+    return _yin_blocks(frames)
+
+class YinStream:
+    """
+    yin() for audio arriving in chunks: the same frames, analysed as soon as
+    they are complete, with only one frame of overlap buffered.
+    """
+    def __init__(self, sr):
+        self._resampler = soxr.ResampleStream(sr, YIN_SAMPLE_RATE, 1, dtype="float32") \
+            if sr != YIN_SAMPLE_RATE else None
+        self._buffer = np.zeros(YIN_FRAME // 2, dtype=np.float32)
+
+    def add(self, samples, last=False):
+        """
+        Feed mono float32 PCM at the input rate; returns (f0, voiced) of the
+        frames completed by it. last=True flushes the end of the stream.
+        """
+        if self._resampler is not None:
+            samples = self._resampler.resample_chunk(samples, last=last)
+        buffer = np.concatenate([self._buffer, samples] + ([np.zeros(YIN_FRAME // 2, np.float32)] if last else []))
+        if len(buffer) < YIN_FRAME:
+            self._buffer = buffer
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool)
+        n_new = 1 + (len(buffer) - YIN_FRAME) // YIN_HOP
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, YIN_FRAME)[::YIN_HOP][:n_new]
+        self._buffer = buffer[n_new * YIN_HOP:].copy()
+        return _yin_blocks(frames)
@@ -0,0 +1,172 @@
+from core.audio_utils import (
+    FEATURE_SAMPLE_RATE, FRAME_LENGTH, HOP_LENGTH, TOP_DB,
+    _window, _flatness_frames, _pitch_peaks
+)
+from core.pitch import YinStream
+import numpy as np
+import scipy.fft
+import soxr
+
+# Frame-energy histogram used for the streaming silence ratio (dB range and resolution)
+_DB_MIN = -100.0
+_DB_MAX = 40.0
+_DB_BIN = 0.1
+
+class StreamingFeatures:
+    """
+    Rolling version of extract_features for live audio.
+
+    Every hop of audio is framed and analysed exactly once and only running
+    statistics are kept, so memory stays constant however long the call runs:
+    - ZCR and spectral flatness: running sums over frames
+    - pitch_std: Welford accumulator over the piptrack peaks (the clip-level
+      feature keeps peaks above the median of the full bins x frames matrix,
+      which is 0 because peaks are always a minority of bins)
+    - silence ratio: a fixed-size histogram of frame energy, compared at read
+      time against the loudest frame so far (effects.split uses the clip max)
+    With trim (models trained on speech frames only) flatness and pitch sums
+    are also kept per energy bin, so the frames that turn out to be silence
+    can be left out when the features are read.
+    With the "yin" pitch backend, f0 comes from a YinStream fed the same
+    audio; only its voiced frames enter the pitch accumulator.
+    """
+    def __init__(self, input_rate=FEATURE_SAMPLE_RATE, sr=FEATURE_SAMPLE_RATE, trim=False, pitch="piptrack"):
+        self.sr = sr
+        self.trim = trim
+        self._yin = YinStream(sr) if pitch == "yin" else None
+        self._resampler = None
+        if input_rate != sr:
+            self._resampler = soxr.ResampleStream(input_rate, sr, 1, dtype="float32")
+        # Centered framing: the stream starts with half a frame of zero padding
+        self._buffer = np.zeros(FRAME_LENGTH // 2, dtype=np.float32)
+        self.n_samples = 0
+        self.n_frames = 0
+        self._zcr_sum = 0.0
+        self._flatness_sum = 0.0
+        self._pitch_count = 0
+        self._pitch_mean = 0.0
+        self._pitch_m2 = 0.0
+        self._db_hist = np.zeros(int((_DB_MAX - _DB_MIN) / _DB_BIN) + 1, dtype=np.int64)
+        # Per energy bin: flatness sum, and pitch peak count / sum / sum of squares
+        self._flatness_by_db = np.zeros(len(self._db_hist))
+        self._pitch_by_db = np.zeros((3, len(self._db_hist)))
+        self._max_power = 0.0
+        self.finished = False
+
+    @property
+    def seconds(self):
+        return self.n_samples / self.sr
+
+    def add(self, samples):
+        """
+        Feed mono float PCM at the input rate.
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        if self._resampler is not None:
+            samples = self._resampler.resample_chunk(samples)
+        self._append(samples)
+        if self._yin is not None:
+            f0, voiced = self._yin.add(samples)
+            self._merge_pitch(f0[voiced])
+
+    def finish(self):
+        """
+        Flush the resampler and the trailing half frame of padding.
+        """
+        if self.finished:
+            return
+        tail = np.zeros(0, dtype=np.float32)
+        if self._resampler is not None:
+            tail = self._resampler.resample_chunk(tail, last=True)
+            self._append(tail)
+        if self._yin is not None:
+            f0, voiced = self._yin.add(tail, last=True)
+            self._merge_pitch(f0[voiced])
+        self.n_samples -= FRAME_LENGTH // 2
+        self._append(np.zeros(FRAME_LENGTH // 2, dtype=np.float32))
+        self.finished = True
+
+    def _append(self, samples):
+        self.n_samples += len(samples)
+        buffer = np.concatenate([self._buffer, samples])
+        if len(buffer) < FRAME_LENGTH:
+            self._buffer = buffer
+            return
+        n_new = 1 + (len(buffer) - FRAME_LENGTH) // HOP_LENGTH
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, FRAME_LENGTH)[::HOP_LENGTH][:n_new]
+        self._analyse(frames)
+        # Keep only the overlap still needed by the next frame
+        self._buffer = buffer[n_new * HOP_LENGTH:].copy()
+
+    def _analyse(self, frames):
+        self.n_frames += len(frames)
+
+        signs = np.signbit(np.where(np.abs(frames) <= 1e-10, 0, frames))
+        self._zcr_sum += float(np.sum(np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1))) / FRAME_LENGTH
+
+        power = np.mean(frames ** 2, axis=1)
+        self._max_power = max(self._max_power, float(power.max()))
+        db = 10.0 * np.log10(np.maximum(1e-10, power))
+        bins = np.clip(((db - _DB_MIN) / _DB_BIN).astype(np.int64), 0, len(self._db_hist) - 1)
+        self._db_hist += np.bincount(bins, minlength=len(self._db_hist))
+
+        mag = np.abs(scipy.fft.rfft(frames * _window, axis=1))
+        flatness = _flatness_frames(mag)
+        self._flatness_sum += float(np.sum(flatness))
+
+        n_bins = len(self._db_hist)
+        if self.trim:
+            self._flatness_by_db += np.bincount(bins, weights=flatness, minlength=n_bins)
+        if self._yin is not None:
+            return
+
+        pitches, _, peak_frames = _pitch_peaks(mag, self.sr)
+        if self.trim:
+            peak_bins = bins[peak_frames]
+            self._pitch_by_db[0] += np.bincount(peak_bins, minlength=n_bins)
+            self._pitch_by_db[1] += np.bincount(peak_bins, weights=pitches, minlength=n_bins)
+            self._pitch_by_db[2] += np.bincount(peak_bins, weights=pitches * pitches, minlength=n_bins)
+        self._merge_pitch(pitches)
+
+    def _merge_pitch(self, pitches):
+        # Merge this block's pitch statistics into the running ones (Chan et al.)
+        if len(pitches):
+            n_b = len(pitches)
+            mean_b = float(np.mean(pitches, dtype=np.float64))
+            m2_b = float(np.var(pitches, dtype=np.float64)) * n_b
+            n = self._pitch_count + n_b
+            delta = mean_b - self._pitch_mean
+            self._pitch_mean += delta * n_b / n
+            self._pitch_m2 += m2_b + delta * delta * self._pitch_count * n_b / n
+            self._pitch_count = n
+
+    def features(self):
+        """
+        Current feature dict (same keys as extract_features), or None before the first frame.
+        """
+        if self.n_frames == 0 or self.n_samples <= 0:
+            return None
+
+        pitch_std = np.sqrt(self._pitch_m2 / self._pitch_count) if self._pitch_count else 0.0
+        flatness = self._flatness_sum / self.n_frames
+
+        # Frames within TOP_DB of the loudest frame count as speech
+        threshold = 10.0 * np.log10(max(1e-10, self._max_power)) - TOP_DB
+        centers = _DB_MIN + (np.arange(len(self._db_hist)) + 0.5) * _DB_BIN
+        speech = centers > threshold
+        speech_frames = int(self._db_hist[speech].sum())
+        non_silent = min(speech_frames * HOP_LENGTH, self.n_samples)
+
+        if self.trim and speech_frames:
+            flatness = float(self._flatness_by_db[speech].sum()) / speech_frames
+        if self.trim and speech_frames and self._yin is None:
+            count, total, squares = self._pitch_by_db[:, speech].sum(axis=1)
+            pitch_std = np.sqrt(max(0.0, squares / count - (total / count) ** 2)) if count else 0.0
+
+        return {
+            "zero_crossing_rate": self._zcr_sum / self.n_frames,
+            "spectral_flatness": flatness,
+            "pitch_std": float(pitch_std),
+            "silence_ratio": 1.0 - non_silent / self.n_samples,
+            "duration": self.seconds
+        }
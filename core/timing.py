@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+import contextvars
+import os
+import threading
+import time
+import tracemalloc
+
+# Trace allocations in the worker processes and report each request's peak
+# (tracemalloc slows allocation-heavy code down, so leave it off unless measuring)
+TRACE_MEMORY = os.getenv("TRACE_MEMORY", "0") == "1"
+# Peak traced MB a worker may use for one request before it is logged and
+# counted as over budget (0: no budget). Needs TRACE_MEMORY=1.
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))
+
+class StageTimer:
+    """
+    Wall-clock seconds per pipeline stage for one request, and its peak
+    traced memory when allocations are being traced.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.peak_bytes = None
+        self._start = time.perf_counter()
+        # LID threads and the event loop may add to the same request's timer
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, stages):
+        """
+        Add stage totals measured elsewhere (e.g. in a worker process).
+        """
+        for name, seconds in stages.items():
+            self.add(name, seconds)
+
+    def add_peak(self, nbytes):
+        """
+        Record a peak allocation (e.g. from a worker process); the largest one is kept.
+        """
+        with self._lock:
+            self.peak_bytes = max(self.peak_bytes or 0, nbytes)
+
+    @contextmanager
+    def track_memory(self):
+        """
+        Record the peak traced allocation of the block above what was already
+        allocated when it started. A no-op unless tracemalloc is tracing.
+        """
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            self.add_peak(tracemalloc.get_traced_memory()[1] - baseline)
+
+    @property
+    def over_budget(self):
+        return MEMORY_BUDGET_MB > 0 and (self.peak_bytes or 0) > MEMORY_BUDGET_MB * 1e6
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    async def timed(self, name, awaitable):
+        """
+        Await `awaitable`, recording how long it took under `name`.
+        """
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the timer that stage() and record() report to in this context.
+        """
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    @property
+    def total(self):
+        return time.perf_counter() - self._start
+
+    def summary(self):
+        parts = [f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.stages.items()]
+        parts.append(f"total={self.total * 1000:.1f}ms")
+        if self.peak_bytes is not None:
+            parts.append(f"peak_mem={self.peak_bytes / 1e6:.1f}MB" + (" OVER BUDGET" if self.over_budget else ""))
+        return " ".join(parts)
+
+    def server_timing(self):
+        """
+        Value for the Server-Timing response header.
+        """
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        return ", ".join(parts + [f"total;dur={self.total * 1000:.1f}"])
+
+# Timer of the request being served, if any. Pipeline code reports to it
+# through stage()/record(); outside a request both are no-ops.
+_current = contextvars.ContextVar("stage_timer", default=None)
+
+def current_timer():
+    return _current.get()
+
+@contextmanager
+def stage(name):
+    """
+    Time the block under `name` in the current request's timer.
+    """
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+def record(name, seconds):
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
@@ -0,0 +1,177 @@
+from collections import namedtuple
+import base64
+import binascii
+import os
+import re
+import struct
+
+# Defaults for the per-API-key payload limits (see auth.key_limits)
+MAX_AUDIO_SECONDS = float(os.getenv("MAX_AUDIO_SECONDS", "600"))
+# Segmented and job requests are meant for long recordings
+MAX_LONG_AUDIO_SECONDS = float(os.getenv("MAX_LONG_AUDIO_SECONDS", "14400"))
+MAX_LONG_UPLOAD_BYTES = int(os.getenv("MAX_LONG_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+
+# Bytes of the payload decoded to find and parse the first MPEG frame; a
+# file with junk before its first frame gets one more try with the larger size
+SNIFF_BYTES = (2048, 16384)
+
+_WHITESPACE = re.compile(r"\s")
+
+PayloadLimits = namedtuple("PayloadLimits", ["max_bytes", "max_seconds"])
+# What the header says about the clip; duration is None when it can't be estimated
+MP3Info = namedtuple("MP3Info", ["size", "offset", "sample_rate", "bitrate", "channels", "duration", "exact"])
+
+class PayloadError(ValueError):
+    """
+    Payload rejected before decoding. `reason` labels the metric, `status` is the HTTP code.
+    """
+    def __init__(self, message, reason, status=400):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+
+    def __reduce__(self):
+        # Raised in worker processes too
+        return PayloadError, (str(self), self.reason, self.status)
+
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1 Layer III
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),      # MPEG-2/2.5 Layer III
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def _frame_header(data, i):
+    """
+    (sample rate, kbps, channels, samples per frame, frame bytes, MPEG-1?) for
+    a Layer III frame header at data[i], or None if it isn't one.
+    """
+    if i + 4 > len(data) or data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[i + 1], data[i + 2], data[i + 3]
+    version = (b1 >> 3) & 3
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index == 15 or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    kbps = _BITRATES[1 if mpeg1 else 2][bitrate_index]
+    channels = 1 if b3 >> 6 == 3 else 2
+    samples = 1152 if mpeg1 else 576
+    # Free-format streams (kbps == 0) don't say how long a frame is
+    frame_bytes = (samples // 8 * kbps * 1000) // sample_rate + ((b2 >> 1) & 1) if kbps else 0
+    return sample_rate, kbps, channels, samples, frame_bytes, mpeg1
+
+def _vbr_frames(data, i, mpeg1, channels):
+    # Xing/Info (LAME) or VBRI (Fraunhofer) header in the first frame: exact frame count
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing = i + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 12:
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 1:
+            return struct.unpack(">I", data[xing + 8:xing + 12])[0]
+    vbri = i + 36
+    if data[vbri:vbri + 4] == b"VBRI" and len(data) >= vbri + 18:
+        return struct.unpack(">I", data[vbri + 14:vbri + 18])[0]
+    return None
+
+def id3_size(head):
+    """
+    Bytes taken by a leading ID3v2 tag (0 if there is none).
+    """
+    if len(head) < 10 or head[:3] != b"ID3":
+        return 0
+    size = (head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+def sniff_mp3(data, size, offset=0):
+    """
+    Parse the first MPEG Layer III frame of `data` (the payload bytes from
+    `offset` on, at least its first few KB) and estimate the duration of a
+    payload of `size` bytes without decoding any audio.
+    """
+    i = data.find(b"\xff")
+    while i != -1:
+        header = _frame_header(data, i)
+        if header is None:
+            i = data.find(b"\xff", i + 1)
+            continue
+        sample_rate, kbps, channels, samples, frame_bytes, mpeg1 = header
+        # A stray 0xFFE could be anything: require the next frame to follow
+        following = _frame_header(data, i + frame_bytes) if frame_bytes else None
+        if frame_bytes and following is None and i + frame_bytes + 4 <= len(data):
+            i = data.find(b"\xff", i + 1)
+            continue
+        frames = _vbr_frames(data, i, mpeg1, channels)
+        # An encoder's tag frame can have its own bitrate, so prefer the next frame's
+        rate = following[1] if following else kbps
+        if frames:
+            duration, exact = frames * samples / sample_rate, True
+        elif rate:
+            duration, exact = (size - offset - i) * 8 / (rate * 1000), False
+        else:
+            duration, exact = None, False
+        return MP3Info(size, offset + i, sample_rate, kbps, channels, duration, exact)
+    raise PayloadError("Audio is not a valid MP3 (no MPEG audio frame found)", "not_mp3")
+
+def check_limits(info, limits):
+    if info.size > limits.max_bytes:
+        raise PayloadError(f"Audio is {info.size} bytes, the limit is {limits.max_bytes}", "too_large", 413)
+    # A bitrate estimate can be far off (VBR without a Xing/VBRI header): only an
+    # exact frame count rejects here, estimates are enforced while decoding
+    if info.exact and info.duration > limits.max_seconds:
+        raise PayloadError(
+            f"Audio is about {info.duration:.0f}s long, the limit is {limits.max_seconds:.0f}s", "too_long", 413
+        )
+    return info
+
+def validate_mp3(audio_bytes, limits):
+    """
+    Cheap checks on raw MP3 bytes: size, MP3 framing and estimated duration.
+    """
+    size = len(audio_bytes)
+    if not size:
+        raise PayloadError("Empty audio", "empty")
+    if size > limits.max_bytes:
+        raise PayloadError(f"Audio is {size} bytes, the limit is {limits.max_bytes}", "too_large", 413)
+    offset = id3_size(audio_bytes[:10])
+    return check_limits(_sniff(lambda n: audio_bytes[offset:offset + n], size, offset), limits)
+
+def _sniff(read, size, offset):
+    for n in SNIFF_BYTES:
+        try:
+            return sniff_mp3(read(n), size, offset)
+        except PayloadError:
+            if offset + n >= size:
+                raise
+    raise PayloadError("Audio is not a valid MP3 (no MPEG audio frame found)", "not_mp3")
+
+def _b64_bytes(audio_base64, start, length):
+    # Decode only payload bytes [start, start + length): 4 base64 chars hold 3 bytes
+    first = start // 3 * 4
+    chunk = audio_base64[first:first + (length // 3 + 2) * 4].rstrip("=")
+    chunk += "=" * (-len(chunk) % 4)
+    try:
+        return base64.b64decode(chunk)[start % 3:start % 3 + length]
+    except (binascii.Error, ValueError) as e:
+        raise PayloadError(f"Failed to decode audio: {e}", "bad_base64")
+
+def validate_base64(audio_base64, limits):
+    """
+    validate_mp3 for a base64 payload, decoding only the few KB it needs
+    (the whole string is decoded later, once it is known to be worth it).
+    """
+    # Line-wrapped base64 decodes fine later, but the offsets below assume no whitespace
+    if _WHITESPACE.search(audio_base64):
+        audio_base64 = "".join(audio_base64.split())
+    # Size from the length alone; rstrip() would copy the whole string
+    padding = 2 - len(audio_base64[-2:].rstrip("=")) if len(audio_base64) >= 2 else 0
+    size = (len(audio_base64) - padding) * 3 // 4
+    if not size:
+        raise PayloadError("Empty audio", "empty")
+    if size > limits.max_bytes:
+        raise PayloadError(f"Audio is {size} bytes, the limit is {limits.max_bytes}", "too_large", 413)
+    offset = id3_size(_b64_bytes(audio_base64, 0, 10))
+    return check_limits(_sniff(lambda n: _b64_bytes(audio_base64, offset, n), size, offset), limits)
@@ -0,0 +1,167 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from core.timing import StageTimer, current_timer, TRACE_MEMORY, MEMORY_BUDGET_MB
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import tracemalloc
+
+# Processes running decode + features + predict
+DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", os.cpu_count() or 1))
+# Requests allowed to wait for a free worker before we start rejecting
+DETECTION_QUEUE_SIZE = int(os.getenv("DETECTION_QUEUE_SIZE", DETECTION_WORKERS * 4))
+# Value of the Retry-After header sent with 503 responses
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "2"))
+
+class PoolFullError(Exception):
+    """
+    Raised when the detection queue is at capacity.
+    """
+
+def _init_worker():
+    # Preload the classifier and warm up the feature path once per process
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    import numpy as np
+    from core.audio_utils import extract_features, FEATURE_SAMPLE_RATE
+    from core.detector import get_registry
+    try:
+        get_registry().get()
+    except FileNotFoundError:
+        print("Worker: model.pkl not found. Run train_model.py")
+    extract_features(np.zeros(FEATURE_SAMPLE_RATE, dtype=np.float32), FEATURE_SAMPLE_RATE)
+
+def _timed_call(fn, *args):
+    # Stages timed (and the peak memory traced) inside the worker travel back with the result
+    timer = StageTimer()
+    start = time.perf_counter()
+    with timer.activate(), timer.track_memory():
+        result = fn(*args)
+    if timer.over_budget:
+        print(f"Worker: {fn.__name__} peaked at {timer.peak_bytes / 1e6:.1f} MB "
+              f"(MEMORY_BUDGET_MB={MEMORY_BUDGET_MB:g})")
+    return result, time.perf_counter() - start, timer.stages, timer.peak_bytes
+
+class WorkerPool:
+    """
+    Bounded process pool for the CPU-bound detection pipeline.
+    At most max_workers jobs run and max_queue wait; anything beyond that
+    is rejected immediately so the API can answer 503 instead of queueing.
+    """
+    def __init__(self, max_workers=DETECTION_WORKERS, max_queue=DETECTION_QUEUE_SIZE):
+        self.max_workers = max(1, max_workers)
+        self.capacity = self.max_workers + max(0, max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._started = time.monotonic()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Never fork: the API process has Whisper/LID and executor threads running
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def start(self):
+        """
+        Spawn all workers now so the first requests don't pay for process start-up.
+        """
+        executor = self._get_executor()
+        for future in [executor.submit(os.getpid) for _ in range(self.max_workers)]:
+            future.result()
+
+    def check_capacity(self, n=1):
+        """
+        Fail fast before doing any work for a request that could not be queued.
+        """
+        with self._lock:
+            if self._in_flight + n > self.capacity:
+                self._rejected += n
+                raise PoolFullError(f"Detection queue is full ({self._in_flight}/{self.capacity})")
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise PoolFullError(f"Detection queue is full ({self._in_flight}/{self.capacity})")
+            self._in_flight += 1
+
+    def _on_done(self, future):
+        busy = 0.0
+        if not future.cancelled() and future.exception() is None:
+            busy = future.result()[1]
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._busy_seconds += busy
+
+    def submit(self, fn, *args):
+        """
+        Queue fn(*args) on a worker. Returns a future resolving to
+        (result, seconds, stage timings, peak traced bytes or None).
+        """
+        self._acquire()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool for the next request
+            with self._lock:
+                self._executor = None
+                self._in_flight -= 1
+            raise
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        # Release the slot when the worker finishes, even if the client went away
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, fn, *args):
+        try:
+            result, _, stages, peak_bytes = await asyncio.wrap_future(self.submit(fn, *args))
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise
+        timer = current_timer()
+        if timer is not None:
+            timer.merge(stages)
+            if peak_bytes is not None:
+                timer.add_peak(peak_bytes)
+        return result
+
+    def stats(self):
+        with self._lock:
+            in_flight = self._in_flight
+            uptime = time.monotonic() - self._started
+            return {
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "inFlight": in_flight,
+                "busyWorkers": min(in_flight, self.max_workers),
+                "queueDepth": max(0, in_flight - self.max_workers),
+                "utilization": round(self._busy_seconds / (self.max_workers * uptime), 4) if uptime > 0 else 0.0,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+_pool = None
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool()
+    return _pool
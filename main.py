@@ -1,10 +1,39 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Query, Header, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from models import VoiceDetectionRequest, VoiceDetectionResponse, ClassificationEnum
-from auth import get_api_key
-from core.detector import classify_voice 
+from models import VoiceDetectionRequest, VoiceDetectionResponse, ClassificationEnum, LanguageEnum
+from models import BatchVoiceDetectionRequest, BatchVoiceDetectionResponse, BatchItemResult
+from models import SegmentedVoiceDetectionRequest, SegmentedVoiceDetectionResponse
+from models import VoiceDetectionJobRequest, JobStatusResponse
+from auth import get_api_key, is_valid_api_key, key_limits, API_KEY_NAME
+from core.detector import classify_voice_versioned, classify_batch, classify_segments, predict_features, get_registry
+from core.cache import get_cache
+from core.jobs import get_job_store, get_job_runner
+from core.audio_utils import load_audio_features, feature_spec, feature_options
+from core.streaming import StreamingFeatures
+from core.timing import StageTimer, current_timer, stage
+from core.metrics import MetricsMiddleware, get_metrics
+from core.workers import get_pool, PoolFullError, RETRY_AFTER_SECONDS
+from core.validation import validate_base64, validate_mp3, PayloadError, PayloadLimits
+from core.validation import MAX_AUDIO_SECONDS, MAX_LONG_AUDIO_SECONDS, MAX_LONG_UPLOAD_BYTES
+from contextlib import contextmanager
+from typing import Optional
+import asyncio
+import json
+import numpy as np
+import os
 # from core.audio_utils import decode_base64_to_file
 
+# Largest accepted MP3 (bytes) for the synchronous endpoints, raw or base64; per key via API_KEY_LIMITS
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# Default seconds of streamed audio between partial verdicts on the WebSocket endpoint
+STREAM_INTERVAL_SECONDS = float(os.getenv("STREAM_INTERVAL_SECONDS", "2"))
+# Room for boundaries, part headers and small fields on top of the file in a multipart upload
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Seconds a stream opened without the x-api-key header has to send its auth message
+STREAM_AUTH_TIMEOUT_SECONDS = 10
+STREAM_ENCODINGS = {"pcm_s16le": (np.int16, 32768.0), "pcm_f32le": (np.float32, 1.0)}
+
 app = FastAPI(title="AI Voice Detection API")
 
 app.add_middleware(
@@ -13,9 +42,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the per-stage timings
+    expose_headers=["Server-Timing"],
 )
+# Per-stage timings: Server-Timing header on every response, histograms on /metrics
+app.add_middleware(MetricsMiddleware, metrics=get_metrics())
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -25,6 +58,7 @@ async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"status": "error", "message": str(exc.detail)},
+        headers=getattr(exc, "headers", None),
     )
 
 @app.exception_handler(RequestValidationError)
@@ -34,61 +68,100 @@ async def validation_exception_handler(request, exc):
         content={"status": "error", "message": "Invalid API key or malformed request"},
     )
 
-from core.lid import get_detector
-import os
-import base64
+from core.lid import get_detector, get_lid_service, LID_SAMPLE_RATE, LID_SCAN_SECONDS, MODEL_SIZE
+from core.audio_utils import DecodedAudio
 
 # Preload model on startup to prevent 502 Timeouts on first request
 @app.on_event("startup")
 async def startup_event():
     print("Startup: Pre-loading Whisper Model...")
     get_detector() # Triggers download/load
+    try:
+        get_registry().get() # Keep classifier in memory from the first request
+    except FileNotFoundError:
+        print("Startup: model.pkl not found. Run train_model.py")
+    get_pool().start() # Spawn detection workers (they preload the model)
+    get_job_runner().start() # Requeue jobs interrupted by the last shutdown, start job workers
     print("Startup: Model loaded. Ready for requests.")
 
-@app.post("/api/voice-detection", response_model=VoiceDetectionResponse)
-def detect_voice(request: VoiceDetectionRequest, api_key: str = Depends(get_api_key)):
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_pool().shutdown()
+    get_lid_service().shutdown()
+    get_job_runner().shutdown()
+
+def _busy_error(e):
+    return HTTPException(
+        status_code=503,
+        detail=f"Server busy: {e}",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+def _detect_language(audio):
+    # Runs on a LID replica thread: decodes 16 kHz PCM and runs Whisper on its speech
+    return get_detector().detect(audio.samples(LID_SAMPLE_RATE), audio.speech_intervals(LID_SAMPLE_RATE))
+
+async def _classify_decoded(pool, audio, language):
+    # Resampled for the model from the cached native decode while LID runs; the
+    # worker gets this PCM (pickling ~60 MB for 600 s costs far less than a second decode)
+    rate = _feature_spec()["sample_rate"]
+    await run_in_threadpool(audio.samples, rate)
+    return await pool.run(classify_voice_versioned, audio.copy(rates=(rate,)), language)
+
+def _detect_language_prefix(audio):
+    # Long recordings: decode only the start of the file instead of all of it
+    return get_detector().detect(audio.head(LID_SAMPLE_RATE, LID_SCAN_SECONDS))
+
+def _model_version():
     try:
-        # 1. Handle Language Detection (if missing)
-        final_language = request.language
-        
-        # Save temp file for processing (needed for LID and clean librosa loading)
-        temp_filename = "temp_request_audio.mp3"
-        # Fix incorrect Base64 padding if present
-        b64 = request.audioBase64
-        missing_padding = len(b64) % 4
-        if missing_padding:
-            b64 += '=' * (4 - missing_padding)
-
-        with open(temp_filename, "wb") as f:
-            f.write(base64.b64decode(b64))
-            
-        if not final_language:
-            print("Language not provided. Auto-detecting...")
-            detector = get_detector()
-            final_language = detector.detect(temp_filename)
-            print(f"Auto-detected Language: {final_language}")
-            
-            if final_language is None:
-                raise HTTPException(status_code=400, detail="Audio is not detectable")
+        return get_registry().get().version
+    except FileNotFoundError:
+        return None
+
+def _feature_spec():
+    # Features are computed the way the serving model was trained (rate, trimming, pitch)
+    try:
+        return get_registry().get().features
+    except FileNotFoundError:
+        return feature_spec()
+
+def _limits(api_key, long=False):
+    # Global defaults, overridden per key by API_KEY_LIMITS
+    overrides = key_limits(api_key)
+    if long:
+        return PayloadLimits(overrides.get("maxLongBytes", MAX_LONG_UPLOAD_BYTES),
+                             overrides.get("maxLongSeconds", MAX_LONG_AUDIO_SECONDS))
+    return PayloadLimits(overrides.get("maxBytes", MAX_UPLOAD_BYTES), overrides.get("maxSeconds", MAX_AUDIO_SECONDS))
+
+def _rejected(e):
+    get_metrics().payloads.inc(e.reason)
+    return e
 
-        # 2. Classify Voice
-        result = classify_voice(
-            base64_audio=request.audioBase64,
-            language=final_language
-        )
-        
-        # Cleanup
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        
-        return VoiceDetectionResponse(
-            status="success",
-            language=final_language,
-            classification=result["classification"],
-            confidenceScore=result["confidenceScore"],
-            explanation=result["explanation"]
-        )
+def _checked(validate, payload, limits):
+    # Header-only checks before any real decode; every outcome is counted
+    try:
+        with stage("validate"):
+            info = validate(payload, limits)
+    except PayloadError as e:
+        raise _rejected(e)
+    get_metrics().payloads.inc("accepted")
+    return info
+
+def _result_key(kind, audio, model_version):
+    # A hit skips the decode that enforces the duration limit, so results are kept per limit
+    return f"{kind}:{audio.digest}:{model_version}:{audio.max_seconds}"
 
+@contextmanager
+def _api_errors():
+    # Map pipeline exceptions onto the API's error responses
+    try:
+        yield
+    except HTTPException:
+        raise
+    except PoolFullError as e:
+        raise _busy_error(e)
+    except PayloadError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
     except ValueError as ve:
         # Client side error (bad base64 etc)
         raise HTTPException(status_code=400, detail=str(ve))
@@ -96,6 +169,407 @@ def detect_voice(request: VoiceDetectionRequest, api_key: str = Depends(get_api_
         # Internal processing error
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
+async def _detect(audio, language):
+    """
+    Shared pipeline for the JSON and raw upload endpoints.
+    LID (Whisper, in a thread) and classification (worker process) do not
+    depend on each other, so they run concurrently when both are needed.
+    """
+    pool = get_pool()
+    cache = get_cache()
+
+    # Repeat submissions of the same clip are answered from the cache
+    final_language = language or cache.get(f"lid:{audio.digest}:{MODEL_SIZE}")
+    model_version = _model_version()
+    result = cache.get(_result_key("cls", audio, model_version)) if model_version else None
+
+    stages = {}
+    # Reject straight away if no worker (or LID replica) could take this request
+    if result is None:
+        pool.check_capacity()
+    if not final_language:
+        get_lid_service().check_capacity()
+
+    shared = result is None and not final_language
+    if shared:
+        # Both need PCM from one MP3 decode: LID's 16 kHz buffer and speech mask come first
+        await run_in_threadpool(audio.speech_intervals, LID_SAMPLE_RATE)
+
+    if result is None:
+        # Classify Voice (features and predict on a worker process)
+        if shared:
+            stages["classify"] = _classify_decoded(pool, audio, final_language)
+        else:
+            stages["classify"] = pool.run(classify_voice_versioned, audio, final_language)
+    if not final_language:
+        print("Language not provided. Auto-detecting...")
+        stages["lid"] = get_lid_service().run(_detect_language, audio)
+
+    if stages:
+        timer = current_timer() or StageTimer()
+        outcomes = dict(zip(stages, await asyncio.gather(
+            *(timer.timed(name, job) for name, job in stages.items())
+        )))
+        print(f"Timing: {timer.summary()}")
+
+        if "classify" in outcomes:
+            result, model_version = outcomes["classify"]
+            if model_version:
+                cache.set(_result_key("cls", audio, model_version), result)
+        if "lid" in outcomes:
+            final_language = outcomes["lid"]
+            print(f"Auto-detected Language: {final_language}")
+            if final_language is None:
+                raise HTTPException(status_code=400, detail="Audio is not detectable")
+            cache.set(f"lid:{audio.digest}:{MODEL_SIZE}", final_language)
+
+    return VoiceDetectionResponse(
+        status="success",
+        language=final_language,
+        classification=result["classification"],
+        confidenceScore=result["confidenceScore"],
+        explanation=result["explanation"]
+    )
+
+@app.post("/api/voice-detection", response_model=VoiceDetectionResponse)
+async def detect_voice(request: VoiceDetectionRequest, api_key: str = Depends(get_api_key)):
+    with _api_errors():
+        limits = _limits(api_key)
+        _checked(validate_base64, request.audioBase64, limits)
+        # Decode once, in memory; LID and features share this object
+        audio = DecodedAudio.from_base64(request.audioBase64, limits.max_seconds)
+        return await _detect(audio, request.language)
+
+async def _read_body(request, max_bytes):
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            # Stop reading: the rest of an oversized upload is never buffered
+            raise _rejected(PayloadError("Audio file too large", "too_large", 413))
+    return body
+
+async def _read_upload(request, max_bytes):
+    # Multipart: take the "file" part; anything else: the raw body, streamed
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        return await _read_body(request, max_bytes)
+
+    # Capped like a raw upload before anything is parsed, then the form is read from the buffered body
+    body = bytes(await _read_body(request, max_bytes + MULTIPART_OVERHEAD_BYTES))
+    async def replay():
+        return {"type": "http.request", "body": body, "more_body": False}
+    form = await Request(request.scope, replay).form()
+    upload = form.get("file")
+    if upload is None or isinstance(upload, str):
+        raise HTTPException(status_code=400, detail="Multipart upload needs a 'file' part")
+    data = await upload.read()
+    if len(data) > max_bytes:
+        raise _rejected(PayloadError("Audio file too large", "too_large", 413))
+    return data
+
+@app.post("/api/voice-detection/upload", response_model=VoiceDetectionResponse)
+async def detect_voice_upload(
+    request: Request,
+    language: Optional[LanguageEnum] = Query(None),
+    x_language: Optional[LanguageEnum] = Header(None),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Same as /api/voice-detection, but the MP3 is sent as the raw request body
+    (application/octet-stream) or as a multipart "file" part, and the language
+    as the ?language= query parameter or the x-language header.
+    """
+    with _api_errors():
+        limits = _limits(api_key)
+        body = await _read_upload(request, limits.max_bytes)
+        if not body:
+            raise HTTPException(status_code=400, detail="Empty audio upload")
+        _checked(validate_mp3, body, limits)
+        return await _detect(DecodedAudio(body, max_seconds=limits.max_seconds), language or x_language)
+
+@app.post("/api/voice-detection/batch", response_model=BatchVoiceDetectionResponse)
+async def detect_voice_batch(request: BatchVoiceDetectionRequest, api_key: str = Depends(get_api_key)):
+    pool = get_pool()
+    try:
+        # The whole batch must fit in the queue, otherwise reject it up front
+        pool.check_capacity(len(request.items))
+    except PoolFullError as e:
+        raise _busy_error(e)
+
+    cache = get_cache()
+    # One registry snapshot: the features are extracted for the model that scores them
+    try:
+        model = get_registry().get()
+    except FileNotFoundError:
+        model = None
+    spec = model.features if model else feature_spec()
+    options = feature_options(spec)
+
+    results = [None] * len(request.items)
+    decoded = []
+
+    # 1. Decode per item and answer repeats from the cache; a bad item only fails itself
+    limits = _limits(api_key)
+    for index, item in enumerate(request.items):
+        try:
+            _checked(validate_base64, item.audioBase64, limits)
+            audio = DecodedAudio.from_base64(item.audioBase64, limits.max_seconds)
+            language = item.language or cache.get(f"lid:{audio.digest}:{MODEL_SIZE}")
+            result = cache.get(_result_key("cls", audio, model.version)) if model else None
+            decoded.append((index, audio, language, result))
+        except Exception as e:
+            results[index] = BatchItemResult(index=index, status="error", message=str(e))
+
+    # 2. Language ID for the items that need it, all submitted to the LID replicas at once
+    unknown = [(index, audio) for index, audio, language, _ in decoded if not language]
+    detected = []
+    if unknown:
+        with stage("lid"):
+            detected = await asyncio.gather(
+                *(get_lid_service().run(_detect_language, audio) for _, audio in unknown),
+                return_exceptions=True
+            )
+    languages = dict(zip((index for index, _ in unknown), detected))
+    pending = []
+    for index, audio, language, result in decoded:
+        language = languages.get(index, language)
+        if isinstance(language, Exception) or language is None:
+            message = str(language) if language is not None else "Audio is not detectable"
+            results[index] = BatchItemResult(index=index, status="error", message=message)
+            continue
+        if index in languages:
+            cache.set(f"lid:{audio.digest}:{MODEL_SIZE}", language)
+        if result is not None:
+            results[index] = BatchItemResult(index=index, status="success", language=language, **result)
+        else:
+            pending.append((index, audio, language))
+
+    # 3. Parallel feature extraction on the workers + one predict_proba for the whole batch
+    features = await asyncio.gather(
+        *(pool.run(load_audio_features, audio, spec["sample_rate"], options["trim"], options["pitch"])
+          for _, audio, _ in pending),
+        return_exceptions=True
+    )
+    outcomes = await run_in_threadpool(classify_batch, features, model)
+    for (index, audio, language), outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            results[index] = BatchItemResult(index=index, status="error", message=str(outcome))
+        else:
+            if model:
+                cache.set(_result_key("cls", audio, model.version), outcome)
+            results[index] = BatchItemResult(index=index, status="success", language=language, **outcome)
+
+    return BatchVoiceDetectionResponse(status="success", results=results)
+
+@app.post("/api/voice-detection/segmented", response_model=SegmentedVoiceDetectionResponse)
+async def detect_voice_segmented(request: SegmentedVoiceDetectionRequest, api_key: str = Depends(get_api_key)):
+    """
+    Long recordings: the audio is decoded as a stream and scored in fixed
+    windows; the verdict aggregates the per-window scores and every window's
+    timestamps and score are returned.
+    """
+    with _api_errors():
+        limits = _limits(api_key, long=True)
+        _checked(validate_base64, request.audioBase64, limits)
+        audio = DecodedAudio.from_base64(request.audioBase64, limits.max_seconds)
+        pool = get_pool()
+        cache = get_cache()
+        options = (request.windowSeconds, request.aggregate, request.earlyExitThreshold, request.earlyExitSegments)
+        cache_key = _result_key("seg", audio, _model_version()) + ":" + ":".join(map(str, options))
+
+        language = request.language or cache.get(f"lid:{audio.digest}:{MODEL_SIZE}")
+        result = cache.get(cache_key) if language else None
+        if result is None:
+            pool.check_capacity()
+            if not language:
+                with stage("lid"):
+                    language = await get_lid_service().run(_detect_language_prefix, audio)
+                if language is None:
+                    raise HTTPException(status_code=400, detail="Audio is not detectable")
+                cache.set(f"lid:{audio.digest}:{MODEL_SIZE}", language)
+
+            result, model_version = await pool.run(classify_segments, audio, *options)
+            cache.set(_result_key("seg", audio, model_version) + ":" + ":".join(map(str, options)), result)
+
+        return SegmentedVoiceDetectionResponse(status="success", language=language, **result)
+
+def _job_response(job):
+    return JobStatusResponse(
+        status="success",
+        jobId=job["id"],
+        state=job["state"],
+        createdAt=job["created"],
+        startedAt=job["started"],
+        finishedAt=job["finished"],
+        attempts=job["attempts"],
+        result=job["result"],
+        message=job["error"]
+    )
+
+@app.post("/api/voice-detection/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_job(request: VoiceDetectionJobRequest, response: Response, api_key: str = Depends(get_api_key)):
+    """
+    Queue a long recording and return immediately; poll the Location URL
+    for the result. mode "segmented" (default) takes the same options as
+    /segmented, "single" gives one verdict like /api/voice-detection.
+    """
+    with _api_errors():
+        limits = _limits(api_key, long=True)
+        if request.mode == "single":
+            # One verdict decodes the whole clip at once: only the short-clip duration limit applies
+            limits = limits._replace(max_seconds=_limits(api_key).max_seconds)
+        _checked(validate_base64, request.audioBase64, limits)
+        audio = DecodedAudio.from_base64(request.audioBase64, limits.max_seconds)
+        options = {
+            "windowSeconds": request.windowSeconds,
+            "aggregate": request.aggregate,
+            "earlyExitThreshold": request.earlyExitThreshold,
+            "earlyExitSegments": request.earlyExitSegments,
+            "maxSeconds": limits.max_seconds
+        }
+        language = request.language.value if request.language else None
+        store = get_job_store()
+        job_id = await run_in_threadpool(store.enqueue, audio.audio_bytes, language, request.mode, options)
+        response.headers["Location"] = f"/api/voice-detection/jobs/{job_id}"
+        return _job_response(await run_in_threadpool(store.get, job_id))
+
+@app.get("/api/voice-detection/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, api_key: str = Depends(get_api_key)):
+    job = await run_in_threadpool(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _job_response(job)
+
+def _stream_verdict(stream, status, language):
+    features = stream.features()
+    if features is None:
+        return None
+    result = predict_features([features])[0]
+    return {
+        "status": status,
+        "language": language,
+        "seconds": round(stream.seconds, 2),
+        "classification": result["classification"].value,
+        "confidenceScore": result["confidenceScore"],
+        "explanation": result["explanation"]
+    }
+
+async def _stream_auth(websocket):
+    """
+    Accepts the socket if it carries a valid API key: in the x-api-key header,
+    or, for clients that cannot set headers, in a first text message
+    {"event": "auth", "apiKey": ...}. Keys are never read from the URL, which
+    ends up in access logs.
+    """
+    header = websocket.headers.get(API_KEY_NAME)
+    if header is not None and not is_valid_api_key(header):
+        await websocket.close(code=1008, reason="Invalid API Key")
+        return False
+    await websocket.accept()
+    if header is not None:
+        return True
+
+    try:
+        message = await asyncio.wait_for(websocket.receive(), STREAM_AUTH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        message = {"type": "websocket.receive"}
+    if message["type"] == "websocket.disconnect":
+        return False
+    try:
+        auth = json.loads(message.get("text") or "{}")
+        api_key = auth.get("apiKey") if auth.get("event") == "auth" else None
+    except (ValueError, AttributeError):
+        api_key = None
+    if not is_valid_api_key(api_key):
+        await websocket.close(code=1008, reason="Invalid API Key")
+        return False
+    return True
+
+@app.websocket("/api/voice-detection/stream")
+async def detect_voice_stream(websocket: WebSocket):
+    """
+    Live detection. Query: language, sampleRate (default 16000),
+    encoding (pcm_s16le | pcm_f32le), interval (seconds between verdicts).
+    The key goes in the x-api-key header or a first auth message (see
+    _stream_auth). Binary messages carry mono PCM chunks; the text message {"event": "end"}
+    asks for the final verdict and closes the socket. Features are updated
+    incrementally, so each verdict only costs the newly received audio.
+    """
+    if not await _stream_auth(websocket):
+        return
+    params = websocket.query_params
+
+    try:
+        language = LanguageEnum(params["language"]).value if params.get("language") else None
+        sample_rate = int(params.get("sampleRate", "16000"))
+        dtype, scale = STREAM_ENCODINGS[params.get("encoding", "pcm_s16le")]
+        interval = max(0.5, float(params.get("interval", STREAM_INTERVAL_SECONDS)))
+        if sample_rate <= 0:
+            raise ValueError("sampleRate must be positive")
+    except (KeyError, ValueError) as e:
+        await websocket.send_json({"status": "error", "message": f"Invalid stream parameters: {e}"})
+        await websocket.close(code=1003)
+        return
+
+    spec = _feature_spec()
+    stream = StreamingFeatures(input_rate=sample_rate, sr=spec["sample_rate"], **feature_options(spec))
+    next_verdict = interval
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                data = message["bytes"]
+                usable = len(data) - len(data) % np.dtype(dtype).itemsize
+                chunk = np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) / scale
+                await run_in_threadpool(stream.add, chunk)
+                if stream.seconds >= next_verdict:
+                    verdict = await run_in_threadpool(_stream_verdict, stream, "partial", language)
+                    if verdict is not None:
+                        await websocket.send_json(verdict)
+                    while next_verdict <= stream.seconds:
+                        next_verdict += interval
+            elif message.get("text") is not None:
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except (ValueError, AttributeError):
+                    event = None
+                if event == "end":
+                    await run_in_threadpool(stream.finish)
+                    verdict = await run_in_threadpool(_stream_verdict, stream, "final", language)
+                    await websocket.send_json(verdict or {"status": "error", "message": "No audio received"})
+                    await websocket.close()
+                    return
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        print(f"Stream Error: {e}")
+        await websocket.send_json({"status": "error", "message": "Internal Server Error"})
+        await websocket.close(code=1011)
+
+@app.get("/api/status")
+def status(api_key: str = Depends(get_api_key)):
+    return {
+        "model": get_registry().info(),
+        "pool": get_pool().stats(),
+        "lid": get_lid_service().stats(),
+        "cache": get_cache().stats(),
+        "jobs": {**get_job_runner().stats(), **get_job_store().stats()}
+    }
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text format: request and per-stage latency histograms,
+    error, cache and rejection counters.
+    """
+    body = get_metrics().render(
+        cache=get_cache().stats(),
+        pools={"detection": get_pool().stats(), "lid": get_lid_service().stats()}
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def health_check():
     return {"status": "online", "message": "Voice Detection API is running"}
@@ -1,6 +1,12 @@
 from pydantic import BaseModel, Field
 from enum import Enum
-from typing import Optional
+from typing import List, Literal, Optional, Union
+import os
+
+# Upper bound on clips per /api/voice-detection/batch call
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "64"))
+# Default window length for /api/voice-detection/segmented
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", "10"))
 
 class LanguageEnum(str, Enum):
     Tamil = "Tamil"
@@ -24,3 +30,54 @@ class VoiceDetectionResponse(BaseModel):
     classification: ClassificationEnum
     confidenceScore: float
     explanation: str
+
+class BatchVoiceDetectionRequest(BaseModel):
+    items: List[VoiceDetectionRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str
+    language: Optional[str] = None
+    classification: Optional[ClassificationEnum] = None
+    confidenceScore: Optional[float] = None
+    explanation: Optional[str] = None
+    message: Optional[str] = None
+
+class BatchVoiceDetectionResponse(BaseModel):
+    status: str
+    results: List[BatchItemResult]
+
+class SegmentedVoiceDetectionRequest(VoiceDetectionRequest):
+    windowSeconds: float = Field(SEGMENT_SECONDS, ge=1.0, le=600.0)
+    # How per-window AI probabilities are combined into the verdict
+    aggregate: Literal["max", "mean"] = "max"
+    # Stop once this many windows reach earlyExitThreshold (AI probability)
+    earlyExitThreshold: Optional[float] = Field(None, ge=0.5, le=1.0)
+    earlyExitSegments: int = Field(1, ge=1)
+
+class SegmentScore(BaseModel):
+    start: float
+    end: float
+    classification: ClassificationEnum
+    confidenceScore: float
+
+class SegmentedVoiceDetectionResponse(VoiceDetectionResponse):
+    aggregate: str
+    analyzedSeconds: float
+    earlyExit: bool
+    segments: List[SegmentScore]
+
+class VoiceDetectionJobRequest(SegmentedVoiceDetectionRequest):
+    # "segmented": windowed scoring as in /segmented; "single": one verdict for the whole clip
+    mode: Literal["segmented", "single"] = "segmented"
+
+class JobStatusResponse(BaseModel):
+    status: str
+    jobId: str
+    state: Literal["queued", "running", "done", "failed"]
+    createdAt: float
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+    attempts: int = 0
+    result: Optional[Union[SegmentedVoiceDetectionResponse, VoiceDetectionResponse]] = None
+    message: Optional[str] = None
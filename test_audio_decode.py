@@ -0,0 +1,51 @@
+import base64
+import numpy as np
+import pytest
+from unittest.mock import patch
+from benchmarks.synth import encode_mp3
+from core.audio_utils import DecodedAudio, DECODERS, decode_base64_to_audio
+
+def _tone_mp3(seconds=1.0, sr=44100):
+    t = np.arange(int(seconds * sr)) / sr
+    return encode_mp3(0.3 * np.sin(2 * np.pi * 220 * t), sr)
+
+def test_decodes_at_each_rate_once():
+    audio = DecodedAudio(_tone_mp3())
+    with patch.object(DecodedAudio, "_decode", wraps=audio._decode) as decode:
+        y16 = audio.samples(16000)
+        y22 = audio.samples(22050)
+        assert audio.samples(16000) is y16
+    assert decode.call_count == 1
+    assert y16.dtype == np.float32 and y22.dtype == np.float32
+    assert abs(len(y16) / 16000 - 1.0) < 0.1
+    assert abs(len(y22) / 22050 - 1.0) < 0.1
+
+def test_fixes_base64_padding():
+    b64 = base64.b64encode(_tone_mp3()).decode().rstrip("=")
+    y, sr = decode_base64_to_audio(b64)
+    assert sr == 22050 and len(y) > 0
+
+def test_invalid_audio_raises_value_error():
+    for audio in (DecodedAudio(b"not an mp3"), DecodedAudio(b"")):
+        try:
+            audio.samples(22050)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+@pytest.mark.parametrize("backend", sorted(DECODERS))
+def test_backends_decode_to_target_rate(backend):
+    mp3 = _tone_mp3(2.0)
+    for sr in (16000, 22050):
+        y = DecodedAudio(mp3, backend=backend).samples(sr)
+        assert y.dtype == np.float32 and y.ndim == 1
+        assert abs(len(y) / sr - 2.0) < 0.1
+        # 220 Hz tone survives the resample
+        spectrum = np.abs(np.fft.rfft(y))
+        assert abs(np.argmax(spectrum) * sr / len(y) - 220) < 2
+    with pytest.raises(ValueError):
+        DecodedAudio(b"not an mp3", backend=backend).samples(16000)
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        DecodedAudio(b"", backend="nope")
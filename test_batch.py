@@ -0,0 +1,105 @@
+import asyncio
+import base64
+import joblib
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from fastapi.testclient import TestClient
+import core.detector
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.cache import ResultCache
+from core.detector import ModelRegistry
+from core.workers import WorkerPool
+from main import app
+from train_model import generate_synthetic_data
+
+client = TestClient(app)
+HEADERS = {"x-api-key": "sk_test_123456789"}
+
+@pytest.fixture(scope="module", autouse=True)
+def model(tmp_path_factory):
+    X, y = generate_synthetic_data(200)
+    model_path = tmp_path_factory.mktemp("model") / "model.pkl"
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), model_path)
+
+    patch = pytest.MonkeyPatch()
+    patch.setenv("MODEL_PATH", str(model_path))
+    patch.setattr(core.detector, "_registry", ModelRegistry(str(model_path)))
+    # Fresh workers so they pick up this model, not one loaded by another test
+    pool = WorkerPool(max_workers=2)
+    patch.setattr(main, "get_pool", lambda: pool)
+    yield
+    pool.shutdown()
+    patch.undo()
+
+def _item(seconds, language="English", **kwargs):
+    audio = encode_mp3(speech_like(seconds, **kwargs))
+    return {"language": language, "audioFormat": "mp3", "audioBase64": base64.b64encode(audio).decode()}
+
+def test_batch_results_in_order_with_isolated_errors():
+    items = [
+        _item(3.0, seed=1),
+        {"language": "English", "audioFormat": "mp3", "audioBase64": "bm90IGFuIG1wMw=="},
+        _item(2.0, language="Tamil", seed=2, pitch_jitter=1.0, pause_ratio=0.0),
+    ]
+    response = client.post("/api/voice-detection/batch", headers=HEADERS, json={"items": items})
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["status"] for r in results] == ["success", "error", "success"]
+    assert results[1]["message"]
+    assert results[2]["language"] == "Tamil"
+    for r in (results[0], results[2]):
+        assert r["classification"] in ["HUMAN", "AI_GENERATED"]
+        assert 0.0 <= r["confidenceScore"] <= 1.0
+
+def test_batch_matches_single_classification():
+    item = _item(3.0, seed=4)
+    single = client.post("/api/voice-detection", headers=HEADERS, json=item).json()
+    batch = client.post("/api/voice-detection/batch", headers=HEADERS, json={"items": [item]}).json()
+    assert batch["results"][0]["classification"] == single["classification"]
+    assert batch["results"][0]["confidenceScore"] == single["confidenceScore"]
+
+def test_empty_batch_rejected():
+    response = client.post("/api/voice-detection/batch", headers=HEADERS, json={"items": []})
+    assert response.status_code == 400
+
+class FakeLidService:
+    """Async LID stand-in that records how many calls were in flight at once."""
+    def __init__(self):
+        self.calls = self.active = self.peak = 0
+    async def run(self, fn, audio):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return "Hindi"
+
+class CountingPool:
+    def __init__(self, pool):
+        self.pool, self.calls = pool, 0
+    def check_capacity(self, n=1):
+        self.pool.check_capacity(n)
+    async def run(self, fn, *args):
+        self.calls += 1
+        return await self.pool.run(fn, *args)
+
+def test_batch_lid_concurrent_and_cached(monkeypatch):
+    lid = FakeLidService()
+    pool = CountingPool(main.get_pool())
+    monkeypatch.setattr(main, "get_lid_service", lambda: lid)
+    monkeypatch.setattr(main, "get_pool", lambda: pool)
+    cache = ResultCache()
+    monkeypatch.setattr(main, "get_cache", lambda: cache)
+    items = [_item(1.0, language=None, seed=seed) for seed in (5, 6, 7)]
+
+    first = client.post("/api/voice-detection/batch", headers=HEADERS, json={"items": items}).json()["results"]
+    assert [r["language"] for r in first] == ["Hindi"] * 3
+    assert lid.peak == 3 and pool.calls == 3
+
+    # Repeats are answered from the result and LID caches, like the single endpoint
+    again = client.post("/api/voice-detection/batch", headers=HEADERS, json={"items": items}).json()["results"]
+    assert again == first
+    assert lid.calls == 3 and pool.calls == 3
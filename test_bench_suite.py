@@ -0,0 +1,15 @@
+from benchmarks.suite import compare, make_clips
+
+def _report(**medians):
+    return {"results": {name: {"median_ms": ms} for name, ms in medians.items()}}
+
+def test_clips_are_deterministic():
+    assert make_clips([1]) == make_clips([1])
+    assert sorted(make_clips([1, 2])) == ["flat-1s", "flat-2s", "natural-1s", "natural-2s"]
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = _report(decode=10.0, features=20.0, tiny=0.2, dropped=5.0)
+    current = _report(decode=12.0, features=21.0, tiny=0.4, added=1.0)
+    rows = {name: regressed for name, _, _, _, regressed in compare(current, baseline, tolerance=0.15)}
+    # 20% slower is flagged; 5% is within tolerance; 0.2 ms is below the noise floor
+    assert rows == {"decode": True, "features": False, "tiny": False}
@@ -0,0 +1,66 @@
+import base64
+from fastapi.testclient import TestClient
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.cache import ResultCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 3 and stats["misses"] == 1
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResultCache(max_entries=10, ttl=5, clock=clock)
+    cache.set("a", {"x": 1})
+    clock.now += 4
+    assert cache.get("a") == {"x": 1}
+    clock.now += 2
+    assert cache.get("a") is None
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ResultCache(db_path=db_path).set("k", {"classification": "HUMAN"})
+    cache = ResultCache(db_path=db_path)
+    assert cache.get("k") == {"classification": "HUMAN"}
+    assert cache.stats()["diskHits"] == 1
+    assert cache.get("k") == {"classification": "HUMAN"}
+    assert cache.stats()["hits"] == 1
+
+def test_repeat_submission_served_from_cache(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(main, "get_cache", lambda: cache)
+    monkeypatch.setattr(main, "_model_version", lambda: "v1")
+    calls = []
+
+    class CountingPool:
+        def check_capacity(self, n=1):
+            pass
+        async def run(self, fn, *args):
+            calls.append(fn)
+            return {"classification": "AI_GENERATED", "confidenceScore": 0.9, "explanation": "x"}, "v1"
+
+    monkeypatch.setattr(main, "get_pool", lambda: CountingPool())
+    client = TestClient(main.app)
+    payload = {
+        "language": "English",
+        "audioFormat": "mp3",
+        "audioBase64": base64.b64encode(encode_mp3(speech_like(1.0))).decode()
+    }
+    first = client.post("/api/voice-detection", headers={"x-api-key": "sk_test_123456789"}, json=payload)
+    second = client.post("/api/voice-detection", headers={"x-api-key": "sk_test_123456789"}, json=payload)
+    assert first.json() == second.json()
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
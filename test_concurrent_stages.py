@@ -0,0 +1,92 @@
+import asyncio
+import pickle
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio
+from core.cache import ResultCache
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+MP3 = encode_mp3(speech_like(1.0))
+STAGE_SECONDS = 0.4
+
+class SlowPool:
+    def __init__(self):
+        self.calls = 0
+        self.spans = []
+    def check_capacity(self, n=1):
+        pass
+    async def run(self, fn, audio, language):
+        self.calls += 1
+        start = time.perf_counter()
+        await asyncio.sleep(STAGE_SECONDS)
+        self.spans.append((start, time.perf_counter()))
+        return {"classification": "HUMAN", "confidenceScore": 0.8, "explanation": "x"}, "v1"
+
+@pytest.fixture
+def stages(monkeypatch):
+    pool = SlowPool()
+    lid_calls = []
+    def slow_lid(audio):
+        start = time.perf_counter()
+        time.sleep(STAGE_SECONDS)
+        lid_calls.append((start, time.perf_counter()))
+        return "Tamil"
+    monkeypatch.setattr(main, "get_pool", lambda: pool)
+    monkeypatch.setattr(main, "_detect_language", slow_lid)
+    monkeypatch.setattr(main, "_model_version", lambda: "v1")
+    cache = ResultCache()
+    monkeypatch.setattr(main, "get_cache", lambda: cache)
+    return pool, lid_calls
+
+def _post(language=None):
+    query = f"?language={language}" if language else ""
+    return TestClient(main.app).post(
+        "/api/voice-detection/upload" + query,
+        headers={**HEADERS, "content-type": "application/octet-stream"}, content=MP3
+    )
+
+def test_lid_and_classification_overlap(stages):
+    pool, lid_calls = stages
+    response = _post()
+    assert response.status_code == 200
+    assert response.json()["language"] == "Tamil"
+    assert pool.calls == 1 and len(lid_calls) == 1
+    # The decode up front is not part of either stage; the stages themselves run side by side
+    (lid_start, lid_end), (pool_start, pool_end) = lid_calls[0], pool.spans[0]
+    assert max(lid_end, pool_end) - min(lid_start, pool_start) < 1.75 * STAGE_SECONDS
+
+def test_supplied_language_skips_lid(stages):
+    pool, lid_calls = stages
+    assert _post("Hindi").json()["language"] == "Hindi"
+    assert pool.calls == 1 and lid_calls == []
+
+def test_cached_classification_only_runs_lid(stages):
+    pool, lid_calls = stages
+    _post("Hindi")
+    assert _post().json()["language"] == "Tamil"
+    assert pool.calls == 1 and len(lid_calls) == 1
+
+class PicklingPool(SlowPool):
+    """Ships the audio the way a worker process gets it and decodes at the model's rate."""
+    async def run(self, fn, audio, language):
+        audio = pickle.loads(pickle.dumps(audio))
+        audio.samples(main._feature_spec()["sample_rate"])
+        return await super().run(fn, audio, language)
+
+def test_lid_and_worker_share_one_decode(monkeypatch):
+    decodes = []
+    iter_pcm = DecodedAudio._iter_pcm
+    monkeypatch.setattr(DecodedAudio, "_iter_pcm", lambda self, *args: decodes.append(args) or iter_pcm(self, *args))
+    def lid(audio):
+        audio.speech_intervals(main.LID_SAMPLE_RATE)
+        return "Tamil"
+    monkeypatch.setattr(main, "get_pool", lambda: PicklingPool())
+    monkeypatch.setattr(main, "_detect_language", lid)
+    monkeypatch.setattr(main, "get_cache", lambda: ResultCache())
+    response = _post()
+    assert response.status_code == 200
+    assert response.json()["language"] == "Tamil"
+    assert len(decodes) == 1
@@ -0,0 +1,69 @@
+import glob
+import os
+import numpy as np
+import soundfile as sf
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features, feature_spec
+from core.detector import FEATURE_ORDER
+from core.feature_store import FeatureStore, extract_dataset
+from train_model import load_real_data
+
+SR = 16000
+
+def _dataset(root, n=5):
+    audio_dir = root / "LA" / "ASVspoof2019_LA_train" / "flac"
+    protocol_dir = root / "LA" / "ASVspoof2019_LA_cm_protocols"
+    audio_dir.mkdir(parents=True)
+    protocol_dir.mkdir(parents=True)
+    lines = []
+    for i in range(n):
+        name = f"LA_T_{i:07d}"
+        sf.write(audio_dir / f"{name}.flac", speech_like(1.0, sr=SR, seed=i), SR)
+        lines.append(f"LA_0079 {name} - - {'bonafide' if i % 2 else 'spoof'}")
+    (protocol_dir / "ASVspoof2019.LA.cm.train.trn.txt").write_text("\n".join(lines) + "\n")
+    (audio_dir / "broken.flac").write_bytes(b"not audio")
+    return sorted(glob.glob(str(audio_dir / "*.flac")))
+
+def test_extracts_in_parallel_and_reuses_cache(tmp_path, capsys):
+    paths = _dataset(tmp_path / "data")
+    store = FeatureStore(str(tmp_path / "cache"), feature_spec(SR, trim=True))
+    X = extract_dataset(paths, store, FEATURE_ORDER, workers=2, chunk_size=2)
+
+    y, _ = sf.read(paths[1], dtype="float32")
+    expected = extract_features(y, SR, trim=True)
+    assert np.allclose(X[1], [expected[name] for name in FEATURE_ORDER], rtol=1e-4)
+    # The unreadable file is cached as a NaN row
+    assert os.path.basename(paths[-1]) == "broken.flac"
+    assert np.isnan(X[-1]).all() and not np.isnan(X[:-1]).any()
+
+    # A fresh store (new run) memory-maps the chunks and extracts nothing
+    capsys.readouterr()
+    reopened = FeatureStore(str(tmp_path / "cache"), feature_spec(SR, trim=True))
+    assert isinstance(reopened.get(FeatureStore.key(paths[0])), np.memmap)
+    again = extract_dataset(paths, reopened, FEATURE_ORDER, workers=2)
+    assert "6 cached, 0 to extract" in capsys.readouterr().out
+    assert np.array_equal(np.nan_to_num(again), np.nan_to_num(X))
+
+def test_resumes_and_invalidates(tmp_path, capsys):
+    paths = _dataset(tmp_path / "data")
+    cache = str(tmp_path / "cache")
+    extract_dataset(paths, FeatureStore(cache, feature_spec(SR)), FEATURE_ORDER, workers=1, chunk_size=2)
+
+    # Interrupted run: the last chunk's key list never made it to disk
+    last_keys = sorted(glob.glob(os.path.join(cache, "*", "chunk-*.json")))[-1]
+    os.remove(last_keys)
+    # A modified file is extracted again
+    os.utime(paths[0], ns=(0, 0))
+
+    capsys.readouterr()
+    extract_dataset(paths, FeatureStore(cache, feature_spec(SR)), FEATURE_ORDER, workers=1)
+    assert "3 cached, 3 to extract" in capsys.readouterr().out
+
+    # Another feature spec never sees these rows
+    assert len(FeatureStore(cache, feature_spec(22050))) == 0
+
+def test_load_real_data_uses_store(tmp_path):
+    _dataset(tmp_path / "data")
+    X, y = load_real_data(str(tmp_path / "data"), sr=SR, workers=1, cache_dir=str(tmp_path / "cache"))
+    assert X.shape == (5, len(FEATURE_ORDER))
+    assert sorted(set(y)) == ["AI_GENERATED", "HUMAN"]
@@ -0,0 +1,28 @@
+import numpy as np
+from benchmarks.reference import reference_features
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features
+
+def _assert_parity(y, sr, trim=False):
+    expected = reference_features(y, sr, trim=trim)
+    actual = extract_features(y, sr, trim=trim)
+    for name, value in expected.items():
+        assert np.isclose(actual[name], float(value), rtol=1e-4, atol=1e-6), (name, actual[name], value)
+
+def test_parity_human_like():
+    for sr in (22050, 16000):
+        _assert_parity(speech_like(3.0, sr=sr, seed=1), sr)
+
+def test_parity_flat_continuous():
+    y = speech_like(5.0, seed=2, pitch_jitter=1.0, pause_ratio=0.0, noise=0.0005)
+    _assert_parity(y, 22050)
+
+def test_parity_short_and_silent():
+    _assert_parity(speech_like(0.05, seed=3), 22050)
+    _assert_parity(np.zeros(22050, dtype=np.float32), 22050)
+
+def test_parity_trimmed():
+    y = speech_like(3.0, seed=4, pause_ratio=0.4)
+    y = np.concatenate([np.zeros(11025, dtype=np.float32), y, np.zeros(22050, dtype=np.float32)])
+    _assert_parity(y, 22050, trim=True)
+    _assert_parity(speech_like(3.0, sr=16000, seed=1), 16000, trim=True)
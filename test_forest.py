@@ -0,0 +1,67 @@
+import os
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+import core.detector
+from core.audio_utils import feature_spec
+from core.detector import ModelRegistry, save_model, forest_dir
+from core.forest import CompiledForest
+
+def _forest(n_estimators=30, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.rand(2000, 5)
+    y = np.where(X[:, 0] + 0.4 * rng.rand(2000) > 0.7, "HUMAN", "AI_GENERATED")
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+
+def test_bit_identical_to_sklearn():
+    clf = _forest()
+    forest = CompiledForest.from_sklearn(clf)
+    rng = np.random.RandomState(1)
+    X = rng.rand(3000, 5)
+    # Values sitting exactly on split thresholds take the same branch
+    X[:200, 0] = forest.threshold[:200]
+    X[200:400, 1] = np.nextafter(forest.threshold[200:400], 1)
+
+    assert np.array_equal(forest.predict_proba(X), clf.predict_proba(X))
+    assert np.array_equal(forest.predict_proba(X[:1]), clf.predict_proba(X[:1]))
+    assert np.array_equal(forest.predict(X), clf.predict(X))
+    assert list(forest.classes_) == list(clf.classes_)
+
+def test_save_and_load_round_trip(tmp_path):
+    clf = _forest(n_estimators=5)
+    CompiledForest.from_sklearn(clf).save(str(tmp_path / "forest"), {"model_version": "abc"})
+    loaded = CompiledForest.load(str(tmp_path / "forest"), mmap_mode="r")
+    X = np.random.RandomState(2).rand(50, 5)
+    assert np.array_equal(loaded.predict_proba(X), clf.predict_proba(X))
+    assert loaded.meta["model_version"] == "abc"
+
+def test_registry_serves_matching_export(tmp_path):
+    model_path = str(tmp_path / "model.pkl")
+    first = save_model(_forest(n_estimators=5), model_path)
+    registry = ModelRegistry(model_path, check_interval=0)
+    model = registry.get()
+    assert model.version == first
+    assert isinstance(model.clf, CompiledForest)
+    assert registry.info()["compiled"]
+
+    # Retraining replaces the export; the old one is removed
+    second = save_model(_forest(n_estimators=5, seed=3), model_path)
+    assert registry.get().version == second
+    assert os.listdir(model_path + ".forest") == [second]
+
+    # Without an export the sklearn model is served
+    os.rename(forest_dir(model_path, second), str(tmp_path / "moved"))
+    assert not isinstance(ModelRegistry(model_path).get().clf, CompiledForest)
+
+def test_export_is_memory_mapped_without_unpickling(tmp_path, monkeypatch):
+    model_path = str(tmp_path / "model.pkl")
+    clf = _forest(n_estimators=5)
+    save_model(clf, model_path)
+
+    def no_unpickle(*args, **kwargs):
+        raise AssertionError("model.pkl should not be unpickled")
+    monkeypatch.setattr(core.detector.joblib, "load", no_unpickle)
+    model = ModelRegistry(model_path).get()
+    assert isinstance(model.clf.threshold, np.memmap)
+    assert model.features["sample_rate"] == feature_spec()["sample_rate"]
+    X = np.random.RandomState(4).rand(20, 5)
+    assert np.array_equal(model.clf.predict_proba(X), clf.predict_proba(X))
@@ -0,0 +1,147 @@
+import base64
+import os
+import socket
+import subprocess
+import time
+import pytest
+import auth
+import core.jobs
+from fastapi.testclient import TestClient
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.jobs import JobStore, JobRunner, run_once
+from core.workers import PoolFullError
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+MP3 = encode_mp3(speech_like(3.0))
+needs_model = pytest.mark.skipif(not os.path.exists("model.pkl"), reason="needs a trained model.pkl")
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def test_lifecycle_and_expiry(tmp_path):
+    clock = Clock()
+    store = JobStore(str(tmp_path / "jobs.db"), result_ttl=60, clock=clock)
+    job_id = store.enqueue(b"mp3", "Tamil", "single", {"windowSeconds": 10})
+    assert store.get(job_id)["state"] == "queued"
+
+    job = store.claim("w1")
+    assert job["id"] == job_id and job["audio"] == b"mp3" and job["attempts"] == 1
+    assert store.claim("w2") is None
+    # Only the owner can finish it
+    assert not store.complete(job_id, "w2", {"x": 1})
+    assert store.complete(job_id, "w1", {"x": 1})
+    assert store.get(job_id)["result"] == {"x": 1}
+
+    clock.now += 61
+    assert store.get(job_id) is None
+    assert store.purge_expired() == 1
+
+def test_queue_bound(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), max_queued=1)
+    store.enqueue(b"a")
+    with pytest.raises(PoolFullError):
+        store.enqueue(b"b")
+
+def test_recover_requeues_dead_workers_and_gives_up_eventually(tmp_path):
+    clock = Clock()
+    store = JobStore(str(tmp_path / "jobs.db"), timeout=100, max_attempts=2, clock=clock)
+    job_id = store.enqueue(b"mp3")
+    store.claim("w1")
+    # Live worker within its lease keeps the job
+    assert store.recover(alive=lambda w: True) == 0
+    # Dead worker: back in the queue
+    assert store.recover(alive=lambda w: False) == 1
+    assert store.get(job_id)["state"] == "queued"
+
+    store.claim("w2")
+    clock.now += 101  # lease ran out
+    assert store.recover(alive=lambda w: True) == 0
+    job = store.get(job_id)
+    assert job["state"] == "failed" and "2 attempts" in job["error"]
+
+def test_heartbeat_keeps_long_jobs_leased(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.db"), timeout=0.3)
+    job_id = store.enqueue(b"mp3", "Tamil", "single", {})
+    recovered = []
+    def slow_job(job):
+        # Runs well past the lease; the heartbeat must keep extending it
+        time.sleep(1.0)
+        recovered.append(store.recover(alive=lambda w: True))
+        return {"status": "success"}
+    monkeypatch.setattr(core.jobs, "process_job", slow_job)
+    assert run_once(store, "w1")
+    assert recovered == [0]
+    assert store.get(job_id)["state"] == "done"
+
+@needs_model
+def test_submit_and_poll(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(main, "get_job_store", lambda: store)
+    client = TestClient(main.app)
+    payload = {"language": "Tamil", "audioFormat": "mp3", "audioBase64": base64.b64encode(MP3).decode(),
+               "windowSeconds": 1}
+    response = client.post("/api/voice-detection/jobs", headers=HEADERS, json=payload)
+    assert response.status_code == 202
+    assert response.json()["state"] == "queued"
+    location = response.headers["location"]
+
+    assert run_once(store)
+    body = client.get(location, headers=HEADERS).json()
+    assert body["state"] == "done"
+    assert body["result"]["language"] == "Tamil"
+    assert len(body["result"]["segments"]) == 3
+
+    assert client.get("/api/voice-detection/jobs/unknown", headers=HEADERS).status_code == 404
+
+def test_single_mode_keeps_the_short_duration_limit(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(main, "get_job_store", lambda: store)
+    monkeypatch.setattr(auth, "API_KEY_LIMITS", {"sk_test_123456789": {"maxSeconds": 2}})
+    client = TestClient(main.app)
+    payload = {"language": "Tamil", "audioFormat": "mp3", "audioBase64": base64.b64encode(MP3).decode(), "mode": "single"}
+    response = client.post("/api/voice-detection/jobs", headers=HEADERS, json=payload)
+    assert response.status_code == 413
+    assert "limit is 2s" in response.json()["message"]
+    # The same clip is fine as a segmented job, which streams the recording
+    payload["mode"] = "segmented"
+    assert client.post("/api/voice-detection/jobs", headers=HEADERS, json=payload).status_code == 202
+
+    # A single job whose duration was only estimated stops decoding at the limit
+    cbr = MP3.replace(b"Info", b"none", 1).replace(b"Xing", b"none", 1)
+    store = JobStore(str(tmp_path / "single.db"))
+    job_id = store.enqueue(cbr, "Tamil", "single", {"maxSeconds": 2})
+    assert run_once(store)
+    job = store.get(job_id)
+    assert job["state"] == "failed" and "limit of 2s" in job["error"]
+
+def test_bad_audio_fails_the_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.enqueue(b"not an mp3", "Tamil", "single", {})
+    assert run_once(store)
+    job = store.get(job_id)
+    assert job["state"] == "failed" and job["error"]
+
+@needs_model
+def test_worker_process_picks_up_recovered_job(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    store = JobStore(db_path)
+    job_id = store.enqueue(MP3, "Hindi", "single", {})
+    # Left "running" by a worker that no longer exists (e.g. before a restart)
+    dead = subprocess.Popen(["true"])
+    dead.wait()
+    store.claim(f"{socket.gethostname()}:{dead.pid}")
+    runner = JobRunner(db_path, workers=1, poll_interval=0.05)
+    runner.start()
+    try:
+        deadline = time.time() + 60
+        while store.get(job_id)["state"] != "done" and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        runner.shutdown()
+    job = store.get(job_id)
+    assert job["state"] == "done" and job["attempts"] == 2
+    assert job["result"]["classification"] in ("HUMAN", "AI_GENERATED")
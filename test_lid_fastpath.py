@@ -0,0 +1,40 @@
+import numpy as np
+import core.lid
+from core.lid import LanguageDetector, voiced_prefix, LID_SAMPLE_RATE
+
+def _speech_with_silence():
+    sr = LID_SAMPLE_RATE
+    t = np.arange(sr) / sr
+    tone = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+    silence = np.zeros(2 * sr, dtype=np.float32)
+    return np.concatenate([silence, tone, silence, tone, silence])
+
+class FakeWhisper:
+    def __init__(self):
+        self.seen = None
+    def feature_extractor(self, audio):
+        self.seen = audio
+        return np.zeros((80, len(audio) // 160), dtype=np.float32)
+    def detect_language(self, features=None):
+        return "ta", 0.9, [("ta", 0.9)]
+    def transcribe(self, audio, beam_size=1):
+        raise AssertionError("fast path must not transcribe")
+
+def test_voiced_prefix_drops_silence_and_caps_length():
+    audio = _speech_with_silence()
+    voiced = voiced_prefix(audio, seconds=30)
+    # Two 1s tones (plus frame-edge padding) instead of 8s of input
+    assert 1.9 * LID_SAMPLE_RATE < len(voiced) < 2.6 * LID_SAMPLE_RATE
+    assert len(voiced_prefix(audio, seconds=0.5)) == LID_SAMPLE_RATE // 2
+
+def test_detect_runs_language_pass_on_voiced_audio(monkeypatch):
+    fake = FakeWhisper()
+    monkeypatch.setattr(core.lid, "_model", fake)
+    monkeypatch.setattr(core.lid, "LID_MODE", "detect")
+    assert LanguageDetector().detect(_speech_with_silence()) == "Tamil"
+    assert len(fake.seen) < 3 * LID_SAMPLE_RATE
+
+def test_empty_audio_is_not_detectable(monkeypatch):
+    monkeypatch.setattr(core.lid, "_model", FakeWhisper())
+    monkeypatch.setattr(core.lid, "LID_MODE", "detect")
+    assert LanguageDetector().detect(np.zeros(0, dtype=np.float32)) is None
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import time
+import pytest
+from core.lid import LidService
+from core.workers import PoolFullError
+
+def test_replicas_run_in_parallel():
+    service = LidService(replicas=2, max_queue=0)
+    start = time.perf_counter()
+    futures = [service.submit(time.sleep, 0.3) for _ in range(2)]
+    for f in futures:
+        f.result()
+    assert time.perf_counter() - start < 0.5
+    service.shutdown()
+
+def test_full_queue_rejects():
+    service = LidService(replicas=1, max_queue=1)
+    gate = threading.Event()
+    running = [service.submit(gate.wait) for _ in range(2)]
+    with pytest.raises(PoolFullError):
+        service.submit(gate.wait)
+    with pytest.raises(PoolFullError):
+        service.check_capacity()
+    assert service.stats()["queueDepth"] == 1
+    gate.set()
+    for f in running:
+        f.result()
+    stats = service.stats()
+    assert stats["rejected"] == 2 and stats["completed"] == 2 and stats["inFlight"] == 0
+    service.shutdown()
+
+def test_throughput_per_replica():
+    service = LidService(replicas=1, max_queue=4)
+    async def run_all():
+        return await asyncio.gather(*(service.run(lambda: time.sleep(0.05) or "Tamil") for _ in range(4)))
+    assert asyncio.run(run_all()) == ["Tamil"] * 4
+    # ~20 calls per busy second
+    assert 10 < service.stats()["throughputPerReplica"] <= 20
+    service.shutdown()
@@ -0,0 +1,59 @@
+import asyncio
+import json
+import os
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from benchmarks.loadgen import load_jsonl, process_rss_mb, run_load
+
+def _stub_app(delay, fail_every=0):
+    app = FastAPI()
+    state = {"in_flight": 0, "peak": 0, "count": 0}
+
+    @app.post("/api/voice-detection")
+    async def detect(body: dict):
+        state["count"] += 1
+        n = state["count"]
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(delay)
+        state["in_flight"] -= 1
+        if fail_every and n % fail_every == 0:
+            return JSONResponse({"status": "error"}, status_code=503)
+        return {"status": "success"}
+    return app, state
+
+def _run(app, **kwargs):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await run_load(client, [("/api/voice-detection", {"audioBase64": "x"}, None)], **kwargs)
+    return asyncio.run(go())
+
+def test_concurrency_limits_requests_in_flight():
+    app, state = _stub_app(0.05, fail_every=4)
+    report = _run(app, concurrency=3, requests=12)
+    assert report["requests"] == 12 and state["peak"] == 3
+    assert report["statuses"] == {"200": 9, "503": 3}
+    assert report["errorRate"] == 0.25
+    assert report["latencyMs"]["p50"] >= 50
+
+def test_rate_mode_follows_the_schedule():
+    app, state = _stub_app(0.2)
+    report = _run(app, rate=50, requests=10)
+    # Open loop: requests overlap instead of waiting for each other
+    assert report["requests"] == 10 and state["peak"] > 1
+    assert report["seconds"] < 0.2 * 10
+
+def test_jsonl_skips_lines_without_audio(tmp_path):
+    path = tmp_path / "captured.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"language": "Tamil", "audioFormat": "mp3", "audioBase64": "AAAA"}),
+        json.dumps({"request_id": "x", "title": "not a payload"}),
+        json.dumps({"endpoint": "/api/voice-detection/batch", "body": {"items": [{"audioBase64": "AAAA"}]}}),
+    ]))
+    payloads = load_jsonl(str(path))
+    assert [endpoint for endpoint, _, _ in payloads] == ["/api/voice-detection", "/api/voice-detection/batch"]
+
+def test_rss_includes_own_process():
+    assert process_rss_mb(os.getpid()) > 10
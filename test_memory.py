@@ -0,0 +1,99 @@
+import threading
+import tracemalloc
+import librosa
+import numpy as np
+import pytest
+import core.audio_utils
+import core.timing
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features, speech_frames, get_scratch, _zcr_frames, _frame, _frame_power, _speech_mask
+from core.audio_utils import FRAME_LENGTH, HOP_LENGTH
+from core.metrics import Metrics
+from core.timing import StageTimer
+from core.workers import _timed_call
+
+SR = 22050
+
+def _peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.parametrize("n", [1, 2, 700, 2048, 2049, SR + 17])
+def test_zcr_counts_match_librosa(n):
+    y = np.random.RandomState(n).randn(n).astype(np.float32)
+    y[::5] = 0.0
+    counts = _zcr_frames(y, 1 + n // HOP_LENGTH)
+    expected = librosa.feature.zero_crossing_rate(y, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH)[0]
+    assert np.array_equal(counts, np.round(expected * FRAME_LENGTH))
+
+def test_blocks_do_not_change_features(monkeypatch):
+    y = speech_like(6.0, sr=SR, seed=5)
+    for trim in (False, True):
+        whole = extract_features(y, SR, trim=trim)
+        monkeypatch.setattr(core.audio_utils, "FEATURE_BLOCK_FRAMES", 7)
+        assert extract_features(y, SR, trim=trim) == pytest.approx(whole, rel=1e-6)
+        monkeypatch.undo()
+
+def test_feature_memory_does_not_grow_with_length():
+    long, short = speech_like(120.0, sr=SR, seed=1), speech_like(20.0, sr=SR, seed=1)
+    # Scratch already sized by the longest clip, as in a worker that has seen it
+    extract_features(long, SR)
+    grown = get_scratch().nbytes
+    peaks = [_peak(lambda: extract_features(y, SR, trim=True)) for y in (short, long)]
+    assert get_scratch().nbytes == grown
+    assert peaks[1] < 10e6
+    assert peaks[1] < 2 * peaks[0]
+
+def test_scratch_is_per_thread():
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(get_scratch()))
+    thread.start()
+    thread.join()
+    assert get_scratch() is get_scratch()
+    assert seen[0] is not get_scratch()
+
+def test_speech_frames_keeps_no_per_thread_buffer():
+    y = speech_like(60.0, sr=16000, seed=4)
+    scratch = get_scratch()
+    expected = _speech_mask(_frame_power(_frame(y, scratch), scratch))
+    seen = []
+    def api_thread():
+        seen.append((speech_frames(y), _peak(lambda: speech_frames(y)), get_scratch().nbytes))
+    thread = threading.Thread(target=api_thread)
+    thread.start()
+    thread.join()
+    mask, peak, nbytes = seen[0]
+    assert np.array_equal(mask, expected)
+    # An API thread (LID, the shared decode) keeps nothing and never copies the whole clip
+    assert nbytes == 0
+    assert peak < len(y) * 4
+
+def test_peak_memory_reported(monkeypatch):
+    timer = StageTimer()
+    with timer.track_memory():
+        np.ones(1_000_000)
+    # Nothing is reported unless allocations are traced
+    assert timer.peak_bytes is None
+    assert "peak_mem" not in timer.summary()
+
+    monkeypatch.setattr(core.timing, "MEMORY_BUDGET_MB", 5.0)
+    tracemalloc.start()
+    try:
+        result, _, _, peak = _timed_call(lambda n: float(np.ones(n).sum()), 1_000_000)
+        timer.add_peak(peak)
+    finally:
+        tracemalloc.stop()
+    assert result == 1e6
+    assert 8e6 <= peak < 9e6
+    assert timer.over_budget
+    assert "peak_mem=8.0MB OVER BUDGET" in timer.summary()
+
+    metrics = Metrics()
+    metrics.observe_request("/api/voice-detection", 200, timer)
+    text = metrics.render()
+    assert 'voice_request_peak_memory_bytes_bucket{endpoint="/api/voice-detection",le="10000000.0"} 1' in text
+    assert 'voice_memory_over_budget_total{endpoint="/api/voice-detection"} 1' in text
@@ -0,0 +1,72 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.cache import ResultCache
+from core.metrics import Histogram
+from core.timing import StageTimer, stage
+from core.workers import WorkerPool
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+MP3 = encode_mp3(speech_like(1.0))
+
+def _value(series):
+    # Current value of one series on /metrics (0 if not exported yet)
+    for line in TestClient(main.app).get("/metrics").text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.split()[-1])
+    return 0.0
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(main, "get_cache", lambda: cache)
+    return cache
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("latency_seconds", "x", "stage", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        h.observe("decode", value)
+    lines = h.render()
+    assert 'latency_seconds_bucket{stage="decode",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="decode",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="decode",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="decode"} 4' in lines
+
+def test_stage_outside_a_request_is_a_no_op():
+    with stage("decode"):
+        pass
+    timer = StageTimer()
+    with timer.activate():
+        with stage("decode"):
+            pass
+    assert list(timer.stages) == ["decode"]
+
+@pytest.mark.skipif(not os.path.exists("model.pkl"), reason="needs a trained model.pkl")
+def test_worker_stages_reach_header_and_metrics(monkeypatch):
+    pitch = 'voice_stage_duration_seconds_count{stage="pitch"}'
+    upload = 'voice_request_duration_seconds_count{endpoint="/api/voice-detection/upload"}'
+    before = _value(pitch), _value(upload)
+    pool = WorkerPool(max_workers=1, max_queue=1)
+    monkeypatch.setattr(main, "get_pool", lambda: pool)
+    try:
+        response = TestClient(main.app).post(
+            "/api/voice-detection/upload?language=Hindi",
+            headers={**HEADERS, "content-type": "application/octet-stream"}, content=MP3
+        )
+    finally:
+        pool.shutdown()
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    for name in ("decode", "stft", "pitch", "predict", "classify", "total"):
+        assert f"{name};dur=" in timing
+
+    assert (_value(pitch), _value(upload)) == (before[0] + 1, before[1] + 1)
+    assert _value("voice_cache_misses_total") == 1
+
+def test_errors_are_counted_per_endpoint():
+    series = 'voice_errors_total{endpoint="/api/voice-detection/upload",status="403"}'
+    before = _value(series)
+    assert TestClient(main.app).post("/api/voice-detection/upload", headers={"x-api-key": "bad"}, content=MP3).status_code == 403
+    assert _value(series) == before + 1
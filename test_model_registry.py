@@ -0,0 +1,120 @@
+import os
+import threading
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+import core.detector
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio, feature_spec, FEATURE_VERSION
+from core.detector import ModelRegistry, LEGACY_FEATURE_SPEC, save_model, classify_voice_versioned
+
+def _train(path, n_estimators):
+    X = np.random.RandomState(0).rand(40, 5)
+    y = np.array(["HUMAN", "AI_GENERATED"] * 20)
+    clf = RandomForestClassifier(n_estimators=n_estimators, random_state=0).fit(X, y)
+    tmp_path = str(path) + ".tmp"
+    joblib.dump(clf, tmp_path)
+    os.replace(tmp_path, path)
+    return clf
+
+def test_loads_once_and_reports_version(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    _train(model_path, 5)
+    registry = ModelRegistry(str(model_path), check_interval=0)
+
+    first = registry.get()
+    assert registry.get() is first
+    info = registry.info()
+    assert info["loaded"] and info["version"] == first.version
+    assert info["loadSeconds"] >= 0
+
+def test_hot_reload_on_change(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    _train(model_path, 5)
+    registry = ModelRegistry(str(model_path), check_interval=0)
+    first = registry.get()
+
+    _train(model_path, 7)
+    second = registry.get()
+    assert second.version != first.version
+    assert len(second.clf.estimators_) == 7
+    assert registry.info()["reloads"] == 1
+
+def test_bad_file_keeps_last_model(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    _train(model_path, 5)
+    registry = ModelRegistry(str(model_path), check_interval=0)
+    first = registry.get()
+
+    with open(model_path, "wb") as f:
+        f.write(b"truncated")
+    assert registry.get() is first
+
+def test_missing_model_raises(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "missing.pkl"))
+    try:
+        registry.get()
+        assert False, "Expected FileNotFoundError"
+    except FileNotFoundError:
+        pass
+
+def test_concurrent_readers_see_complete_models(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    _train(model_path, 5)
+    registry = ModelRegistry(str(model_path), check_interval=0)
+    X = np.random.rand(1, 5)
+    errors = []
+
+    def reader():
+        for _ in range(50):
+            try:
+                registry.get().clf.predict_proba(X)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for n in (6, 7, 8):
+        _train(model_path, n)
+    for t in threads:
+        t.join()
+    assert not errors
+
+def test_feature_spec_saved_with_model(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    clf = _train(model_path, 5)
+    assert ModelRegistry(str(model_path)).get().features == LEGACY_FEATURE_SPEC
+
+    save_model(clf, str(model_path), feature_spec(16000, trim=False))
+    registry = ModelRegistry(str(model_path))
+    assert registry.get().features == {"version": FEATURE_VERSION, "sample_rate": 16000}
+    assert registry.info()["features"]["sample_rate"] == 16000
+
+    save_model(clf, str(model_path), feature_spec(16000, trim=True))
+    assert ModelRegistry(str(model_path)).get().features["trim_silence"] is True
+
+def test_feature_version_mismatch_refused(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    clf = _train(model_path, 5)
+    registry = ModelRegistry(str(model_path), check_interval=0)
+    first = registry.get()
+
+    # A reload with stale features keeps serving the last good model...
+    save_model(clf, str(model_path), {"version": FEATURE_VERSION + 1, "sample_rate": 16000})
+    assert registry.get() is first
+    # ...and is never loaded from scratch
+    with pytest.raises(ValueError):
+        ModelRegistry(str(model_path)).get()
+
+def test_16k_model_shares_lid_buffer(tmp_path, monkeypatch):
+    model_path = tmp_path / "model.pkl"
+    save_model(_train(model_path, 5), str(model_path), feature_spec(16000))
+    monkeypatch.setattr(core.detector, "_registry", ModelRegistry(str(model_path)))
+
+    audio = DecodedAudio(encode_mp3(speech_like(2.0)))
+    audio.samples(16000)  # what LID decodes
+    result, version = classify_voice_versioned(audio, "English")
+    assert version is not None
+    assert set(audio._resampled) == {16000}
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features, feature_spec, feature_options
+from core.detector import ModelRegistry, save_model
+from core.pitch import yin, YinStream
+from core.streaming import StreamingFeatures
+
+SR = 22050
+
+@pytest.mark.parametrize("f0", [65.0, 110.0, 220.0, 440.0])
+def test_yin_tracks_tones(f0):
+    t = np.arange(SR) / SR
+    y = 0.3 * np.sin(2 * np.pi * f0 * t) + 0.1 * np.sin(2 * np.pi * 2 * f0 * t)
+    pitch, voiced = yin(y, SR)
+    assert voiced[2:-2].all()
+    assert np.median(pitch[voiced]) == pytest.approx(f0, rel=0.005)
+
+def test_yin_noise_and_silence_unvoiced():
+    noise = np.random.RandomState(0).randn(SR).astype(np.float32)
+    assert yin(noise, SR)[1].mean() < 0.05
+    assert not yin(np.zeros(SR, dtype=np.float32), SR)[1].any()
+
+def test_yin_follows_known_contour():
+    y, f0_true, audible = speech_like(4.0, sr=SR, seed=2, return_f0=True)
+    f0 = extract_features(y, SR, pitch="yin")["pitch_std"]
+    assert f0 == pytest.approx(np.std(f0_true[audible]), rel=0.1)
+    flat = speech_like(4.0, sr=SR, seed=2, pitch_jitter=1.0)
+    assert extract_features(flat, SR, pitch="yin")["pitch_std"] < f0 / 2
+
+def test_yin_stream_matches_batch():
+    y = speech_like(3.0, sr=16000, seed=1)
+    stream = YinStream(16000)
+    parts = [stream.add(y[start:start + 1777]) for start in range(0, len(y), 1777)]
+    parts.append(stream.add(np.zeros(0, dtype=np.float32), last=True))
+    f0, voiced = yin(y, 16000)
+    streamed = np.concatenate([p[0] for p in parts])
+    assert len(streamed) == len(f0)
+    assert np.array_equal(np.concatenate([p[1] for p in parts]), voiced)
+    assert np.allclose(streamed, f0, rtol=1e-3)
+
+def test_streaming_yin_matches_clip_features():
+    y = speech_like(5.0, sr=SR, seed=3)
+    reference = extract_features(y, SR, trim=True, pitch="yin")
+    streams = {pitch: StreamingFeatures(trim=True, pitch=pitch) for pitch in ("piptrack", "yin")}
+    for stream in streams.values():
+        for start in range(0, len(y), 3001):
+            stream.add(y[start:start + 3001])
+        stream.finish()
+    features = streams["yin"].features()
+    # YIN voices frames itself, so its pitch_std is exact; the other features are untouched
+    assert features["pitch_std"] == pytest.approx(reference["pitch_std"], rel=1e-6)
+    for name in ("zero_crossing_rate", "spectral_flatness", "silence_ratio", "duration"):
+        assert features[name] == streams["piptrack"].features()[name], name
+
+def test_pitch_backend_recorded_in_spec(tmp_path):
+    assert "pitch" not in feature_spec(SR)
+    spec = feature_spec(SR, pitch="yin")
+    assert feature_options(spec)["pitch"] == "yin"
+    with pytest.raises(ValueError):
+        feature_spec(SR, pitch="crepe")
+
+    # A model built on a backend this server doesn't have is refused
+    X = np.random.RandomState(0).rand(20, 5)
+    clf = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, ["HUMAN", "AI_GENERATED"] * 10)
+    model_path = str(tmp_path / "model.pkl")
+    save_model(clf, model_path, spec)
+    assert ModelRegistry(model_path).get().features["pitch"] == "yin"
+    save_model(clf, model_path, dict(spec, pitch="crepe"))
+    with pytest.raises(ValueError):
+        ModelRegistry(model_path).get()
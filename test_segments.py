@@ -0,0 +1,117 @@
+import base64
+import tracemalloc
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import core.detector
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio
+from core.cache import ResultCache
+from core.detector import LoadedModel, classify_segments
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+SR = 22050
+
+class CleanSpectrumModel:
+    """Calls a window AI when its spectrum is unnaturally clean (flatness is column 1)."""
+    classes_ = np.array(["AI_GENERATED", "HUMAN"])
+    def predict_proba(self, X):
+        ai = np.where(X[:, 1] < 1e-3, 0.95, 0.05)
+        return np.column_stack([ai, 1 - ai])
+
+class StubRegistry:
+    def get(self):
+        return LoadedModel(CleanSpectrumModel(), "stub", 0.0, 0.0, 0.0)
+
+class InlinePool:
+    def check_capacity(self, n=1):
+        pass
+    async def run(self, fn, *args):
+        return fn(*args)
+
+@pytest.fixture(autouse=True)
+def stub_model(monkeypatch):
+    monkeypatch.setattr(core.detector, "get_registry", lambda: StubRegistry())
+    monkeypatch.setattr(main, "get_registry", lambda: StubRegistry())
+
+def _spliced(before=20.0, splice=10.0, after=10.0):
+    # Human-like speech with a clean synthetic segment spliced in at `before` seconds
+    human = speech_like(before + after, seed=1)
+    synthetic = speech_like(splice, seed=2, pitch_jitter=0.0, pause_ratio=0.0, noise=0.0)
+    cut = int(before * SR)
+    return encode_mp3(np.concatenate([human[:cut], synthetic, human[cut:]]))
+
+def test_max_aggregate_finds_splice_that_mean_hides():
+    audio = DecodedAudio(_spliced())
+    result, version = classify_segments(audio, window_seconds=10, aggregate="max")
+    assert version == "stub"
+    assert [s["start"] for s in result["segments"]] == [0.0, 10.0, 20.0, 30.0]
+    assert [s["classification"].value for s in result["segments"]] == ["HUMAN", "HUMAN", "AI_GENERATED", "HUMAN"]
+    assert result["classification"].value == "AI_GENERATED"
+    assert "20.0-30.0s" in result["explanation"]
+
+    result, _ = classify_segments(audio, window_seconds=10, aggregate="mean")
+    assert result["classification"].value == "HUMAN"
+    assert result["analyzedSeconds"] == pytest.approx(40.0, abs=0.1)
+
+def test_early_exit_stops_decoding():
+    result, _ = classify_segments(DecodedAudio(_spliced()), window_seconds=10, early_exit_threshold=0.9)
+    assert result["earlyExit"]
+    assert len(result["segments"]) == 3
+    assert result["analyzedSeconds"] == pytest.approx(30.0, abs=0.1)
+
+def _counting(audio):
+    # Samples the decoder has produced so far
+    decoded = [0]
+    iter_pcm = audio._iter_pcm
+    def counted(sr=None):
+        for block in iter_pcm(sr):
+            decoded[0] += len(block)
+            yield block
+    audio._iter_pcm = counted
+    return decoded
+
+def test_windows_are_not_held_back():
+    audio = DecodedAudio(encode_mp3(speech_like(40.0, seed=5)))
+    decoded = _counting(audio)
+    windows = audio.iter_windows(SR, 10)
+    assert len(next(windows)) == 10 * SR
+    # Only half a window more is decoded to know the first one does not take the tail
+    assert decoded[0] < 15.5 * SR
+    assert [len(w) for w in windows] == [10 * SR] * 3
+
+    audio = DecodedAudio(encode_mp3(speech_like(40.0, seed=5)))
+    decoded = _counting(audio)
+    assert len(audio.head(SR, 10)) == 10 * SR
+    assert decoded[0] < 10.5 * SR
+
+def test_peak_memory_does_not_grow_with_length():
+    def peak(seconds):
+        audio = DecodedAudio(encode_mp3(speech_like(seconds, seed=4)))
+        tracemalloc.start()
+        classify_segments(audio, window_seconds=5)
+        size = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return size
+    short, long = peak(20), peak(120)
+    assert long < short * 1.5
+
+def test_segmented_endpoint(monkeypatch):
+    monkeypatch.setattr(main, "get_pool", lambda: InlinePool())
+    monkeypatch.setattr(main, "get_cache", lambda: ResultCache())
+    payload = {
+        "language": "English", "audioFormat": "mp3", "windowSeconds": 10,
+        "audioBase64": base64.b64encode(_spliced()).decode()
+    }
+    response = TestClient(main.app).post("/api/voice-detection/segmented", headers=HEADERS, json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["classification"] == "AI_GENERATED"
+    assert body["language"] == "English"
+    assert len(body["segments"]) == 4
+    assert body["segments"][2] == {"start": 20.0, "end": 30.0, "classification": "AI_GENERATED", "confidenceScore": 0.95}
+
+    payload["aggregate"] = "median"
+    response = TestClient(main.app).post("/api/voice-detection/segmented", headers=HEADERS, json=payload)
+    assert response.status_code == 400
@@ -0,0 +1,97 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+import core.detector
+import main
+from benchmarks.synth import speech_like
+from core.audio_utils import extract_features, FEATURE_SAMPLE_RATE
+from core.detector import ModelRegistry
+from core.streaming import StreamingFeatures
+from train_model import generate_synthetic_data
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    X, y = generate_synthetic_data(200)
+    model_path = tmp_path / "model.pkl"
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), model_path)
+    monkeypatch.setattr(core.detector, "_registry", ModelRegistry(str(model_path)))
+
+def test_streaming_matches_clip_features():
+    y = speech_like(6.0, seed=3).astype(np.float32)
+    reference = extract_features(y, FEATURE_SAMPLE_RATE)
+
+    stream = StreamingFeatures()
+    # Odd chunk size so frames straddle chunk boundaries
+    for start in range(0, len(y), 3001):
+        stream.add(y[start:start + 3001])
+    stream.finish()
+    features = stream.features()
+
+    assert features.keys() == reference.keys()
+    for name in reference:
+        assert features[name] == pytest.approx(reference[name], rel=1e-3, abs=1e-4), name
+
+def test_streaming_state_is_bounded():
+    stream = StreamingFeatures(input_rate=16000)
+    chunk = speech_like(1.0, sr=16000, seed=1).astype(np.float32)
+    stream.add(chunk)
+    size = len(stream._buffer)
+    for _ in range(20):
+        stream.add(chunk)
+    assert len(stream._buffer) <= max(size, 2048)
+    assert stream.seconds == pytest.approx(21.0, abs=0.05)
+
+def test_websocket_partial_and_final_verdicts(model):
+    pcm = (speech_like(5.0, sr=16000, seed=2) * 32767).astype("<i2")
+    with TestClient(main.app).websocket_connect(
+        "/api/voice-detection/stream?language=English&sampleRate=16000&interval=2", headers=HEADERS
+    ) as ws:
+        messages = []
+        for start in range(0, len(pcm), 8000):
+            ws.send_bytes(pcm[start:start + 8000].tobytes())
+        messages.append(ws.receive_json())
+        messages.append(ws.receive_json())
+        ws.send_json({"event": "end"})
+        final = ws.receive_json()
+
+    assert [m["status"] for m in messages] == ["partial", "partial"]
+    assert messages[0]["seconds"] < messages[1]["seconds"]
+    assert final["status"] == "final"
+    assert final["language"] == "English"
+    assert final["seconds"] == pytest.approx(5.0, abs=0.05)
+    assert final["classification"] in ("HUMAN", "AI_GENERATED")
+    assert 0.0 <= final["confidenceScore"] <= 1.0
+
+def test_websocket_rejects_bad_key():
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with TestClient(main.app).websocket_connect("/api/voice-detection/stream", headers={"x-api-key": "nope"}) as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+def test_websocket_auth_message(model):
+    pcm = (speech_like(1.0, sr=16000, seed=3) * 32767).astype("<i2")
+    with TestClient(main.app).websocket_connect("/api/voice-detection/stream?language=English") as ws:
+        ws.send_json({"event": "auth", "apiKey": "sk_test_123456789"})
+        ws.send_bytes(pcm.tobytes())
+        ws.send_json({"event": "end"})
+        assert ws.receive_json()["status"] == "final"
+
+    for first in ({"event": "auth", "apiKey": "nope"}, {"event": "end"}):
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with TestClient(main.app).websocket_connect("/api/voice-detection/stream") as ws:
+                ws.send_json(first)
+                ws.receive_json()
+        assert exc.value.code == 1008
+
+def test_websocket_ignores_key_in_url(monkeypatch):
+    # The URL is logged, so a key there must not authenticate; the socket waits for the auth message
+    monkeypatch.setattr(main, "STREAM_AUTH_TIMEOUT_SECONDS", 0.2)
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with TestClient(main.app).websocket_connect("/api/voice-detection/stream?api_key=sk_test_123456789") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
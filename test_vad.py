@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import core.lid
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio, extract_features, load_audio_features, speech_frames, non_silent_intervals
+from core.lid import LanguageDetector
+from core.streaming import StreamingFeatures
+from core.timing import StageTimer
+
+SR = 22050
+
+def _voicemail(speech_seconds=8.0, lead=5.0, tail=25.0):
+    # Speech between a long quiet lead-in and a long quiet tail
+    rng = np.random.RandomState(0)
+    speech = speech_like(speech_seconds, sr=SR, seed=4)
+    y = np.concatenate([0.0005 * rng.randn(int(lead * SR)), speech, 0.0005 * rng.randn(int(tail * SR))])
+    return speech, y.astype(np.float32)
+
+def test_trimmed_features_ignore_surrounding_silence():
+    speech, y = _voicemail()
+    full, trimmed = extract_features(y, SR), extract_features(y, SR, trim=True)
+    # The timeline is untouched: silence ratio and duration describe the whole clip
+    for name in ("zero_crossing_rate", "silence_ratio", "duration"):
+        assert trimmed[name] == full[name]
+    assert trimmed["duration"] == pytest.approx(38.0)
+
+    # Voice features barely move when 30s of silence is added around the speech
+    alone = extract_features(speech, SR, trim=True)
+    for name in ("spectral_flatness", "pitch_std"):
+        assert trimmed[name] == pytest.approx(alone[name], rel=0.05), name
+    assert full["spectral_flatness"] > 10 * trimmed["spectral_flatness"]
+
+def test_speech_mask_computed_once_and_shared():
+    _, y = _voicemail(2.0, lead=1.0, tail=3.0)
+    audio = DecodedAudio(encode_mp3(y, SR))
+    timer = StageTimer()
+    with timer.activate():
+        first = load_audio_features(audio, SR, trim=True)
+        second = load_audio_features(audio, SR, trim=True)
+        intervals = audio.speech_intervals(SR)
+    assert first == second
+    assert first == extract_features(audio.samples(SR), SR, trim=True)
+    assert "vad" in timer.stages
+    assert audio._speech.keys() == {SR}
+    assert np.array_equal(intervals, non_silent_intervals(audio.samples(SR)))
+
+def test_streaming_trim_matches_clip_features():
+    _, y = _voicemail(4.0, lead=2.0, tail=6.0)
+    reference = extract_features(y, SR, trim=True)
+    stream = StreamingFeatures(trim=True)
+    for start in range(0, len(y), 3001):
+        stream.add(y[start:start + 3001])
+    stream.finish()
+    features = stream.features()
+    for name in reference:
+        assert features[name] == pytest.approx(reference[name], rel=0.02, abs=1e-4), name
+
+class FakeWhisper:
+    def __init__(self):
+        self.seen = None
+    def feature_extractor(self, audio):
+        self.seen = audio
+        return np.zeros((80, len(audio) // 160), dtype=np.float32)
+    def detect_language(self, features=None):
+        return "hi", 0.9, [("hi", 0.9)]
+
+def test_lid_uses_given_speech_intervals(monkeypatch):
+    fake = FakeWhisper()
+    monkeypatch.setattr(core.lid, "_model", fake)
+    monkeypatch.setattr(core.lid, "LID_MODE", "detect")
+    audio = np.arange(32000, dtype=np.float32)
+    assert LanguageDetector().detect(audio, intervals=[(1000, 3000), (8000, 9000)]) == "Hindi"
+    assert np.array_equal(fake.seen, np.concatenate([audio[1000:3000], audio[8000:9000]]))
+
+def test_speech_frames_mask():
+    y = np.concatenate([np.zeros(SR), speech_like(1.0, sr=SR, seed=1), np.zeros(SR)]).astype(np.float32)
+    mask = speech_frames(y)
+    assert not mask[:30].any() and not mask[-30:].any() and mask.sum() < len(mask) / 2
@@ -0,0 +1,111 @@
+import base64
+import pickle
+import pytest
+from fastapi.testclient import TestClient
+import auth
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.audio_utils import DecodedAudio
+from core.cache import ResultCache
+from core.validation import validate_mp3, validate_base64, PayloadLimits, PayloadError
+
+HEADERS = {"x-api-key": "sk_test_123456789"}
+MP3 = encode_mp3(speech_like(20.0))
+NO_LIMITS = PayloadLimits(10 ** 9, 10 ** 6)
+# A 4 KB ID3v2 tag to put in front
+TAG = b"ID3\x03\x00\x00" + bytes([0, 0, 0x20, 0]) + b"\x00" * 4096
+# The Xing/Info frame count hidden: the duration can only be estimated from the bitrate
+CBR = MP3.replace(b"Info", b"none", 1).replace(b"Xing", b"none", 1)
+
+def test_duration_from_headers():
+    info = validate_mp3(MP3, NO_LIMITS)
+    assert info.exact and info.sample_rate == 22050
+    assert abs(info.duration - 20.0) < 0.2
+    assert validate_base64(base64.b64encode(MP3).decode(), NO_LIMITS) == info
+
+def test_id3_tag_and_cbr_estimate():
+    info = validate_base64(base64.b64encode(TAG + CBR).decode(), NO_LIMITS)
+    assert info.offset >= len(TAG) and not info.exact
+    assert abs(info.duration - 20.0) < 1.0
+
+def test_line_wrapped_base64():
+    # MIME-style base64 with a newline every 76 characters
+    assert validate_base64(base64.encodebytes(TAG + MP3).decode(), NO_LIMITS) == validate_mp3(TAG + MP3, NO_LIMITS)
+
+def test_estimated_duration_enforced_while_decoding():
+    # An estimate alone never rejects: the limit is applied to the decoded audio instead
+    assert not validate_mp3(CBR, PayloadLimits(10 ** 9, 10)).exact
+    with pytest.raises(PayloadError) as e:
+        DecodedAudio(CBR, max_seconds=10).samples(16000)
+    assert (e.value.reason, e.value.status) == ("too_long", 413)
+    # Raised in worker processes too
+    copy = pickle.loads(pickle.dumps(e.value))
+    assert (str(copy), copy.reason, copy.status) == (str(e.value), "too_long", 413)
+    assert len(DecodedAudio(CBR, max_seconds=30).samples(16000)) > 19 * 16000
+
+@pytest.mark.parametrize("payload, reason", [
+    (b"", "empty"),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt " + bytes(2000), "not_mp3"),
+    (b"\xff\xfb\x90\x00" + bytes(3000), "not_mp3"),
+])
+def test_rejects_non_mp3(payload, reason):
+    with pytest.raises(PayloadError) as e:
+        validate_mp3(payload, NO_LIMITS)
+    assert e.value.reason == reason and e.value.status == 400
+
+def test_limits():
+    with pytest.raises(PayloadError) as e:
+        validate_mp3(MP3, PayloadLimits(len(MP3) - 1, 600))
+    assert (e.value.reason, e.value.status) == ("too_large", 413)
+    with pytest.raises(PayloadError) as e:
+        validate_base64(base64.b64encode(MP3).decode(), PayloadLimits(10 ** 9, 10))
+    assert (e.value.reason, e.value.status) == ("too_long", 413)
+
+def test_api_rejects_before_decoding_with_per_key_limits(monkeypatch):
+    monkeypatch.setattr(main, "get_cache", lambda: ResultCache())
+    monkeypatch.setattr(auth, "API_KEY_LIMITS", {"sk_test_123456789": {"maxSeconds": 5}})
+    decoded = []
+    monkeypatch.setattr(main.DecodedAudio, "from_base64", classmethod(lambda cls, s: decoded.append(s)))
+    client = TestClient(main.app)
+    before = main.get_metrics().payloads._values.get(("too_long",), 0)
+
+    payload = {"language": "English", "audioFormat": "mp3", "audioBase64": base64.b64encode(MP3).decode()}
+    response = client.post("/api/voice-detection", headers=HEADERS, json=payload)
+    assert response.status_code == 413
+    assert "limit is 5s" in response.json()["message"]
+
+    payload["audioBase64"] = base64.b64encode(b"plain text, not audio" * 50).decode()
+    assert client.post("/api/voice-detection", headers=HEADERS, json=payload).status_code == 400
+    assert decoded == []
+    assert main.get_metrics().payloads._values[("too_long",)] == before + 1
+
+def test_api_rejects_estimated_overlong_clip_after_decoding(monkeypatch):
+    monkeypatch.setattr(main, "get_cache", lambda: ResultCache())
+    monkeypatch.setattr(auth, "API_KEY_LIMITS", {"sk_test_123456789": {"maxSeconds": 5}})
+    payload = {"audioFormat": "mp3", "audioBase64": base64.b64encode(CBR).decode()}
+    response = TestClient(main.app).post("/api/voice-detection", headers=HEADERS, json=payload)
+    assert response.status_code == 413
+    assert "limit of 5s" in response.json()["message"]
+
+def test_cached_result_does_not_bypass_a_lower_limit(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(main, "get_cache", lambda: cache)
+    monkeypatch.setattr(main, "_model_version", lambda: "v1")
+
+    class Pool:
+        def check_capacity(self, n=1):
+            pass
+        async def run(self, fn, audio, *args):
+            audio.samples(22050)
+            return {"classification": "HUMAN", "confidenceScore": 0.9, "explanation": "x"}, "v1"
+
+    monkeypatch.setattr(main, "get_pool", lambda: Pool())
+    client = TestClient(main.app)
+    payload = {"language": "English", "audioFormat": "mp3", "audioBase64": base64.b64encode(CBR).decode()}
+    assert client.post("/api/voice-detection", headers=HEADERS, json=payload).status_code == 200
+
+    # The same clip is cached now, but this key may only send 5 s
+    monkeypatch.setattr(auth, "API_KEY_LIMITS", {"sk_test_123456789": {"maxSeconds": 5}})
+    response = client.post("/api/voice-detection", headers=HEADERS, json=payload)
+    assert response.status_code == 413
+    assert "limit of 5s" in response.json()["message"]
@@ -0,0 +1,57 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+import base64
+import main
+from benchmarks.synth import speech_like, encode_mp3
+from core.cache import ResultCache
+from core.workers import WorkerPool, PoolFullError
+
+def test_rejects_when_queue_full():
+    pool = WorkerPool(max_workers=1, max_queue=1)
+    try:
+        first = pool.submit(time.sleep, 0.5)
+        second = pool.submit(time.sleep, 0.0)
+        with pytest.raises(PoolFullError):
+            pool.submit(time.sleep, 0.0)
+        stats = pool.stats()
+        assert stats["inFlight"] == 2 and stats["queueDepth"] == 1 and stats["rejected"] == 1
+
+        first.result()
+        second.result()
+        stats = pool.stats()
+        assert stats["inFlight"] == 0 and stats["completed"] == 2
+        assert stats["utilization"] > 0
+    finally:
+        pool.shutdown()
+
+def test_run_returns_result():
+    pool = WorkerPool(max_workers=1, max_queue=0)
+    try:
+        assert asyncio.run(pool.run(pow, 2, 10)) == 1024
+        # Workers are spawned, not forked from the threaded API process
+        assert pool._get_executor()._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
+
+def test_endpoint_returns_503_with_retry_after(monkeypatch):
+    pool = WorkerPool(max_workers=1, max_queue=0)
+    monkeypatch.setattr(main, "get_pool", lambda: pool)
+    # An empty cache: a result cached by another test would skip the pool
+    cache = ResultCache()
+    monkeypatch.setattr(main, "get_cache", lambda: cache)
+    # A well-formed clip, so it gets past payload validation
+    audio = base64.b64encode(encode_mp3(speech_like(1.0))).decode()
+    try:
+        pool.submit(time.sleep, 1.0)
+        response = TestClient(main.app).post(
+            "/api/voice-detection",
+            headers={"x-api-key": "sk_test_123456789"},
+            json={"language": "English", "audioFormat": "mp3", "audioBase64": audio}
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+        assert response.json()["status"] == "error"
+    finally:
+        pool.shutdown()
@@ -1,5 +1,4 @@
 import numpy as np
-import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
@@ -48,15 +47,21 @@ def generate_synthetic_data(n_samples=2000):
 
     return np.array(X), np.array(y)
 
+import argparse
 import os
 import glob
-import librosa
+from core.audio_utils import feature_spec, FEATURE_SAMPLE_RATE, TRIM_SILENCE, PITCH_BACKEND, PITCH_BACKENDS
+from core.detector import save_model, FEATURE_ORDER
+from core.feature_store import FeatureStore, extract_dataset, FEATURE_CACHE_DIR
 
-def load_real_data(dataset_dir="dataset"):
+def load_real_data(dataset_dir="dataset", sr=FEATURE_SAMPLE_RATE, limit=None, workers=None,
+                   cache_dir=FEATURE_CACHE_DIR, trim=TRIM_SILENCE, pitch=PITCH_BACKEND):
     """
     Attempts to load real ASVspoof data from the directory.
     Expected structure: dataset/LA/ASVspoof2019_LA_train/flac/*.flac
     And protocol: dataset/LA/ASVspoof2019_LA_cm_protocols/ASVspoof2019.LA.cm.train.trn.txt
+    Features are extracted in parallel and cached in cache_dir, so re-runs
+    only process new or modified files.
     """
     protocol_path = os.path.join(dataset_dir, "LA", "ASVspoof2019_LA_cm_protocols", "ASVspoof2019.LA.cm.train.trn.txt")
     audio_dir = os.path.join(dataset_dir, "LA", "ASVspoof2019_LA_train", "flac")
@@ -66,9 +71,6 @@ def load_real_data(dataset_dir="dataset"):
         return None, None
 
     print(f"Loading real data from {dataset_dir}...")
-    X = []
-    y = []
-    
     # Read labels
     # Format: SPEAKER_ID AUDIO_FILE_NAME SYSTEM_ID KEY(bonafide/spoof)
     file_labels = {}
@@ -80,44 +82,23 @@ def load_real_data(dataset_dir="dataset"):
                 label = "HUMAN" if parts[4] == "bonafide" else "AI_GENERATED"
                 file_labels[filename] = label
 
-    # Process files (Limit to 200 for demo speed if many exist)
-    count = 0
-    limit = 200 
-    
-    files = glob.glob(os.path.join(audio_dir, "*.flac"))
-    print(f"Found {len(files)} audio files. Processing first {limit}...")
-    
-    for file_path in files[:limit]:
-        filename = os.path.basename(file_path).replace(".flac", "")
-        if filename in file_labels:
-            try:
-                # Load audio
-                y_signal, sr = librosa.load(file_path, sr=22050)
-                
-                # Extract features (Same as audio_utils logic)
-                zcr = np.mean(librosa.feature.zero_crossing_rate(y=y_signal))
-                flatness = np.mean(librosa.feature.spectral_flatness(y=y_signal))
-                pitches, magnitudes = librosa.piptrack(y=y_signal, sr=sr)
-                pitch_values = pitches[magnitudes > np.median(magnitudes)]
-                pitch_std = np.std(pitch_values) if len(pitch_values) > 0 else 0
-                
-                non_silent_intervals = librosa.effects.split(y_signal, top_db=20)
-                non_silent_duration = sum([(end - start) for start, end in non_silent_intervals]) / sr
-                total_duration = librosa.get_duration(y=y_signal, sr=sr)
-                silence_ratio = 1.0 - (non_silent_duration / total_duration)
+    files = sorted(glob.glob(os.path.join(audio_dir, "*.flac")))
+    files = [path for path in files if os.path.basename(path)[:-len(".flac")] in file_labels][:limit]
+    print(f"Found {len(files)} labelled audio files.")
 
-                X.append([zcr, flatness, pitch_std, silence_ratio, total_duration])
-                y.append(file_labels[filename])
-                count += 1
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
+    store = FeatureStore(cache_dir, feature_spec(sr, trim, pitch))
+    X = extract_dataset(files, store, FEATURE_ORDER, workers=workers)
+    y = np.array([file_labels[os.path.basename(path)[:-len(".flac")]] for path in files])
 
-    print(f"Processed {count} real samples.")
-    return np.array(X), np.array(y)
+    # Drop files that could not be decoded
+    ok = ~np.isnan(X).any(axis=1)
+    print(f"Processed {int(ok.sum())} real samples.")
+    return X[ok], y[ok]
 
-def train_and_save():
+def train_and_save(sr=FEATURE_SAMPLE_RATE, limit=None, workers=None, cache_dir=FEATURE_CACHE_DIR,
+                   trim=TRIM_SILENCE, pitch=PITCH_BACKEND):
     print("Checking for real dataset...")
-    X, y = load_real_data()
+    X, y = load_real_data(sr=sr, limit=limit, workers=workers, cache_dir=cache_dir, trim=trim, pitch=pitch)
     
     if X is None or len(X) == 0:
         print("Generating synthetic dataset (Fallback)...")
@@ -139,9 +120,20 @@ def train_and_save():
     print(f"Model Accuracy: {acc * 100:.2f}%")
     print(classification_report(y_test, preds))
     
-    # Save
-    joblib.dump(clf, MODEL_PATH)
-    print(f"Model saved to {MODEL_PATH}")
+    # Save with the feature spec, so the API extracts features at the same rate
+    save_model(clf, MODEL_PATH, feature_spec(sr, trim, pitch))
+    print(f"Model saved to {MODEL_PATH} ({sr} Hz features, {pitch} pitch{', silence trimmed' if trim else ''})")
 
 if __name__ == "__main__":
-    train_and_save()
+    parser = argparse.ArgumentParser(description="Train the voice classifier")
+    parser.add_argument("--sample-rate", type=int, default=FEATURE_SAMPLE_RATE,
+                        help="analysis rate for features (16000 shares the LID buffer)")
+    parser.add_argument("--limit", type=int, default=None, help="use only the first N labelled files")
+    parser.add_argument("--workers", type=int, default=None, help="feature extraction processes (default: CPU count)")
+    parser.add_argument("--cache-dir", default=FEATURE_CACHE_DIR, help="on-disk feature cache")
+    parser.add_argument("--trim-silence", action=argparse.BooleanOptionalAction, default=TRIM_SILENCE,
+                        help="compute spectral and pitch features on speech frames only")
+    parser.add_argument("--pitch", choices=sorted(PITCH_BACKENDS), default=PITCH_BACKEND,
+                        help="pitch tracker behind pitch_std")
+    args = parser.parse_args()
+    train_and_save(args.sample_rate, args.limit, args.workers, args.cache_dir, args.trim_silence, args.pitch)